@@ -0,0 +1,7 @@
+from importlib.metadata import PackageNotFoundError, version
+
+try:
+    __version__ = version("sql-mock")
+except PackageNotFoundError:
+    # Not installed (e.g. when the sources are used directly)
+    __version__ = None
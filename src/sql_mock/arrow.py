@@ -0,0 +1,203 @@
+from typing import List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pydantic import BaseModel
+
+COUNT_COLUMN = "count_all"
+SUM_COLUMN = f"{COUNT_COLUMN}_sum"
+
+
+class ArrowMismatches(BaseModel):
+    """
+    Rows of an Arrow comparison that don't match.
+
+    Attributes:
+        data (list of dicts): Actual rows that don't match
+        expected (list of dicts): Expected rows that don't match
+        actual_row_count (int): Total number of actual rows
+        expected_row_count (int): Total number of expected rows
+        positions (list of ints): Positions of the mismatching rows in the results for ordered comparisons.
+            None if the positions in `data` and `expected` are the positions in the results.
+    """
+
+    data: List[dict]
+    expected: List[dict]
+    actual_row_count: int
+    expected_row_count: int
+    positions: Optional[List[int]] = None
+
+
+def _to_comparable_tables(
+    actual: pa.Table, expected: List[dict], ignore_missing_keys: bool
+) -> Tuple[pa.Table, pa.Table]:
+    """
+    Bring the actual and expected data into Arrow tables with the same schema.
+
+    Raises:
+        ValueError: If the data can't be compared column-wise (e.g. the expected rows have inconsistent keys)
+    """
+    if ignore_missing_keys:
+        columns = [key for key in dict.fromkeys(key for row in expected for key in row) if key in actual.column_names]
+    else:
+        columns = actual.column_names
+
+    if not columns or any(len(row) != len(columns) or any(key not in row for key in columns) for row in expected):
+        raise ValueError("Expected rows can't be compared column-wise")
+
+    actual = actual.select(columns)
+    # Use the schema of the database result so that Python values are converted to the database types
+    expected_table = pa.Table.from_pylist(expected, schema=actual.schema)
+    return actual, expected_table
+
+
+def _same_values(left: pa.ChunkedArray, right: pa.ChunkedArray) -> pa.ChunkedArray:
+    # Comparisons with NULL return NULL in Arrow but two NULL values should be treated as equal
+    both_null = pc.and_(pc.is_null(left), pc.is_null(right))
+    return pc.or_(pc.fill_null(pc.equal(left, right), False), both_null)
+
+
+def _ordered_mismatches(actual: pa.Table, expected: pa.Table) -> Tuple[List[dict], List[dict], List[int]]:
+    common_length = min(actual.num_rows, expected.num_rows)
+    actual_head = actual.slice(0, common_length)
+    expected_head = expected.slice(0, common_length)
+
+    same_rows = None
+    for column in actual.column_names:
+        same_values = _same_values(actual_head[column], expected_head[column])
+        same_rows = same_values if same_rows is None else pc.and_(same_rows, same_values)
+
+    mismatching_indices = pc.indices_nonzero(pc.invert(same_rows))
+    # Rows that only exist on one side are always mismatches
+    data = actual.take(mismatching_indices).to_pylist() + actual.slice(common_length).to_pylist()
+    expected_rows = expected.take(mismatching_indices).to_pylist() + expected.slice(common_length).to_pylist()
+    positions = mismatching_indices.to_pylist() + list(range(common_length, max(actual.num_rows, expected.num_rows)))
+    return data, expected_rows, positions
+
+
+def _unordered_mismatches(actual: pa.Table, expected: pa.Table) -> Tuple[List[dict], List[dict]]:
+    columns = actual.column_names
+    actual_counts = actual.group_by(columns).aggregate([([], COUNT_COLUMN)])
+    expected_counts = expected.group_by(columns).aggregate([([], COUNT_COLUMN)])
+    expected_counts = expected_counts.set_column(
+        expected_counts.schema.get_field_index(COUNT_COLUMN), COUNT_COLUMN, pc.negate(expected_counts[COUNT_COLUMN])
+    )
+
+    # Rows that appear equally often on both sides sum up to 0
+    balance = pa.concat_tables([actual_counts, expected_counts]).group_by(columns).aggregate([(COUNT_COLUMN, "sum")])
+    unbalanced = balance.filter(pc.not_equal(balance[SUM_COLUMN], 0))
+
+    data, expected_rows = [], []
+    for row in unbalanced.to_pylist():
+        count = row.pop(SUM_COLUMN)
+        if count > 0:
+            data.extend(dict(row) for _ in range(count))
+        else:
+            expected_rows.extend(dict(row) for _ in range(-count))
+    return data, expected_rows
+
+
+def get_mismatches(
+    actual: pa.Table, expected: List[dict], ignore_missing_keys: bool = False, ignore_order: bool = True
+) -> ArrowMismatches:
+    """
+    Compare an Arrow table against the expected rows using vectorized Arrow operations.
+
+    Only rows that don't match are converted to Python objects. If the data can't be compared with Arrow
+    (e.g. nested types or values that can't be converted to the result schema), all rows are converted.
+
+    Args:
+        actual (pa.Table): Result of the query
+        expected (list of dicts): Expected data
+        ignore_missing_keys (bool): If true, only the columns present in the expected data are compared.
+        ignore_order (bool): If true, the order of rows will be ignored for comparison.
+
+    Returns:
+        The mismatching rows together with the total row counts. Both row lists are empty if the data is equal.
+    """
+    row_counts = {"actual_row_count": actual.num_rows, "expected_row_count": len(expected)}
+    try:
+        actual_table, expected_table = _to_comparable_tables(actual, expected, ignore_missing_keys)
+        if ignore_order:
+            data, expected_rows = _unordered_mismatches(actual_table, expected_table)
+            return ArrowMismatches(data=data, expected=expected_rows, **row_counts)
+        data, expected_rows, positions = _ordered_mismatches(actual_table, expected_table)
+        return ArrowMismatches(data=data, expected=expected_rows, positions=positions, **row_counts)
+    except (ValueError, TypeError, pa.ArrowException):
+        # ArrowInvalid and ArrowTypeError are subclasses of ValueError and TypeError
+        data = actual.to_pylist()
+        if ignore_missing_keys:
+            keys_to_keep = {key for row in expected for key in row}
+            data = [{key: value for key, value in row.items() if key in keys_to_keep} for row in data]
+        return ArrowMismatches(data=data, expected=expected, **row_counts)
+
+
+def get_mismatching_rows(
+    actual: pa.Table, expected: List[dict], ignore_missing_keys: bool = False, ignore_order: bool = True
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Compare an Arrow table against the expected rows (see `get_mismatches`).
+
+    Returns:
+        Tuple of actual and expected rows that don't match. Both lists are empty if the data is equal.
+    """
+    mismatches = get_mismatches(
+        actual=actual, expected=expected, ignore_missing_keys=ignore_missing_keys, ignore_order=ignore_order
+    )
+    return mismatches.data, mismatches.expected
+
+
+def is_constant(values) -> bool:
+    """
+    Check whether all values of an Arrow array are the same (NULL values are treated as equal to each other).
+    Returns False for types that can't be compared (e.g. nested types).
+    """
+    try:
+        return pc.count_distinct(values, mode="all").as_py() <= 1
+    except (pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        return False
+
+
+def _to_python_formatted_strings(values) -> Optional[pa.ChunkedArray]:
+    """
+    Convert values to strings that are formatted like `str(value)` of the corresponding Python objects.
+    Returns None for types where Arrow's formatting differs from Python's (e.g. floats or timestamps).
+    """
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        return values
+    if pa.types.is_integer(values.type) or pa.types.is_date(values.type):
+        return pc.cast(values, pa.string())
+    if pa.types.is_boolean(values.type):
+        return pc.if_else(values, "True", "False")
+    return None
+
+
+def render_sql_casts(
+    values, dtype: str, column_name: str, quote: bool, escape_sequences: Tuple[Tuple[str, str], ...]
+) -> Optional[List[str]]:
+    """
+    Render `cast(<value> AS <dtype>) AS <column_name>` for all values of an Arrow array in a single vectorized pass.
+
+    Args:
+        values (pa.Array or pa.ChunkedArray): Values of the column
+        dtype (str): Data type to cast the values to
+        column_name (str): Name of the column
+        quote (bool): Whether the values need to be quoted
+        escape_sequences (tuple): Pairs of (substring, replacement) that are applied in order to escape quoted values
+
+    Returns:
+        List of rendered SQL strings or None if the type of the values is not supported.
+    """
+    strings = _to_python_formatted_strings(values)
+    if strings is None:
+        return None
+
+    prefix, suffix = "cast(", f" AS {dtype}) AS {column_name}"
+    if quote:
+        for substring, replacement in escape_sequences:
+            strings = pc.replace_substring(strings, substring, replacement)
+        prefix, suffix = f"{prefix}'", f"'{suffix}"
+
+    # Joining NULL values results in NULL which we replace by the NULL cast
+    rendered = pc.binary_join_element_wise(prefix, strings, suffix, "")
+    return pc.fill_null(rendered, f"cast(NULL AS {dtype}) AS {column_name}").to_pylist()
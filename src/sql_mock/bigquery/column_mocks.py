@@ -4,7 +4,8 @@ from sql_mock.column_mocks import BaseColumnMock
 
 
 class BigQueryColumnMock(BaseColumnMock):
-    pass
+    # BigQuery does not support escaping quotes by doubling them but uses backslash escape sequences
+    escape_sequences = (("\\", "\\\\"), ("'", "\\'"))
 
 
 class Boolean(BigQueryColumnMock):
@@ -1,5 +1,12 @@
+from typing import Optional
+
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
 class BigQuerySettings(BaseSettings):
     google_application_credentials: str
+    # Maximum number of concurrent queries of all test processes on this machine (None means no limit)
+    max_concurrent_queries: Optional[int] = Field(
+        default=None, validation_alias="SQL_MOCK_BIGQUERY_MAX_CONCURRENT_QUERIES"
+    )
@@ -1,11 +1,19 @@
+from typing import TYPE_CHECKING, Iterator
+
 from google.cloud import bigquery
 
 from sql_mock.bigquery.settings import BigQuerySettings
 from sql_mock.table_mocks import BaseTableMock
 
+# pyarrow is an optional dependency
+if TYPE_CHECKING:
+    import pyarrow
+
 
 class BigQueryTableMock(BaseTableMock):
     _sql_dialect = "bigquery"
+    # BigQuery rejects unresolved queries larger than 1 MB
+    _max_query_size = 1024 * 1024
 
     def __init__(
         self,
@@ -15,7 +23,29 @@ class BigQueryTableMock(BaseTableMock):
         self.settings = BigQuerySettings()  # Note: This checks whether GOOGLE_APPLICATION_CREDENTIALS is set
         super().__init__(*args, **kwargs)
 
+    def _connect(self):
+        return bigquery.Client()  # Note this requires GOOGLE_APPLICATION_CREDENTIALS to be set
+
     def _get_results(self, query: str) -> list[dict]:
-        client = bigquery.Client()  # Note this requires GOOGLE_APPLICATION_CREDENTIALS to be set
-        query_job = client.query(query)
-        return [dict(r) for r in query_job.result()]
+        with self._connection() as client:
+            query_job = client.query(query)
+            results = [dict(r) for r in query_job.result()]
+        self._sql_mock_data.cache_hit = query_job.cache_hit
+        return results
+
+    def _iter_results(self, query: str) -> Iterator[dict]:
+        with self._connection() as client:
+            query_job = client.query(query)
+            # Result pages are only requested when the previous page is consumed
+            rows = query_job.result(page_size=self._result_batch_size)
+            # Waiting for the result makes sure that the job is done
+            self._sql_mock_data.cache_hit = query_job.cache_hit
+            for r in rows:
+                yield dict(r)
+
+    def _get_arrow_results(self, query: str) -> "pyarrow.Table":
+        with self._connection() as client:
+            query_job = client.query(query)
+            results = query_job.to_arrow()
+        self._sql_mock_data.cache_hit = query_job.cache_hit
+        return results
@@ -4,6 +4,9 @@ from sql_mock.column_mocks import BaseColumnMock
 
 
 class ClickhouseColumnMock(BaseColumnMock):
+    # ClickHouse treats backslashes in string literals as escape characters
+    escape_sequences = (("\\", "\\\\"), ("'", "''"))
+
     def __init__(self, default, nullable=False) -> None:
         super().__init__(default, nullable)
         if nullable:
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,3 +10,5 @@ class ClickHouseSettings(BaseSettings):
     password: str
     port: str
     use_secure_connection: bool = False
+    # Maximum number of concurrent queries of all test processes on this machine (None means no limit)
+    max_concurrent_queries: Optional[int] = None
@@ -1,11 +1,27 @@
+from typing import TYPE_CHECKING, Iterator
+
 import clickhouse_connect
 
 from sql_mock.clickhouse.settings import ClickHouseSettings
 from sql_mock.table_mocks import BaseTableMock
 
+# pyarrow is an optional dependency
+if TYPE_CHECKING:
+    import pyarrow
+
 
 class ClickHouseTableMock(BaseTableMock):
     _sql_dialect = "clickhouse"
+    # Default of the `max_query_size` setting of ClickHouse
+    _max_query_size = 256 * 1024
+    # Temporary tables live in the session which clickhouse_connect creates for each client
+    _supports_temp_table_inputs = True
+    _create_temp_table_statement = "CREATE TEMPORARY TABLE {table_name} ENGINE = Memory AS {query}"
+    _drop_temp_table_statement = "DROP TEMPORARY TABLE IF EXISTS {table_name}"
+    # The drop statement never affects permanent tables
+    _temp_table_name_suffix = ""
+    # ClickHouse inlines CTEs so input mocks that are referenced multiple times would be evaluated multiple times
+    _materialize_repeated_inputs = True
 
     def __init__(
         self,
@@ -15,13 +31,32 @@ class ClickHouseTableMock(BaseTableMock):
         self.settings = ClickHouseSettings()
         super().__init__(*args, **kwargs)
 
-    def _get_results(self, query: str) -> list[dict]:
-        with clickhouse_connect.get_client(
+    def _connect(self):
+        return clickhouse_connect.get_client(
             host=self.settings.host,
             secure=self.settings.use_secure_connection,
             username=self.settings.user,
             password=self.settings.password,
             port=self.settings.port,
-        ) as client:
+        )
+
+    def _get_results(self, query: str) -> list[dict]:
+        with self._connection() as client:
+            self._execute_setup_statements(client.command)
             res = client.query(query, use_none=True)
         return [dict(zip(res.column_names, row)) for row in res.result_rows]
+
+    def _get_arrow_results(self, query: str) -> "pyarrow.Table":
+        with self._connection() as client:
+            self._execute_setup_statements(client.command)
+            return client.query_arrow(query, use_strings=True)
+
+    def _iter_results(self, query: str) -> Iterator[dict]:
+        with self._connection() as client:
+            self._execute_setup_statements(client.command)
+            # Leaving the stream context closes the response which aborts the query if it was not fully consumed
+            with client.query_row_block_stream(query, use_none=True) as stream:
+                column_names = stream.source.column_names
+                for block in stream:
+                    for row in block:
+                        yield dict(zip(column_names, row))
@@ -1,7 +1,32 @@
 import json
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import sqlglot
+
 from sql_mock.constants import NO_INPUT, NoInput
 
 
+def _is_arrow_array(values) -> bool:
+    # pyarrow is an optional dependency which is why we avoid importing it here
+    return type(values).__module__.startswith("pyarrow")
+
+
+@lru_cache(maxsize=None)
+def get_dialect_dtype(dtype: str, dialect: Optional[str]) -> str:
+    """
+    Name of a data type in a SQL dialect (e.g. `Float` is `FLOAT64` in BigQuery).
+    The data of input mocks is not parsed by sqlglot which is why its casts need to use the names of the dialect.
+    Types that sqlglot doesn't know are used as they are.
+    """
+    if dialect is None:
+        return dtype
+    try:
+        return sqlglot.exp.DataType.build(dtype, dialect=dialect).sql(dialect=dialect)
+    except (sqlglot.errors.ParseError, ValueError):
+        return dtype
+
+
 class BaseColumnMock:
     """
     Represents a mock column in a database table.
@@ -11,12 +36,14 @@ class BaseColumnMock:
         nullable: Indicator whether the column can be null
         default: The default value for the column.
         use_quotes_for_casting (bool): Indicator whether the value needs to be quoted (e.g. in the final cast)
+        escape_sequences (tuple): Pairs of (substring, replacement) that are applied in order to escape quoted values
     """
 
     dtype = None
     nullable = True
     default = None
     use_quotes_for_casting = True
+    escape_sequences = (("'", "''"),)
 
     def __init__(self, default=None, nullable=True) -> None:
         """
@@ -31,20 +58,81 @@ class BaseColumnMock:
         self.nullable = nullable
         self.default = default
 
-    def to_sql(self, column_name: str, value=NO_INPUT) -> str:
+    def to_sql(self, column_name: str, value=NO_INPUT, dialect: str = None) -> str:
+        """
+        Render a value as SQL cast with column alias.
+
+        Args:
+            column_name (str): Name of the column
+            value: Value of the column. The default of the column is used if it is not provided.
+            dialect (str): SQL dialect whose type names are used in the cast
+        """
+        return self._to_sql(column_name=column_name, value=value, dtype=get_dialect_dtype(self.dtype, dialect))
+
+    def _to_sql(self, column_name: str, value, dtype: str) -> str:
         # Note: We compare against NO_INPUT instead of checking for None since None could be a valid input for nullable columns
         val = value if not isinstance(value, NoInput) else self.default
         # In case the val is None, we convert it to NULL
         if val is None:
-            return f"cast(NULL AS {self.dtype}) AS {column_name}"
+            return f"cast(NULL AS {dtype}) AS {column_name}"
 
         # Check if the value is a list
         if isinstance(val, list):
             # Convert the list to a JSON string
             val = json.dumps(val)
 
-        val = f"'{val}'" if self.use_quotes_for_casting else val
-        return f"cast({val} AS {self.dtype}) AS {column_name}"
+        val = f"'{self._escape(str(val))}'" if self.use_quotes_for_casting else val
+        return f"cast({val} AS {dtype}) AS {column_name}"
+
+    def to_sql_batch(self, column_name: str, values: Iterable, dialect: str = None) -> List[str]:
+        """
+        Render a whole column of values to SQL. The result is the same as calling `to_sql` for each value.
+
+        Args:
+            column_name (str): Name of the column
+            values: Values of the column. Can be a list (which can contain NO_INPUT for missing values) or a pyarrow
+                Array / ChunkedArray. Arrow data of simple types is rendered in a single vectorized pass.
+            dialect (str): SQL dialect whose type names are used in the casts
+        """
+        # The type is translated once for the whole column
+        dtype = get_dialect_dtype(self.dtype, dialect)
+        if _is_arrow_array(values):
+            # pyarrow is an optional dependency
+            from sql_mock.arrow import render_sql_casts
+
+            rendered = render_sql_casts(
+                values=values,
+                dtype=dtype,
+                column_name=column_name,
+                quote=self.use_quotes_for_casting,
+                escape_sequences=self.escape_sequences,
+            )
+            if rendered is not None:
+                return rendered
+            values = values.to_pylist()
+
+        # Each distinct value only needs to be rendered once
+        rendered_values = {}
+        result = []
+        for value in values:
+            try:
+                # Include the type since e.g. True and 1 would be the same dictionary key
+                key = (type(value), value)
+                rendered = rendered_values.get(key)
+            except TypeError:
+                # Unhashable values like lists
+                key, rendered = None, None
+            if rendered is None:
+                rendered = self._to_sql(column_name=column_name, value=value, dtype=dtype)
+                if key is not None:
+                    rendered_values[key] = rendered
+            result.append(rendered)
+        return result
+
+    def _escape(self, value: str) -> str:
+        for substring, replacement in self.escape_sequences:
+            value = value.replace(substring, replacement)
+        return value
 
     def cast_field(self, column_name):
         return f"cast({column_name} AS {self.dtype}) AS {column_name}"
@@ -1,5 +1,21 @@
+from sql_mock.query_size import AUTO_POLICY, QUERY_SIZE_POLICIES
+
+
 class SQLMockConfig:
     _dbt_project_path = None
+    # Results with up to this many rows (expected and actual combined) are compared with a plain assert
+    # which gives a rich (but slow for large data) diff with pytest's assertion rewriting
+    _detailed_diff_max_rows = 100
+    _failure_diff_max_examples = 10
+    _failed_query_max_length = 10000
+    # Only render the columns of input mocks that are referenced by the tested query
+    _projection_pushdown = True
+    # Budget for the size of generated queries in bytes. If None, the default of the database backend is used.
+    _max_query_size = None
+    _query_size_policy = AUTO_POLICY
+    # Load input mocks that are evaluated multiple times by the query into temporary tables (see
+    # `BaseTableMock._materialize_repeated_inputs`). Opt-in since it needs permissions to create temporary tables.
+    _materialize_repeated_inputs = False
 
     @classmethod
     def set_dbt_project_path(cls, path: str):
@@ -10,3 +26,73 @@ class SQLMockConfig:
         if cls._dbt_project_path is None:
             raise ValueError("DBT project path is not set. Please set it using set_dbt_project_path()")
         return cls._dbt_project_path
+
+    @classmethod
+    def set_detailed_diff_max_rows(cls, max_rows: int):
+        cls._detailed_diff_max_rows = max_rows
+
+    @classmethod
+    def get_detailed_diff_max_rows(cls) -> int:
+        return cls._detailed_diff_max_rows
+
+    @classmethod
+    def set_failure_diff_max_examples(cls, max_examples: int):
+        cls._failure_diff_max_examples = max_examples
+
+    @classmethod
+    def get_failure_diff_max_examples(cls) -> int:
+        return cls._failure_diff_max_examples
+
+    @classmethod
+    def set_failed_query_max_length(cls, max_length: int = None):
+        """Set the maximum number of characters of the query that is printed on failure. None prints the full query."""
+        cls._failed_query_max_length = max_length
+
+    @classmethod
+    def get_failed_query_max_length(cls) -> int:
+        return cls._failed_query_max_length
+
+    @classmethod
+    def set_projection_pushdown(cls, enabled: bool):
+        """Enable or disable rendering only the referenced columns of input mocks"""
+        cls._projection_pushdown = enabled
+
+    @classmethod
+    def get_projection_pushdown(cls) -> bool:
+        return cls._projection_pushdown
+
+    @classmethod
+    def set_max_query_size(cls, max_size: int = None):
+        """Set the budget for generated queries in bytes. None uses the limit of the database backend."""
+        cls._max_query_size = max_size
+
+    @classmethod
+    def get_max_query_size(cls) -> int:
+        return cls._max_query_size
+
+    @classmethod
+    def set_query_size_policy(cls, policy: str):
+        """
+        Set how queries that exceed the query size budget are handled:
+
+        * "auto": Switch the largest input mocks to a compact encoding and, if the backend supports it, to temp tables
+        * "compact": Only switch the largest input mocks to a compact encoding
+        * "error": Raise an error
+        * "ignore": Send the query regardless of its size
+        """
+        if policy not in QUERY_SIZE_POLICIES:
+            raise ValueError(f"Unknown query size policy {policy}. Choose one of {QUERY_SIZE_POLICIES}")
+        cls._query_size_policy = policy
+
+    @classmethod
+    def get_query_size_policy(cls) -> str:
+        return cls._query_size_policy
+
+    @classmethod
+    def set_materialize_repeated_inputs(cls, enabled: bool):
+        """Enable or disable loading input mocks that are referenced multiple times into temporary tables"""
+        cls._materialize_repeated_inputs = enabled
+
+    @classmethod
+    def get_materialize_repeated_inputs(cls) -> bool:
+        return cls._materialize_repeated_inputs
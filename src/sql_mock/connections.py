@@ -0,0 +1,192 @@
+import hashlib
+import os
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Hashable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # File locks are only available on Unix. Elsewhere, the number of concurrent queries is not limited.
+    fcntl = None
+
+# Directory of the lock files that limit the number of concurrent queries of all processes on this machine.
+# Every user has their own directory since the lock files of other users can't be opened.
+QUERY_SLOT_LOCK_DIR = os.path.join(
+    tempfile.gettempdir(), "sql_mock_query_slots" if fcntl is None else f"sql_mock_query_slots_{os.getuid()}"
+)
+# Seconds to wait before checking again whether a query slot is free
+QUERY_SLOT_POLL_INTERVAL = 0.05
+
+
+class SharedConnections:
+    """
+    Registry of database connections that are shared by all table mocks of a process (e.g. a pytest session).
+    Connections are opened on first use and stay open until `close_all` is called.
+    Sharing is disabled by default which means that every query opens its own connection.
+    """
+
+    _enabled = False
+    _connections: Dict[Hashable, Any] = {}
+
+    @classmethod
+    def enable(cls):
+        cls._enabled = True
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._enabled
+
+    @classmethod
+    def get(cls, key: Hashable, connect: Callable[[], Any]) -> Any:
+        """
+        Get the shared connection for a key and open it if it doesn't exist yet.
+
+        Args:
+            key: Identifies the database and its connection settings
+            connect (Callable): Function that opens a new connection
+        """
+        if key not in cls._connections:
+            cls._connections[key] = connect()
+        return cls._connections[key]
+
+    @classmethod
+    def close_all(cls):
+        """Close all shared connections and disable sharing"""
+        connections, cls._connections = cls._connections, {}
+        cls._enabled = False
+        for connection in connections.values():
+            try:
+                connection.close()
+            except Exception:
+                # Closing is best effort, the connection might already be broken
+                pass
+
+
+# Seconds spent on database connections (running queries and fetching results) since the last reset
+_warehouse_time = 0.0
+# Seconds spent waiting for a query slot since the last reset
+_queue_time = 0.0
+
+
+def get_warehouse_time() -> float:
+    return _warehouse_time
+
+
+def get_queue_time() -> float:
+    return _queue_time
+
+
+def reset_warehouse_time():
+    """Reset the warehouse and queue time"""
+    global _warehouse_time, _queue_time
+    _warehouse_time = 0.0
+    _queue_time = 0.0
+
+
+def _try_lock(path: str):
+    """
+    Lock the file without blocking. Returns the opened file or None if another process holds the lock.
+
+    Raises:
+        OSError: If the lock file can't be opened or locked (e.g. missing permissions)
+    """
+    file = None
+    try:
+        file = open(path, "a")
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        file.close()
+        return None
+    except OSError:
+        if file is not None:
+            file.close()
+        raise
+    return file
+
+
+@contextmanager
+def query_slot(name: str, max_concurrent_queries: Optional[int]) -> Iterator[None]:
+    """
+    Wait until one of `max_concurrent_queries` slots is free. The slots are shared by all processes on this machine
+    (e.g. pytest-xdist workers) and implemented as file locks which are released by the OS if a process dies.
+    The waiting time is added to the queue time. If the lock files can't be used, a warning is issued and the number
+    of concurrent queries is not limited.
+
+    Args:
+        name (str): Name of the slots (e.g. per database)
+        max_concurrent_queries (int): Number of slots. If None, the number of concurrent queries is not limited.
+    """
+    global _queue_time
+    if not max_concurrent_queries or fcntl is None:
+        yield
+        return
+
+    paths = [os.path.join(QUERY_SLOT_LOCK_DIR, f"{name}.{index}.lock") for index in range(max_concurrent_queries)]
+    # Processes start looking at different slots to reduce contention
+    offset = os.getpid() % max_concurrent_queries
+    paths = paths[offset:] + paths[:offset]
+
+    start = time.perf_counter()
+    slot = None
+    try:
+        os.makedirs(QUERY_SLOT_LOCK_DIR, exist_ok=True)
+        while slot is None:
+            slot = next(filter(None, (_try_lock(path) for path in paths)), None)
+            if slot is None:
+                time.sleep(QUERY_SLOT_POLL_INTERVAL)
+    except OSError as e:
+        warnings.warn(
+            f"Query slots in {QUERY_SLOT_LOCK_DIR} can't be used, the number of concurrent queries is not limited: {e}"
+        )
+    _queue_time += time.perf_counter() - start
+
+    try:
+        yield
+    finally:
+        # Closing the file releases the lock
+        if slot is not None:
+            slot.close()
+
+
+@contextmanager
+def open_connection(
+    key: Hashable, connect: Callable[[], ContextManager], max_concurrent_queries: int = None
+) -> Iterator[Any]:
+    """
+    Connection for a query. The shared connection is used if sharing is enabled. Otherwise a new connection is opened
+    and closed afterwards. The time spent within the context is added to the warehouse time.
+
+    Args:
+        key: Identifies the database and its connection settings
+        connect (Callable): Function that opens a new connection which can be used as context manager
+        max_concurrent_queries (int): Maximum number of concurrent queries with the same key of all processes on this
+            machine. If None, the number of concurrent queries is not limited.
+    """
+    slot_name = hashlib.sha256(repr(key).encode()).hexdigest()[:16]
+    with query_slot(slot_name, max_concurrent_queries):
+        with _open_connection(key, connect) as connection:
+            yield connection
+
+
+@contextmanager
+def _open_connection(key: Hashable, connect: Callable[[], ContextManager]) -> Iterator[Any]:
+    global _warehouse_time
+    start = time.perf_counter()
+    try:
+        if SharedConnections.is_enabled():
+            connection = SharedConnections.get(key, connect)
+            try:
+                yield connection
+            finally:
+                # Queries of table mocks don't change any data. Ending the transaction (if the database has any)
+                # drops temp tables and keeps the connection usable after failed statements.
+                if hasattr(connection, "rollback"):
+                    connection.rollback()
+        else:
+            with connect() as connection:
+                yield connection
+    finally:
+        _warehouse_time += time.perf_counter() - start
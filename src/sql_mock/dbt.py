@@ -1,11 +1,26 @@
+import hashlib
 import json
 import os
-from typing import TYPE_CHECKING
-
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import sqlglot
+import sqlglot.serde
 import yaml
+from pydantic import BaseModel
 
+from sql_mock.bigquery.column_mocks import BigQueryColumnMock
+from sql_mock.clickhouse.column_mocks import ClickhouseColumnMock
+from sql_mock.column_mocks import BaseColumnMock
 from sql_mock.config import SQLMockConfig
+from sql_mock.exceptions import ValidationError
 from sql_mock.helpers import parse_table_refs, validate_input_mocks
+from sql_mock.redshift.column_mocks import RedshiftColumnMock
+from sql_mock.snowflake.column_mocks import SnowflakeColumnMock
 from sql_mock.table_mocks import TableMockMeta
 
 # Needed to avoid circular imports on type check
@@ -13,16 +28,447 @@ if TYPE_CHECKING:
     from sql_mock.table_mocks import BaseTableMock
 
 DBT_DEFAULT_TARGET_PATH = "target"
-
-
-def _get_manifest_from_project_file(project_path: str) -> dict:
+# Sections of the manifest and fields of their nodes that SQL Mock uses
+MANIFEST_SECTIONS = ("nodes", "sources")
+MANIFEST_NODE_FIELDS = (
+    "unique_id",
+    "resource_type",
+    "name",
+    "compiled_path",
+    "relation_name",
+    "source_name",
+    "identifier",
+    "depends_on",
+    "checksum",
+)
+CATALOG_FILE_NAME = "catalog.json"
+# The index of the manifest is stored next to it so that other processes (e.g. pytest-xdist workers) can reuse it
+MANIFEST_INDEX_FILE_NAME = "sql_mock_manifest_index.json"
+# Needs to be increased when the format of the stored index changes
+MANIFEST_INDEX_VERSION = 5
+# Directory in the dbt target directory where the parsed queries of models are stored
+AST_CACHE_DIR_NAME = "sql_mock_ast_cache"
+# Maximum number of stored ASTs. The least recently used ASTs are removed when new ones are stored.
+AST_CACHE_MAX_ENTRIES = 10000
+
+
+def _get_manifest_path(project_path: str) -> str:
     with open(project_path, "r") as f:
         dbt_project = yaml.safe_load(f)
     target_path = dbt_project.get("target-path", DBT_DEFAULT_TARGET_PATH)
     project_dir = os.path.dirname(project_path)
-    with open(os.path.join(project_dir, target_path, "manifest.json"), "r") as file:
-        manifest = json.load(file)
-    return manifest
+    return os.path.join(project_dir, target_path, "manifest.json")
+
+
+class DbtManifestIndex(BaseModel):
+    """
+    Name-keyed lookups for the nodes of a dbt manifest that SQL Mock needs.
+    If multiple nodes have the same name, the first one in the manifest is used.
+
+    Attributes:
+        models (dict): Mapping of model name to its compiled path (relative to the project directory), table ref,
+            unique id, checksum and upstream nodes
+        sources (dict): Mapping of (source name, identifier) to the table ref, unique id and checksum of the source
+            table
+        seeds (dict): Mapping of seed name to its table ref, unique id and checksum
+        snapshots (dict): Mapping of snapshot name to its table ref, unique id and checksum
+    """
+
+    models: Dict[str, Dict[str, Any]] = {}
+    sources: Dict[Tuple[str, str], Dict[str, Optional[str]]] = {}
+    seeds: Dict[str, Dict[str, Optional[str]]] = {}
+    snapshots: Dict[str, Dict[str, Optional[str]]] = {}
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[Tuple[str, dict]]) -> "DbtManifestIndex":
+        """
+        Build the index from the nodes of a manifest.
+
+        Args:
+            nodes (iterable): Tuples of the manifest section ("nodes" or "sources") and a node of that section
+        """
+        models, sources, seeds, snapshots = {}, {}, {}, {}
+        # Upstream nodes are referenced by unique id which is mapped to the lookup key after all nodes are known
+        node_keys, model_parents = {}, {}
+        for section, node in nodes:
+            metadata = {
+                "table_ref": node["relation_name"],
+                "unique_id": node.get("unique_id"),
+                "checksum": (node.get("checksum") or {}).get("checksum"),
+            }
+            if section == "nodes" and node["resource_type"] == "model":
+                node_key = ["model", node["name"]]
+                if node["name"] not in models:
+                    models[node["name"]] = {"compiled_path": node["compiled_path"], **metadata}
+                    model_parents[node["name"]] = node.get("depends_on", {}).get("nodes", [])
+            elif section == "nodes" and node["resource_type"] == "seed":
+                node_key = ["seed", node["name"]]
+                seeds.setdefault(node["name"], metadata)
+            elif section == "nodes" and node["resource_type"] == "snapshot":
+                node_key = ["snapshot", node["name"]]
+                snapshots.setdefault(node["name"], metadata)
+            elif section == "sources" and node["resource_type"] == "source":
+                node_key = ["source", node["source_name"], node["identifier"]]
+                sources.setdefault((node["source_name"], node["identifier"]), metadata)
+            else:
+                continue
+            node_keys.setdefault(node.get("unique_id"), node_key)
+
+        for name, parents in model_parents.items():
+            models[name]["depends_on"] = [node_keys[parent] for parent in parents if parent in node_keys]
+        return cls(models=models, sources=sources, seeds=seeds, snapshots=snapshots)
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> "DbtManifestIndex":
+        return cls.from_nodes((section, node) for section in MANIFEST_SECTIONS for node in manifest[section].values())
+
+
+def _stream_manifest_nodes(file: BinaryIO, ijson) -> Iterator[Tuple[str, dict]]:
+    """
+    Parse the manifest incrementally and only keep the fields of the nodes that SQL Mock uses.
+    Nodes are maps on the third level of the manifest (manifest -> section -> node id -> node).
+    Besides scalar fields, only the upstream nodes of `depends_on` and the checksum are kept.
+    """
+    depth, section, node, keys = 0, None, None, {}
+    for event, value in ijson.basic_parse(file):
+        if event in ("start_map", "start_array"):
+            depth += 1
+            if depth == 3 and section is not None:
+                node = {}
+        elif event in ("end_map", "end_array"):
+            if depth == 3 and node is not None:
+                yield section, node
+                node = None
+            depth -= 1
+        elif event == "map_key":
+            if depth == 1:
+                section = value if value in MANIFEST_SECTIONS else None
+            keys[depth] = value
+        elif node is None:
+            continue
+        elif depth == 3 and keys[3] in MANIFEST_NODE_FIELDS:
+            node[keys[3]] = value
+        elif depth == 4 and keys[3] == "checksum" and keys[4] == "checksum":
+            node["checksum"] = {"checksum": value}
+        elif depth == 5 and keys[3] == "depends_on" and keys[4] == "nodes":
+            node.setdefault("depends_on", {}).setdefault("nodes", []).append(value)
+
+
+def _load_json(file: BinaryIO):
+    try:
+        # orjson is an optional dependency
+        import orjson
+    except ImportError:
+        return json.load(file)
+    return orjson.loads(file.read())
+
+
+def _read_manifest_nodes(manifest_path: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Read the nodes of a manifest. The manifest is streamed if ijson is installed, otherwise it is loaded at once
+    (with orjson if it is installed).
+    """
+    try:
+        # ijson is an optional dependency
+        import ijson
+    except ImportError:
+        ijson = None
+
+    with open(manifest_path, "rb") as file:
+        if ijson is not None:
+            yield from _stream_manifest_nodes(file, ijson)
+            return
+
+        manifest = _load_json(file)
+
+    for section in MANIFEST_SECTIONS:
+        for node in manifest[section].values():
+            yield section, node
+
+
+def _load_stored_manifest_index(index_path: str, manifest_stat: os.stat_result) -> Optional[DbtManifestIndex]:
+    """Load the stored index of a manifest. Returns None if there is no valid index for the current manifest."""
+    try:
+        with open(index_path, "r") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != MANIFEST_INDEX_VERSION
+        or data.get("manifest_mtime_ns") != manifest_stat.st_mtime_ns
+        or data.get("manifest_size") != manifest_stat.st_size
+    ):
+        return None
+    return DbtManifestIndex(
+        models=data["models"],
+        sources={(source_name, identifier): metadata for source_name, identifier, metadata in data["sources"]},
+        seeds=data["seeds"],
+        snapshots=data["snapshots"],
+    )
+
+
+def _store_manifest_index(index: DbtManifestIndex, index_path: str, manifest_stat: os.stat_result):
+    """
+    Store the index of a manifest. Failures are ignored since the index can always be built again.
+    """
+    data = {
+        "version": MANIFEST_INDEX_VERSION,
+        "manifest_mtime_ns": manifest_stat.st_mtime_ns,
+        "manifest_size": manifest_stat.st_size,
+        "models": index.models,
+        "sources": [
+            [source_name, identifier, metadata] for (source_name, identifier), metadata in index.sources.items()
+        ],
+        "seeds": index.seeds,
+        "snapshots": index.snapshots,
+    }
+    _store_json(data, index_path)
+
+
+def _store_json(data, path: str):
+    """
+    Store data as JSON file. The file is replaced atomically so that concurrent readers never see a partial file.
+    Failures (e.g. a read-only directory) are ignored since the stored files are only caches.
+    """
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False
+        ) as file:
+            temp_path = file.name
+            json.dump(data, file)
+        os.replace(temp_path, path)
+    except OSError:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# The modification times are part of the cache keys so that changed files are read again
+@lru_cache(maxsize=32)
+def _get_cached_manifest_path(project_path: str, project_mtime_ns: int) -> str:
+    return _get_manifest_path(project_path)
+
+
+@lru_cache(maxsize=8)
+def _get_cached_manifest_index(manifest_path: str, manifest_mtime_ns: int, manifest_size: int) -> DbtManifestIndex:
+    manifest_stat = os.stat(manifest_path)
+    index_path = os.path.join(os.path.dirname(manifest_path), MANIFEST_INDEX_FILE_NAME)
+    index = _load_stored_manifest_index(index_path, manifest_stat)
+    if index is None:
+        index = DbtManifestIndex.from_nodes(_read_manifest_nodes(manifest_path))
+        _store_manifest_index(index, index_path, manifest_stat)
+    return index
+
+
+def get_manifest_index(project_path: str) -> DbtManifestIndex:
+    """
+    Get the index of the dbt manifest of a project.
+    The manifest is only parsed once per path and modification time. The index is stored next to the manifest
+    and reused by other processes as long as the manifest doesn't change.
+
+    Args:
+        project_path (str): Path to the dbt_project.yml file.
+    """
+    project_path = os.path.abspath(project_path)
+    manifest_path = _get_cached_manifest_path(project_path, os.stat(project_path).st_mtime_ns)
+    manifest_stat = os.stat(manifest_path)
+    return _get_cached_manifest_index(manifest_path, manifest_stat.st_mtime_ns, manifest_stat.st_size)
+
+
+@lru_cache(maxsize=4)
+def _get_cached_catalog_columns(catalog_path: str, catalog_mtime_ns: int) -> Dict[str, Dict[str, str]]:
+    with open(catalog_path, "rb") as file:
+        catalog = _load_json(file)
+    return {
+        unique_id: {
+            column["name"]: column["type"]
+            for column in sorted(node["columns"].values(), key=lambda column: column["index"])
+        }
+        for section in MANIFEST_SECTIONS
+        for unique_id, node in (catalog.get(section) or {}).items()
+    }
+
+
+def _get_target_dir(project_path: str) -> str:
+    project_path = os.path.abspath(project_path)
+    return os.path.dirname(_get_cached_manifest_path(project_path, os.stat(project_path).st_mtime_ns))
+
+
+def get_catalog_columns(project_path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Get the column names and types of all tables in the dbt catalog of a project (generated by `dbt docs generate`).
+    The catalog is only parsed once per path and modification time.
+
+    Args:
+        project_path (str): Path to the dbt_project.yml file.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Mapping of unique id of the dbt node to its columns (name -> type) in table order
+    """
+    catalog_path = os.path.join(_get_target_dir(project_path), CATALOG_FILE_NAME)
+    return _get_cached_catalog_columns(catalog_path, os.stat(catalog_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _get_cached_file_hash(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_file_hash(path: str) -> Optional[str]:
+    """SHA-256 hash of a file which is only computed again if the file changed. None if the file does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _get_cached_file_hash(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _get_index_node(index: DbtManifestIndex, node_key: Tuple[str, ...]) -> Optional[dict]:
+    if node_key[0] == "model":
+        return index.models.get(node_key[1])
+    if node_key[0] == "source":
+        return index.sources.get(tuple(node_key[1:]))
+    if node_key[0] == "snapshot":
+        return index.snapshots.get(node_key[1])
+    return index.seeds.get(node_key[1])
+
+
+def get_node_fingerprint(
+    project_path: str, node_key: Tuple[str, ...], fingerprints: Dict[Tuple[str, ...], Optional[str]] = None
+) -> Optional[str]:
+    """
+    Fingerprint of a dbt node that changes if the node or any of its upstream nodes changes. It is built from the
+    manifest metadata (including the dbt checksum) and compiled query of the node and the fingerprints of its upstream
+    nodes.
+
+    Args:
+        project_path (str): Path to the dbt_project.yml file.
+        node_key (tuple): Lookup key of the node, e.g. ("model", model_name), ("source", source_name, table_name),
+            ("seed", seed_name) or ("snapshot", snapshot_name)
+        fingerprints (dict): Already computed fingerprints of nodes of the same project and manifest. New fingerprints
+            are added so that shared upstream nodes are only fingerprinted once.
+
+    Returns:
+        Hex digest of the fingerprint or None if the node or one of its upstream nodes is not part of the manifest
+    """
+    fingerprints = {} if fingerprints is None else fingerprints
+    node_key = tuple(node_key)
+    if node_key not in fingerprints:
+        node = _get_index_node(get_manifest_index(project_path), node_key)
+        parts = None
+        if node is not None:
+            parts = [json.dumps(node, sort_keys=True)]
+            if node_key[0] == "model":
+                parts.append(get_file_hash(os.path.join(os.path.dirname(project_path), node["compiled_path"])))
+            parts += [
+                get_node_fingerprint(project_path, upstream_node_key, fingerprints)
+                for upstream_node_key in node.get("depends_on", [])
+            ]
+        if parts is None or None in parts:
+            fingerprints[node_key] = None
+        else:
+            fingerprints[node_key] = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return fingerprints[node_key]
+
+
+def _get_ast_cache_path(cache_dir: str, query: str, dialect: Optional[str]) -> str:
+    # ASTs are stored per sqlglot version so that the ASTs of other versions can be removed as a whole
+    key = hashlib.sha256(f"{dialect}\n{query}".encode()).hexdigest()
+    return os.path.join(cache_dir, sqlglot.__version__, f"{key}.json")
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _evict_ast_cache(cache_dir: str, version_dir: str):
+    """
+    Bound the size of the AST cache before a new AST is stored. ASTs of other sqlglot versions are removed since they
+    are never loaded again. If the cache holds `AST_CACHE_MAX_ENTRIES` ASTs, the least recently used ones are removed.
+    Files that other processes remove at the same time are skipped.
+    """
+    if not os.path.isdir(version_dir):
+        for name in os.listdir(cache_dir):
+            # Another process might have created the directory of the current version in the meantime
+            if name != os.path.basename(version_dir):
+                _remove_path(os.path.join(cache_dir, name))
+        return
+
+    paths = [entry.path for entry in os.scandir(version_dir) if entry.name.endswith(".json")]
+    if len(paths) < AST_CACHE_MAX_ENTRIES:
+        return
+    last_used = {}
+    for path in paths:
+        try:
+            last_used[path] = os.path.getmtime(path)
+        except OSError:
+            pass
+    for path in sorted(last_used, key=last_used.get)[: len(last_used) - AST_CACHE_MAX_ENTRIES + 1]:
+        _remove_path(path)
+
+
+def parse_query_cached(query: str, dialect: Optional[str], cache_dir: str) -> sqlglot.Expression:
+    """
+    Parse a query and store the serialized AST in a cache directory. Other processes (e.g. pytest-xdist workers or
+    later test runs) load the stored AST instead of parsing the query again.
+    The AST is stored per hash of the query, sqlglot version and dialect. The cache keeps at most
+    `AST_CACHE_MAX_ENTRIES` ASTs of the current sqlglot version.
+
+    Args:
+        query (str): The query to parse
+        dialect (str): The SQL dialect to use for parsing the query
+        cache_dir (str): Directory of the cache. It is created if it doesn't exist.
+    """
+    cache_path = _get_ast_cache_path(cache_dir, query, dialect)
+    try:
+        with open(cache_path, "rb") as file:
+            query_ast = sqlglot.serde.load(_load_json(file))
+    except (OSError, ValueError):
+        pass
+    else:
+        try:
+            # The modification time tracks when the AST was last used for the eviction
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return query_ast
+
+    query_ast = sqlglot.parse_one(query, dialect=dialect)
+    version_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        _evict_ast_cache(cache_dir, version_dir)
+        os.makedirs(version_dir, exist_ok=True)
+    except OSError:
+        return query_ast
+    _store_json(sqlglot.serde.dump(query_ast), cache_path)
+    return query_ast
+
+
+class DbtTableMockMeta(TableMockMeta):
+    """
+    Metadata of table mocks of dbt models. Parsed queries are cached on disk (see `parse_query_cached`) since
+    compiled models only change when the project is compiled again.
+
+    Attributes:
+        ast_cache_dir (string): Directory of the cache for parsed queries. If None, queries are always parsed.
+    """
+
+    ast_cache_dir: Optional[str] = None
+
+    def _parse_query(self, rendered_query: str, dialect: str) -> sqlglot.Expression:
+        if self.ast_cache_dir is None:
+            return super()._parse_query(rendered_query, dialect=dialect)
+        return parse_query_cached(rendered_query, dialect=dialect, cache_dir=self.ast_cache_dir)
 
 
 def _get_model_metadata(project_path: str, model_name: str) -> dict:
@@ -34,19 +480,20 @@ def _get_model_metadata(project_path: str, model_name: str) -> dict:
         model_name (str): Name of the dbt model.
 
     Returns:
-        dict: Dictionary of metadata from dbt (path to compiled sql query and table ref)
+        dict: Dictionary of metadata from dbt (path to compiled sql query, table ref, unique id and directory of the
+            cache for parsed queries)
     """
-    manifest = _get_manifest_from_project_file(project_path)
-    project_dir = os.path.dirname(project_path)
-
-    for node in manifest["nodes"].values():
-        if node["resource_type"] == "model" and node["name"] == model_name:
-            return {
-                "query_path": os.path.join(project_dir, node["compiled_path"]),
-                "table_ref": node["relation_name"],
-            }
+    model = get_manifest_index(project_path).models.get(model_name)
+    if model is None:
+        raise ValueError(f"Model '{model_name}' not found in dbt manifest.")
 
-    raise ValueError(f"Model '{model_name}' not found in dbt manifest.")
+    project_dir = os.path.dirname(project_path)
+    return {
+        "query_path": os.path.join(project_dir, model["compiled_path"]),
+        "table_ref": model["table_ref"],
+        "unique_id": model["unique_id"],
+        "ast_cache_dir": os.path.join(_get_target_dir(project_path), AST_CACHE_DIR_NAME),
+    }
 
 
 def _get_source_metadata(project_path: str, source_name: str, table_name: str) -> dict:
@@ -61,19 +508,14 @@ def _get_source_metadata(project_path: str, source_name: str, table_name: str) -
     Returns:
         dict: Dictionary of metadata from dbt
     """
-    manifest = _get_manifest_from_project_file(project_path)
+    source = get_manifest_index(project_path).sources.get((source_name, table_name))
+    if source is None:
+        raise ValueError(f"Source '{source_name}' not found in dbt manifest.")
 
-    for node in manifest["sources"].values():
-        if (
-            node["resource_type"] == "source"
-            and node["source_name"] == source_name
-            and node["identifier"] == table_name
-        ):
-            return {
-                "table_ref": node["relation_name"],
-            }
-
-    raise ValueError(f"Source '{source_name}' not found in dbt manifest.")
+    return {
+        "table_ref": source["table_ref"],
+        "unique_id": source["unique_id"],
+    }
 
 
 def _get_seed_metadata(project_path: str, seed_name: str) -> dict:
@@ -87,15 +529,89 @@ def _get_seed_metadata(project_path: str, seed_name: str) -> dict:
     Returns:
         dict: Dictionary of metadata from dbt
     """
-    manifest = _get_manifest_from_project_file(project_path)
+    seed = get_manifest_index(project_path).seeds.get(seed_name)
+    if seed is None:
+        raise ValueError(f"Seed '{seed_name}' not found in dbt manifest.")
 
-    for node in manifest["nodes"].values():
-        if node["resource_type"] == "seed" and node["name"] == seed_name:
-            return {
-                "table_ref": node["relation_name"],
-            }
+    return {
+        "table_ref": seed["table_ref"],
+        "unique_id": seed["unique_id"],
+    }
+
+
+def _get_snapshot_metadata(project_path: str, snapshot_name: str) -> dict:
+    """
+    Extracts the table metadata for dbt snapshot from the manifest file.
+
+    Args:
+        project_path (str): Path to the dbt_project.yml file.
+        snapshot_name (str): Name of the dbt snapshot.
+
+    Returns:
+        dict: Dictionary of metadata from dbt
+    """
+    snapshot = get_manifest_index(project_path).snapshots.get(snapshot_name)
+    if snapshot is None:
+        raise ValueError(f"Snapshot '{snapshot_name}' not found in dbt manifest.")
+
+    return {
+        "table_ref": snapshot["table_ref"],
+        "unique_id": snapshot["unique_id"],
+    }
 
-    raise ValueError(f"Seed '{seed_name}' not found in dbt manifest.")
+
+# dbt nodes whose table mocks are used while recording (see `record_used_nodes`)
+_used_nodes: Optional[set] = None
+
+
+@contextmanager
+def record_used_nodes() -> Iterator[set]:
+    """
+    Record the dbt nodes whose table mocks are used within the context.
+
+    Yields:
+        Set that is filled with tuples of the dbt project path and the lookup key of the node
+        (see `get_node_fingerprint`)
+    """
+    global _used_nodes
+    previous_used_nodes, _used_nodes = _used_nodes, set()
+    try:
+        yield _used_nodes
+    finally:
+        if previous_used_nodes is not None:
+            previous_used_nodes.update(_used_nodes)
+        _used_nodes = previous_used_nodes
+
+
+class DeferredTableMockMeta:
+    """
+    Descriptor for the `_sql_mock_meta` of dbt table mocks which resolves the metadata from the dbt manifest on
+    first access (e.g. the first `from_mocks` call or the first instantiation) instead of when the class is defined.
+    This way, only the dbt table mocks that are used by the selected tests need to be resolved.
+    """
+
+    def __init__(
+        self,
+        table_mock_class: Type["BaseTableMock"],
+        resolve: Callable[[], TableMockMeta],
+        node_key: Tuple[str, ...] = None,
+        project_path: str = None,
+    ):
+        self._table_mock_class_name = table_mock_class.__name__
+        self._resolve = resolve
+        self._node_key = node_key
+        self._project_path = project_path
+        self._meta = None
+
+    def __get__(self, instance, owner) -> TableMockMeta:
+        if self._meta is None:
+            try:
+                self._meta = self._resolve()
+            except ValueError as e:
+                raise ValueError(f"Could not resolve the dbt metadata of {self._table_mock_class_name}: {e}") from e
+        if _used_nodes is not None and self._node_key is not None:
+            _used_nodes.add((self._project_path or SQLMockConfig.get_dbt_project_path(), self._node_key))
+        return self._meta
 
 
 def dbt_model_meta(model_name: str, project_path: str = None, default_inputs: ["BaseTableMock"] = None):
@@ -109,22 +625,26 @@ def dbt_model_meta(model_name: str, project_path: str = None, default_inputs: ["
     """
 
     def decorator(cls):
-        path = project_path or SQLMockConfig.get_dbt_project_path()
+        def resolve() -> TableMockMeta:
+            path = project_path or SQLMockConfig.get_dbt_project_path()
 
-        dbt_meta = _get_model_metadata(project_path=path, model_name=model_name)
+            dbt_meta = _get_model_metadata(project_path=path, model_name=model_name)
 
-        parsed_query = ""
-        with open(dbt_meta["query_path"]) as f:
-            parsed_query = f.read()
+            parsed_query = ""
+            with open(dbt_meta["query_path"]) as f:
+                parsed_query = f.read()
 
-        if default_inputs:
-            validate_input_mocks(default_inputs)
+            if default_inputs:
+                validate_input_mocks(default_inputs)
 
-        cls._sql_mock_meta = TableMockMeta(
-            table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
-            query=parsed_query,
-            default_inputs=default_inputs or [],
-        )
+            return DbtTableMockMeta(
+                table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
+                query=parsed_query,
+                default_inputs=default_inputs or [],
+                ast_cache_dir=dbt_meta.get("ast_cache_dir"),
+            )
+
+        cls._sql_mock_meta = DeferredTableMockMeta(cls, resolve, ("model", model_name), project_path)
         return cls
 
     return decorator
@@ -144,17 +664,20 @@ def dbt_source_meta(
     """
 
     def decorator(cls):
-        path = project_path or SQLMockConfig.get_dbt_project_path()
+        def resolve() -> TableMockMeta:
+            path = project_path or SQLMockConfig.get_dbt_project_path()
 
-        dbt_meta = _get_source_metadata(project_path=path, source_name=source_name, table_name=table_name)
+            dbt_meta = _get_source_metadata(project_path=path, source_name=source_name, table_name=table_name)
 
-        if default_inputs:
-            validate_input_mocks(default_inputs)
+            if default_inputs:
+                validate_input_mocks(default_inputs)
 
-        cls._sql_mock_meta = TableMockMeta(
-            table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
-            default_inputs=default_inputs or [],
-        )
+            return TableMockMeta(
+                table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
+                default_inputs=default_inputs or [],
+            )
+
+        cls._sql_mock_meta = DeferredTableMockMeta(cls, resolve, ("source", source_name, table_name), project_path)
         return cls
 
     return decorator
@@ -171,20 +694,284 @@ def dbt_seed_meta(seed_name: str, project_path: str = None, default_inputs: ["Ba
     """
 
     def decorator(cls):
-        path = project_path or SQLMockConfig.get_dbt_project_path()
+        def resolve() -> TableMockMeta:
+            path = project_path or SQLMockConfig.get_dbt_project_path()
 
-        dbt_meta = _get_seed_metadata(
-            project_path=path,
-            seed_name=seed_name,
-        )
+            dbt_meta = _get_seed_metadata(
+                project_path=path,
+                seed_name=seed_name,
+            )
 
-        if default_inputs:
-            validate_input_mocks(default_inputs)
+            if default_inputs:
+                validate_input_mocks(default_inputs)
 
-        cls._sql_mock_meta = TableMockMeta(
-            table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
-            default_inputs=default_inputs or [],
-        )
+            return TableMockMeta(
+                table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
+                default_inputs=default_inputs or [],
+            )
+
+        cls._sql_mock_meta = DeferredTableMockMeta(cls, resolve, ("seed", seed_name), project_path)
+        return cls
+
+    return decorator
+
+
+def dbt_snapshot_meta(snapshot_name: str, project_path: str = None, default_inputs: ["BaseTableMock"] = None):
+    """
+    Decorator that is used to define TableMock metadata for dbt snapshots.
+
+    Args:
+        snapshot_name (string) : Name of the dbt snapshot
+        project_path (string): Path to the dbt manifest file
+        default_inputs: List of default input mock instances that serve as default input if no other instance of that class is provided.
+    """
+
+    def decorator(cls):
+        def resolve() -> TableMockMeta:
+            path = project_path or SQLMockConfig.get_dbt_project_path()
+
+            dbt_meta = _get_snapshot_metadata(project_path=path, snapshot_name=snapshot_name)
+
+            if default_inputs:
+                validate_input_mocks(default_inputs)
+
+            return TableMockMeta(
+                table_ref=parse_table_refs(dbt_meta["table_ref"], dialect=cls._sql_dialect),
+                default_inputs=default_inputs or [],
+            )
+
+        cls._sql_mock_meta = DeferredTableMockMeta(cls, resolve, ("snapshot", snapshot_name), project_path)
         return cls
 
     return decorator
+
+
+def _to_class_name(*names: str) -> str:
+    return "".join(part[:1].upper() + part[1:] for name in names for part in re.split(r"[^0-9a-zA-Z]+", name))
+
+
+# Column mock classes of the databases per dialect. They define how values are escaped for the database.
+DIALECT_COLUMN_MOCK_CLASSES = {
+    "bigquery": BigQueryColumnMock,
+    "clickhouse": ClickhouseColumnMock,
+    "redshift": RedshiftColumnMock,
+    "snowflake": SnowflakeColumnMock,
+}
+
+
+class DbtTableMockFactory:
+    """
+    Generates table mocks for dbt models, sources, seeds and snapshots with columns from the dbt catalog (`dbt docs generate`).
+    Table mock classes are only created when they are requested and cached afterwards. Their metadata is resolved
+    lazily like for the dbt decorators.
+
+    The column types of the catalog are used as data types of the column mocks. All columns are nullable and
+    default to NULL.
+
+    Example:
+        mocks = DbtTableMockFactory(BigQueryTableMock)
+        MyModelTable = mocks.model("my_model")
+        OpportunityEventsTable = mocks.source("source_data", "opportunity_events")
+
+    Multi-model pipelines can be tested with `run_model` which executes the upstream models of a model. The results
+    of upstream models are memoized per factory so that shared upstream models are only executed once for the same
+    input data.
+    """
+
+    def __init__(
+        self,
+        table_mock_class: Type["BaseTableMock"],
+        column_mock_class: Type[BaseColumnMock] = None,
+        project_path: str = None,
+    ):
+        """
+        Args:
+            table_mock_class: Table mock class of the database (e.g. BigQueryTableMock) that generated classes inherit
+            column_mock_class: Column mock class that is used for all columns (e.g. to escape values correctly).
+                Defaults to the column mock class of the table mock's dialect.
+            project_path (string): Path to the dbt_project.yml file. Defaults to the path in SQLMockConfig.
+        """
+        self._table_mock_class = table_mock_class
+        self._column_mock_class = column_mock_class or DIALECT_COLUMN_MOCK_CLASSES.get(
+            table_mock_class._sql_dialect, BaseColumnMock
+        )
+        self._project_path = project_path
+        self._table_mocks = {}
+        self._model_results = {}
+
+    def model(self, model_name: str) -> Type["BaseTableMock"]:
+        """Get the table mock of a dbt model"""
+        key = ("model", model_name)
+        if key not in self._table_mocks:
+            dbt_meta = _get_model_metadata(project_path=self._get_project_path(), model_name=model_name)
+            self._table_mocks[key] = self._create_table_mock(
+                _to_class_name(model_name),
+                dbt_meta["unique_id"],
+                dbt_model_meta(model_name=model_name, project_path=self._project_path),
+            )
+        return self._table_mocks[key]
+
+    def source(self, source_name: str, table_name: str) -> Type["BaseTableMock"]:
+        """Get the table mock of a table of a dbt source"""
+        key = ("source", source_name, table_name)
+        if key not in self._table_mocks:
+            dbt_meta = _get_source_metadata(
+                project_path=self._get_project_path(), source_name=source_name, table_name=table_name
+            )
+            self._table_mocks[key] = self._create_table_mock(
+                _to_class_name(source_name, table_name),
+                dbt_meta["unique_id"],
+                dbt_source_meta(source_name=source_name, table_name=table_name, project_path=self._project_path),
+            )
+        return self._table_mocks[key]
+
+    def seed(self, seed_name: str) -> Type["BaseTableMock"]:
+        """Get the table mock of a dbt seed"""
+        key = ("seed", seed_name)
+        if key not in self._table_mocks:
+            dbt_meta = _get_seed_metadata(project_path=self._get_project_path(), seed_name=seed_name)
+            self._table_mocks[key] = self._create_table_mock(
+                _to_class_name(seed_name),
+                dbt_meta["unique_id"],
+                dbt_seed_meta(seed_name=seed_name, project_path=self._project_path),
+            )
+        return self._table_mocks[key]
+
+    def snapshot(self, snapshot_name: str) -> Type["BaseTableMock"]:
+        """Get the table mock of a dbt snapshot"""
+        key = ("snapshot", snapshot_name)
+        if key not in self._table_mocks:
+            dbt_meta = _get_snapshot_metadata(project_path=self._get_project_path(), snapshot_name=snapshot_name)
+            self._table_mocks[key] = self._create_table_mock(
+                _to_class_name(snapshot_name),
+                dbt_meta["unique_id"],
+                dbt_snapshot_meta(snapshot_name=snapshot_name, project_path=self._project_path),
+            )
+        return self._table_mocks[key]
+
+    def run_model(
+        self, model_name: str, input_data: list["BaseTableMock"] = None, query_template_kwargs: dict = None
+    ) -> "BaseTableMock":
+        """
+        Instantiate the table mock of a model from the mocks of its leaf tables (sources, seeds, snapshots or models).
+
+        Upstream models that are not provided as input mocks are executed in topological order using the dependencies
+        in the dbt manifest. Their results are used as input mocks of their downstream models. Results are memoized by
+        the generated query (which includes all input data) so that upstream models that are shared between models or
+        tests are only executed once. Ephemeral models are not executed since dbt compiles them into the queries of
+        their downstream models. Their upstream nodes are inputs of the downstream models instead.
+
+        Args:
+            model_name (str): Name of the dbt model
+            input_data: List of table mock instances of the leaf tables
+            query_template_kwargs: Dictionary of Jinja template key-value pairs that are used to render all queries
+
+        Returns:
+            Table mock instance of the model that can be used for assertions like the result of `from_mocks`
+
+        Raises:
+            ValidationError: If input mocks are provided that are not used by the model or its executed upstream models
+        """
+        input_mocks = {table_mock._sql_mock_meta.table_ref: table_mock for table_mock in input_data or []}
+        used_table_refs = set()
+        resolved = {}
+
+        def run(name: str) -> "BaseTableMock":
+            # Upstream nodes are resolved first which executes the upstream models in topological order
+            upstream_mocks = [resolve(node_key) for node_key in self._get_model_input_nodes(name)]
+            return self.model(name).from_mocks(
+                input_data=[table_mock for table_mock in upstream_mocks if table_mock is not None],
+                query_template_kwargs=query_template_kwargs,
+            )
+
+        def resolve(node_key: Tuple[str, ...]) -> Optional["BaseTableMock"]:
+            if node_key not in resolved:
+                table_ref = self._get_table_ref(node_key)
+                if table_ref in input_mocks:
+                    used_table_refs.add(table_ref)
+                    resolved[node_key] = input_mocks[table_ref]
+                elif node_key[0] == "model":
+                    resolved[node_key] = self._get_model_result(run(node_key[1]))
+                else:
+                    # Sources, seeds and snapshots can only be provided as input mocks. Missing ones are reported by
+                    # `from_mocks`.
+                    resolved[node_key] = None
+            return resolved[node_key]
+
+        result = run(model_name)
+        unused_table_refs = [table_ref for table_ref in input_mocks if table_ref not in used_table_refs]
+        if unused_table_refs:
+            raise ValidationError(
+                f"Input mocks {unused_table_refs} are not used by model '{model_name}' or its executed upstream models"
+            )
+        return result
+
+    def _get_model_upstream_nodes(self, model_name: str) -> list:
+        index = get_manifest_index(self._get_project_path())
+        if model_name not in index.models:
+            raise ValueError(f"Model '{model_name}' not found in dbt manifest.")
+        return index.models[model_name].get("depends_on", [])
+
+    def _get_model_input_nodes(self, model_name: str) -> List[Tuple[str, ...]]:
+        """Upstream nodes whose tables the query of a model selects from"""
+        input_nodes = []
+        for node_key in map(tuple, self._get_model_upstream_nodes(model_name)):
+            if node_key[0] == "model" and self._get_table_ref(node_key) is None:
+                # Ephemeral models have no relation. dbt compiles them into the query as CTEs.
+                input_nodes += self._get_model_input_nodes(node_key[1])
+            else:
+                input_nodes.append(node_key)
+        # The same node can be reached through multiple ephemeral models
+        return list(dict.fromkeys(input_nodes))
+
+    def _get_table_ref(self, node_key: Tuple[str, ...]) -> Optional[str]:
+        if node_key[0] == "model":
+            dbt_meta = _get_model_metadata(project_path=self._get_project_path(), model_name=node_key[1])
+        elif node_key[0] == "source":
+            dbt_meta = _get_source_metadata(
+                project_path=self._get_project_path(), source_name=node_key[1], table_name=node_key[2]
+            )
+        elif node_key[0] == "snapshot":
+            dbt_meta = _get_snapshot_metadata(project_path=self._get_project_path(), snapshot_name=node_key[1])
+        else:
+            dbt_meta = _get_seed_metadata(project_path=self._get_project_path(), seed_name=node_key[1])
+        return parse_table_refs(dbt_meta["table_ref"], dialect=self._table_mock_class._sql_dialect)
+
+    def _get_model_result(self, table_mock: "BaseTableMock") -> "BaseTableMock":
+        """Execute the query of an upstream model and return its result as input mock for downstream models"""
+        query = table_mock._generate_query()
+        # The generated query is independent of the order of the input mocks and contains all of their data
+        fingerprint = hashlib.sha256("\n".join([*table_mock._sql_mock_data.setup_statements, query]).encode())
+        key = (type(table_mock), fingerprint.hexdigest())
+        if key not in self._model_results:
+            self._model_results[key] = table_mock._get_results(query)
+        return type(table_mock).from_dicts(self._model_results[key])
+
+    def _get_project_path(self) -> str:
+        return self._project_path or SQLMockConfig.get_dbt_project_path()
+
+    def _create_column_mock(self, dtype: str) -> BaseColumnMock:
+        column = self._column_mock_class(default=None, nullable=True)
+        # The type from the catalog is used as is (e.g. it already contains `Nullable` for ClickHouse)
+        column.dtype = dtype
+        if dtype.upper().startswith("ARRAY"):
+            column.use_quotes_for_casting = False
+        return column
+
+    def _create_table_mock(
+        self, class_name: str, unique_id: str, decorator: Callable[[type], type]
+    ) -> Type["BaseTableMock"]:
+        columns = get_catalog_columns(self._get_project_path()).get(unique_id)
+        if columns is None:
+            raise ValueError(f"'{unique_id}' not found in dbt catalog. Make sure to run `dbt docs generate`.")
+
+        conflicting_columns = [column_name for column_name in columns if hasattr(self._table_mock_class, column_name)]
+        if conflicting_columns:
+            raise ValueError(
+                f"Columns of '{unique_id}' conflict with attributes of {self._table_mock_class.__name__}: "
+                f"{conflicting_columns}"
+            )
+
+        attributes = {column_name: self._create_column_mock(dtype) for column_name, dtype in columns.items()}
+        table_mock_class = type(class_name, (self._table_mock_class,), {"__module__": __name__, **attributes})
+        return decorator(table_mock_class)
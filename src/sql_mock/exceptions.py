@@ -1,2 +1,10 @@
 class ValidationError(Exception):
     pass
+
+
+class QuerySizeExceededError(ValidationError):
+    """Raised if a generated query exceeds the query size budget and can't be made small enough"""
+
+    def __init__(self, msg: str, report=None):
+        super().__init__(msg)
+        self.report = report
@@ -1,10 +1,11 @@
 from collections import Counter
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
 
 import sqlglot
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from sqlglot.expressions import replace_tables, to_table
 from sqlglot.optimizer.eliminate_ctes import eliminate_ctes
-from sqlglot.optimizer.scope import build_scope
+from sqlglot.optimizer.scope import Scope, build_scope
 
 from sql_mock.exceptions import ValidationError
 
@@ -17,6 +18,70 @@ def get_keys_from_list_of_dicts(data: list[dict]) -> set[str]:
     return set(key for dictionary in data for key in dictionary.keys())
 
 
+def all_values_equal(values: list) -> bool:
+    """
+    Check whether all values of a list are equal and of the same type (e.g. True and 1 are not considered equal)
+    """
+    first_value = values[0] if values else None
+    try:
+        return all(type(value) is type(first_value) and bool(value == first_value) for value in values)
+    except ValueError:
+        # E.g. numpy arrays can't be compared to a single boolean
+        return False
+
+
+def take_rows_until_mismatch(
+    rows: Iterable[dict], expected: List[dict], keys_to_keep: set[str] = None
+) -> Tuple[List[dict], bool]:
+    """
+    Consume rows and compare them in order against the expected rows until the first mismatch.
+
+    Args:
+        rows (Iterable[dict]): Actual result rows. Can be a lazy iterator (e.g. a stream of database results).
+        expected (List[dict]): Expected rows in the expected order
+        keys_to_keep (set[str]): If provided, only those keys of the actual rows are kept for comparison
+
+    Returns:
+        Tuple of the consumed (and optionally reduced) rows and a flag whether consumption stopped early due to a mismatch.
+        In case of a mismatch, the last consumed row is the first row that does not match.
+    """
+    consumed = []
+    stopped_early = False
+    iterator = iter(rows)
+    try:
+        for row in iterator:
+            if keys_to_keep is not None:
+                row = {key: value for key, value in row.items() if key in keys_to_keep}
+            consumed.append(row)
+            index = len(consumed) - 1
+            if index >= len(expected) or expected[index] != row:
+                stopped_early = True
+                break
+    finally:
+        # Closing a generator makes sure that the underlying query / connection gets released
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    return consumed, stopped_early
+
+
+def truncate_query(query: str, max_length: int = None) -> str:
+    """
+    Truncate a query for printing
+
+    Args:
+        query (str): The query to truncate
+        max_length (int): Maximum number of characters to keep. If None, the query is not truncated.
+    """
+    if query is None or max_length is None or len(query) <= max_length:
+        return query
+    return (
+        f"{query[:max_length]}\n"
+        f"... ({len(query) - max_length} more characters truncated, "
+        "see SQLMockConfig.set_failed_query_max_length to print the full query)"
+    )
+
+
 def remove_cte_from_query(query_ast: sqlglot.Expression, cte_name: str) -> sqlglot.Expression:
     """
     Remove a CTE from a query
@@ -27,7 +92,11 @@ def remove_cte_from_query(query_ast: sqlglot.Expression, cte_name: str) -> sqlgl
     """
     for cte in query_ast.find_all(sqlglot.exp.CTE):
         if cte.alias == cte_name:
+            with_node = cte.parent
             cte.pop()
+            # Pop the entire WITH clause if this was the last CTE
+            if not with_node.expressions:
+                with_node.pop()
     return query_ast
 
 
@@ -42,19 +111,24 @@ def _replace_table_ref_in_columns(
         table_ref (str): Table ref to be replaced
         new_ref (str): Name of the new table ref
     """
-    ref_table = to_table(table_ref, dialect=dialect)
+    # Parse the table ref only once. For column replacement we simplify the comparison to the table name.
+    ref_table_name = to_table(table_ref, dialect=dialect).name
 
     root = build_scope(query_ast)
     for scope in root.traverse():
+        scope_table_aliases = None
         for col in scope.columns:
-            if not col.table:
+            # `col.table` is the name of the table identifier which we can compare without parsing it again.
+            # Only quoted full table names (e.g. `project.dataset.table`.col in BigQuery) need to be parsed.
+            col_table_name = col.table
+            if "." in col_table_name:
+                col_table_name = to_table(col_table_name, dialect=dialect).name
+            if col_table_name != ref_table_name:
                 continue
-            # For column replacement we simplify the comparison to the table name
-            # which is why we cast the col.table string to a table object
-            scope_table_aliases = [table.alias for table in scope.tables]
-            col_table = to_table(col.table, dialect=dialect)
+            if scope_table_aliases is None:
+                scope_table_aliases = {table.alias for table in scope.tables}
             # We need to be careful that we don't replace column aliases that match the table alias
-            if col_table.name == ref_table.name and col_table.name not in scope_table_aliases:
+            if col_table_name not in scope_table_aliases:
                 col.set("table", new_ref)
                 # Make sure to remove the schema and db from the col table reference
                 # to fully exchange it with the provided table ref
@@ -81,24 +155,21 @@ def replace_original_table_references(
     return replace_tables(expression=query_ast, mapping={table_ref: sql_mock_cte_name}, dialect=dialect)
 
 
-def select_from_cte(query: str, cte_name: str, sql_dialect: str):
+def select_from_cte_ast(query_ast: sqlglot.Expression, cte_name: str) -> sqlglot.Expression:
     """
     If selecting from a CTE, we need to replace the the final SELECT statement
-    with a SELECT * FROM select_cte
+    with a SELECT * FROM select_cte. The AST is modified in place.
 
     Args:
-        query (str): Original SQL query
+        query_ast (sqlglot.Expression): The AST of the original SQL query
         cte_name (str): Name of the CTE to select from
-        sql_dialect (str): The sql dialect to use for generating the query
     """
-    ast = sqlglot.parse_one(query, dialect=sql_dialect)
-
     # Check whether the cte exists, if not raise an error
-    cte_exists = any(cte.alias == cte_name for cte in ast.find_all(sqlglot.exp.CTE))
+    cte_exists = any(cte.alias == cte_name for cte in query_ast.find_all(sqlglot.exp.CTE))
     if not cte_exists:
         raise ValueError(f"CTE with name {cte_name} does not exist in query")
 
-    root_select_statement = ast.find(sqlglot.exp.Select)
+    root_select_statement = query_ast.find(sqlglot.exp.Select)
     # Remove all columns from root select statement
     for col in root_select_statement.find_all((sqlglot.exp.Column, sqlglot.exp.Star)):
         # Only drop columns from the root select statement
@@ -106,8 +177,21 @@ def select_from_cte(query: str, cte_name: str, sql_dialect: str):
             col.pop()
 
     # Change the final select statement to SELECT * FROM <cte_name>
-    adjusted_query = ast.select("*").from_(cte_name).sql(pretty=True, dialect=sql_dialect)
-    return adjusted_query
+    return query_ast.select("*").from_(cte_name)
+
+
+def select_from_cte(query: str, cte_name: str, sql_dialect: str):
+    """
+    If selecting from a CTE, we need to replace the the final SELECT statement
+    with a SELECT * FROM select_cte
+
+    Args:
+        query (str): Original SQL query
+        cte_name (str): Name of the CTE to select from
+        sql_dialect (str): The sql dialect to use for generating the query
+    """
+    ast = sqlglot.parse_one(query, dialect=sql_dialect)
+    return select_from_cte_ast(ast, cte_name).sql(pretty=True, dialect=sql_dialect)
 
 
 def parse_table_refs(table_ref, dialect):
@@ -121,13 +205,21 @@ def _clean_table_ref_transformer(node):
     return node
 
 
-def get_source_tables(query, dialect) -> List[str]:
+def _is_array_join_source(node: sqlglot.Expression) -> bool:
+    # When using ARRAY joins sqlglot percieves the inputs as tables even though they are infact not.
+    # This fixes it but does not allow for multiple types of joins to be mixed with the ARRAY JOIN,
+    # For now we consider it a reasonable solution.
+    return node.parent.key == "join" and any(join.kind == "ARRAY" for join in node.parent_select.args["joins"])
+
+
+def get_source_tables(query: Union[str, sqlglot.Expression], dialect) -> List[str]:
     """
     Extract the unique tables that are references in FROM or JOIN statements.
+    The query can be passed as string or as already parsed AST which avoids parsing it again.
 
     Based on https://github.com/tobymao/sqlglot/blob/9da41f22bdf5298dc94498173c338cdb16a2d36d/posts/ast_primer.md
     """
-    ast = sqlglot.parse_one(query, dialect=dialect)
+    ast = query if isinstance(query, sqlglot.Expression) else sqlglot.parse_one(query, dialect=dialect)
     root = build_scope(ast)
 
     tables = {
@@ -142,16 +234,320 @@ def get_source_tables(query, dialect) -> List[str]:
         # if the selected source is a table,
         #     then `source` will be a Table instance.
         for alias, (node, source) in scope.selected_sources.items()
-        if isinstance(source, sqlglot.exp.Table)
-        # When using ARRAY joins sqlglot percieves the inputs as tables even though they are infact not.
-        # This fixes it but does not allow for multiple types of joins to be mixed with the ARRAY JOIN,
-        # For now we consider it a reasonable solution.
-        and not (node.parent.key == "join" and any(join.kind == "ARRAY" for join in node.parent_select.args["joins"]))
+        if isinstance(source, sqlglot.exp.Table) and not _is_array_join_source(node)
     }
 
     return list(tables)
 
 
+def _resolve_source(scope: Scope, alias: str):
+    """Resolve a source alias in a scope or its parent scopes (e.g. for correlated subqueries)"""
+    while scope is not None:
+        if alias in scope.selected_sources:
+            return scope.selected_sources[alias][1]
+        scope = scope.parent
+    return None
+
+
+def _get_analyzed_table_ref(source, referenced_columns: Dict[str, Optional[Set[str]]]) -> Optional[str]:
+    """Table ref of a source if it is one of the analyzed tables"""
+    if isinstance(source, sqlglot.exp.Table):
+        table_ref = str(source.transform(_clean_table_ref_transformer))
+        if table_ref in referenced_columns:
+            return table_ref
+    return None
+
+
+def _add_star_and_using_columns(
+    scope: Scope,
+    referenced_columns: Dict[str, Optional[Set[str]]],
+    unattributed_columns: Set[str],
+    attributed_column_ids: Set[int],
+):
+    """Expand `*` projections and `JOIN ... USING` columns of a SELECT scope"""
+    scope_table_refs = {
+        _get_analyzed_table_ref(source, referenced_columns) for _, source in scope.selected_sources.values()
+    } - {None}
+
+    for projection in scope.expression.expressions:
+        if isinstance(projection, sqlglot.exp.Star):
+            for table_ref in scope_table_refs:
+                referenced_columns[table_ref] = None
+        elif isinstance(projection, sqlglot.exp.Column) and isinstance(projection.this, sqlglot.exp.Star):
+            table_ref = _get_analyzed_table_ref(_resolve_source(scope, projection.table), referenced_columns)
+            if table_ref is not None:
+                referenced_columns[table_ref] = None
+                attributed_column_ids.add(id(projection))
+            elif projection.table not in scope.selected_sources:
+                # Star on something that can't be resolved, e.g. a struct column
+                unattributed_columns.update(part.name.lower() for part in projection.parts)
+
+    for join in scope.expression.args.get("joins") or []:
+        unattributed_columns.update(identifier.name.lower() for identifier in join.args.get("using") or [])
+
+
+def _add_scope_columns(
+    scope: Scope, referenced_columns: Dict[str, Optional[Set[str]]], attributed_column_ids: Set[int]
+):
+    """Attribute the qualified columns of a scope to their source tables"""
+    for col in scope.columns:
+        if not col.table:
+            # A table can be used as a value (e.g. `SELECT TO_JSON_STRING(t) FROM t`)
+            table_ref = _get_analyzed_table_ref(_resolve_source(scope, col.name), referenced_columns)
+            if table_ref is not None:
+                referenced_columns[table_ref] = None
+            continue
+        source = _resolve_source(scope, col.table)
+        if source is None:
+            continue
+        table_ref = _get_analyzed_table_ref(source, referenced_columns)
+        if table_ref is not None and referenced_columns[table_ref] is not None:
+            referenced_columns[table_ref].add(col.name.lower())
+        # Columns of other tables or subqueries don't reference the provided tables directly
+        attributed_column_ids.add(id(col))
+
+
+def _add_array_join_columns(query_ast: sqlglot.Expression, unattributed_columns: Set[str]):
+    """ARRAY JOIN sources are columns (e.g. `ARRAY JOIN arr AS x`) even though sqlglot parses them as tables"""
+    for select in query_ast.find_all(sqlglot.exp.Select):
+        joins = select.args.get("joins") or []
+        if not any(join.kind == "ARRAY" for join in joins):
+            continue
+        for join in joins:
+            if isinstance(join.this, sqlglot.exp.Table):
+                unattributed_columns.update(
+                    part.name.lower() for part in join.this.parts if isinstance(part, sqlglot.exp.Identifier)
+                )
+
+
+def get_referenced_columns(query_ast: sqlglot.Expression, table_refs: Iterable[str]) -> Dict[str, Optional[Set[str]]]:
+    """
+    Determine which columns of the provided tables are referenced by a query.
+
+    The analysis is conservative: Columns that are qualified with a table alias are attributed to that table.
+    Unqualified columns (and all parts of columns that can't be resolved, e.g. struct field access) are considered
+    referenced for all tables. Column names are lowercased.
+
+    Args:
+        query_ast (sqlglot.Expression): The AST of the query
+        table_refs (Iterable[str]): Table refs of the tables to analyze
+
+    Returns:
+        Dictionary of table ref to the set of referenced column names.
+        None means that all columns are needed (e.g. because of a `SELECT *`).
+    """
+    referenced_columns = {table_ref: set() for table_ref in table_refs}
+    all_columns = dict.fromkeys(referenced_columns)
+
+    # Constructs that implicitly use all columns of their inputs
+    if any(query_ast.find_all(sqlglot.exp.Pivot)) or any(
+        (join.args.get("method") or "").upper() == "NATURAL" for join in query_ast.find_all(sqlglot.exp.Join)
+    ):
+        return all_columns
+
+    unattributed_columns = set()
+    attributed_column_ids = set()
+    for scope in build_scope(query_ast).traverse():
+        if isinstance(scope.expression, sqlglot.exp.Select):
+            _add_star_and_using_columns(scope, referenced_columns, unattributed_columns, attributed_column_ids)
+        _add_scope_columns(scope, referenced_columns, attributed_column_ids)
+    _add_array_join_columns(query_ast, unattributed_columns)
+
+    for col in query_ast.find_all(sqlglot.exp.Column):
+        if id(col) not in attributed_column_ids:
+            unattributed_columns.update(
+                part.name.lower() for part in col.parts if isinstance(part, sqlglot.exp.Identifier)
+            )
+
+    return {
+        table_ref: None if columns is None else columns | unattributed_columns
+        for table_ref, columns in referenced_columns.items()
+    }
+
+
+# Key of the final statement of a query in the QueryDependencyIndex
+ROOT_NODE = ""
+
+
+def _get_cte_name(scope: Scope) -> str:
+    # The self reference of a recursive CTE is a scope of a part of the CTE's union
+    cte = scope.expression.find_ancestor(sqlglot.exp.CTE)
+    return cte.alias if cte is not None else ROOT_NODE
+
+
+def _get_owner(scope: Scope) -> str:
+    """Get the name of the CTE a scope belongs to or ROOT_NODE if it belongs to the final statement"""
+    while scope is not None:
+        if scope.is_cte:
+            return _get_cte_name(scope)
+        scope = scope.parent
+    return ROOT_NODE
+
+
+class QueryDependencyIndex(BaseModel):
+    """
+    Static dependencies of a query that are used to validate input mocks without analyzing the query again.
+
+    Attributes:
+        query_ast (sqlglot.Expression): The parsed query. It must not be modified, use a copy instead.
+        sources (dict): Source tables that are directly selected by the final statement (ROOT_NODE) and by each CTE
+        cte_references (dict): CTEs that are directly selected by the final statement and by each CTE.
+            Maps the CTE name to the table reference string the CTE is selected with.
+        transitive_sources (dict): All source tables that the final statement and each CTE need if nothing is mocked
+        indexed (bool): False if the query can't be indexed (e.g. CTE names are defined multiple times).
+            In that case the dependencies are derived from the AST for each validation.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    query_ast: sqlglot.Expression
+    dialect: Optional[str] = None
+    sources: Dict[str, Set[str]] = {}
+    cte_references: Dict[str, Dict[str, str]] = {}
+    transitive_sources: Dict[str, Set[str]] = {}
+    indexed: bool = True
+
+    _required_sources_cache: Dict[FrozenSet[str], Set[str]] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def from_query(cls, query: Union[str, sqlglot.Expression], dialect: Optional[str]) -> "QueryDependencyIndex":
+        """
+        Build the index for a query
+
+        Args:
+            query (str or sqlglot.Expression): The query to index. An AST is used as is and must not be modified afterwards.
+            dialect (str): The SQL dialect to use for parsing the query
+        """
+        query_ast = query if isinstance(query, sqlglot.Expression) else sqlglot.parse_one(query, dialect=dialect)
+        scopes = list(build_scope(query_ast).traverse())
+
+        cte_names = [_get_cte_name(scope) for scope in scopes if scope.is_cte]
+        if len(cte_names) != len(set(cte_names)):
+            return cls(query_ast=query_ast, dialect=dialect, indexed=False)
+
+        sources = {name: set() for name in [ROOT_NODE, *cte_names]}
+        cte_references = {name: {} for name in [ROOT_NODE, *cte_names]}
+        for scope in scopes:
+            owner = _get_owner(scope)
+            for node, source in scope.selected_sources.values():
+                if isinstance(source, sqlglot.exp.Table):
+                    if not _is_array_join_source(node):
+                        sources[owner].add(str(source.transform(_clean_table_ref_transformer)))
+                elif isinstance(source, Scope) and source.is_cte and not _is_array_join_source(node):
+                    # If the CTE gets mocked, the CTE reference becomes a source table reference
+                    cte_references[owner][_get_cte_name(source)] = str(node.transform(_clean_table_ref_transformer))
+
+        transitive_sources = {}
+
+        def collect_sources(name: str, visiting: FrozenSet[str] = frozenset()) -> Set[str]:
+            if name not in transitive_sources:
+                # Recursive CTEs reference themselves which must not be followed
+                transitive_sources[name] = sources[name].union(
+                    *[
+                        collect_sources(cte_name, visiting | {name})
+                        for cte_name in cte_references[name]
+                        if cte_name not in visiting | {name}
+                    ]
+                )
+            return transitive_sources[name]
+
+        for name in sources:
+            collect_sources(name)
+
+        return cls(
+            query_ast=query_ast,
+            dialect=dialect,
+            sources=sources,
+            cte_references=cte_references,
+            transitive_sources=transitive_sources,
+        )
+
+    @property
+    def ctes(self) -> Set[str]:
+        return set(self.sources) - {ROOT_NODE}
+
+    def get_required_sources(self, provided_table_refs: FrozenSet[str]) -> Set[str]:
+        """
+        Get the source tables that need to be mocked if the provided table refs are mocked.
+        If a CTE is mocked, its upstream tables don't need to be provided anymore but the CTE itself does.
+        Results are memoized per set of provided table refs.
+
+        Args:
+            provided_table_refs (frozenset of str): Table refs of the provided input mocks
+        """
+        if provided_table_refs not in self._required_sources_cache:
+            self._required_sources_cache[provided_table_refs] = self._compute_required_sources(provided_table_refs)
+        return self._required_sources_cache[provided_table_refs]
+
+    def _compute_required_sources(self, provided_table_refs: FrozenSet[str]) -> Set[str]:
+        if not self.indexed:
+            ast = self.query_ast.copy()
+            # In case the table_ref is a CTE, we need to remove it from the query
+            for table_ref in provided_table_refs:
+                ast = remove_cte_from_query(query_ast=ast, cte_name=table_ref)
+            # Now we might have some superfluous CTEs that are not referenced anymore
+            return set(get_source_tables(query=eliminate_ctes(ast), dialect=self.dialect))
+
+        mocked_ctes = self.ctes & provided_table_refs
+        if not mocked_ctes:
+            return self.transitive_sources[ROOT_NODE]
+
+        # Walk the CTE graph from the final statement. Mocked CTEs are not followed which also
+        # drops the CTEs that are only referenced by them.
+        required_sources, visited, to_visit = set(), set(), [ROOT_NODE]
+        while to_visit:
+            name = to_visit.pop()
+            if name in visited:
+                continue
+            visited.add(name)
+            required_sources |= self.sources[name]
+            for cte_name, reference in self.cte_references[name].items():
+                if cte_name in mocked_ctes:
+                    required_sources.add(reference)
+                else:
+                    to_visit.append(cte_name)
+        return required_sources
+
+
+def get_cte_evaluation_counts(query_ast: sqlglot.Expression) -> Dict[str, int]:
+    """
+    Count how often each CTE of a query is evaluated if the database inlines CTEs for every reference.
+    References from CTEs that are evaluated multiple times count multiple times.
+
+    Args:
+        query_ast (sqlglot.Expression): The parsed query. It is not modified.
+
+    Returns:
+        Dict[str, int]: Mapping of CTE name to the number of evaluations. Empty if CTE names are defined multiple times.
+    """
+    scopes = list(build_scope(query_ast).traverse())
+    cte_names = [_get_cte_name(scope) for scope in scopes if scope.is_cte]
+    if len(cte_names) != len(set(cte_names)):
+        return {}
+
+    # Every selection of a CTE (e.g. each side of a self join) is a separate reference
+    referencing_owners = {name: [] for name in cte_names}
+    for scope in scopes:
+        owner = _get_owner(scope)
+        for node, source in scope.selected_sources.values():
+            if isinstance(source, Scope) and source.is_cte and not _is_array_join_source(node):
+                referencing_owners.get(_get_cte_name(source), []).append(owner)
+
+    evaluation_counts = {ROOT_NODE: 1}
+
+    def count_evaluations(name: str, visiting: FrozenSet[str] = frozenset()) -> int:
+        if name not in evaluation_counts:
+            # Recursive CTEs reference themselves which must not be followed
+            evaluation_counts[name] = sum(
+                count_evaluations(owner, visiting | {name})
+                for owner in referencing_owners[name]
+                if owner not in visiting | {name}
+            )
+        return evaluation_counts[name]
+
+    return {name: count_evaluations(name) for name in cte_names}
+
+
 def _validate_unique_input_mocks(input_mocks: List["BaseTableMock"]) -> None:
     counter = Counter(input_mocks)
     duplicated_mocks = [mock for mock, cnt in counter.items() if cnt > 1]
@@ -178,41 +574,41 @@ def validate_input_mocks(input_mocks: List["BaseTableMock"]):
     _validate_unique_input_mocks(input_mocks)
 
 
-def validate_all_input_mocks_for_query_provided(query: str, input_mocks: List["BaseTableMock"], dialect: str) -> None:
+def validate_all_input_mocks_for_query_provided(
+    query: Union[str, sqlglot.Expression],
+    input_mocks: List["BaseTableMock"],
+    dialect: str,
+    dependency_index: QueryDependencyIndex = None,
+) -> None:
     """
     Validate that all input mocks are provided for a query.
     Mocks can replace CTEs or tables in the query. If a CTE is replaced, upstream table references don't need to be provided anymore.
 
     Args:
-        query (str): The query to validate
+        query (str or sqlglot.Expression): The query to validate. If an AST is provided, it is not modified.
         input_mocks (List[BaseTableMock]): The input mocks that are provided
         dialect (str): The SQL dialect to use for parsing the query
+        dependency_index (QueryDependencyIndex): Precomputed dependencies of the query. If provided, the query is not analyzed again.
     """
-    provided_table_refs = [
+    if dependency_index is None:
+        query_ast = query.copy() if isinstance(query, sqlglot.Expression) else query
+        dependency_index = QueryDependencyIndex.from_query(query_ast, dialect=dialect)
+
+    provided_table_refs = frozenset(
         table_mock._sql_mock_meta.table_ref
         for table_mock in input_mocks
-        if hasattr(table_mock._sql_mock_meta, "table_ref")
-    ]
-    ast = sqlglot.parse_one(query, dialect=dialect)
-
-    # In case the table_ref is a CTE, we need to remove it from the query
-    for table_ref in provided_table_refs:
-        ast = remove_cte_from_query(query_ast=ast, cte_name=table_ref)
-
-    # Now we might have some superfluous CTEs that are not referenced anymore
-    remaining_query = eliminate_ctes(ast).sql(dialect=dialect, pretty=True)
-
+        if getattr(table_mock._sql_mock_meta, "table_ref", None)
+    )
     # The remaining query should not contain raw table references anymore if everything is mocked correctly
-    missing_source_table_mocks = get_source_tables(query=remaining_query, dialect=dialect)
+    required_source_tables = dependency_index.get_required_sources(provided_table_refs)
+
     for table_mock in input_mocks:
         table_ref = getattr(table_mock._sql_mock_meta, "table_ref", None)
-        # If the table exists as mock, we can remove it from missing source tables
-        try:
-            missing_source_table_mocks.remove(table_ref)
-        except ValueError:
+        if table_ref not in required_source_tables:
             msg = f"Your input mock {table_mock.__class__.__name__} is not a table that is referenced in the query"
             raise ValidationError(msg)
 
+    missing_source_table_mocks = sorted(required_source_tables - provided_table_refs)
     if missing_source_table_mocks:
         msg = f"You need to provide the following input mocks to run your query: {missing_source_table_mocks}"
         raise ValidationError(msg)
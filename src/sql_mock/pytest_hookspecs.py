@@ -0,0 +1,14 @@
+"""
+Hooks of the SQL Mock pytest plugin. They can be implemented in a conftest.py file or another pytest plugin.
+"""
+
+
+def pytest_sql_mock_phase_summary(summary, config):
+    """
+    Called at the end of a test session with the time that table mocks spent in each phase (e.g. rendering, validation,
+    query rewriting, literal generation, execution and comparison).
+
+    Args:
+        summary (sql_mock.timings.PhaseTimeSummary): Slowest phases and slowest table mocks of the session
+        config (pytest.Config): The pytest config object
+    """
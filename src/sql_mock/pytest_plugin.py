@@ -0,0 +1,310 @@
+"""
+pytest plugin of SQL Mock. It is registered automatically when SQL Mock is installed.
+
+The time spent on database queries is reported per test. The time that table mocks spend in each phase (e.g.
+rendering, query rewriting, execution and comparison) is summarized for the session and passed to the
+`pytest_sql_mock_phase_summary` hook (see `sql_mock.pytest_hookspecs`).
+
+Options:
+    --sql-mock-impact: Skip tests whose dbt nodes (including their upstream nodes) and test file did not change since
+        the test passed the last time.
+    --sql-mock-shared-connections: Share database connections between all table mocks of the test session instead
+        of opening a new connection for every query. The connections are closed at the end of the session.
+"""
+import hashlib
+import inspect
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytest
+
+import sql_mock
+from sql_mock.connections import SharedConnections, get_queue_time, get_warehouse_time, reset_warehouse_time
+from sql_mock.dbt import get_file_hash, get_node_fingerprint, record_used_nodes
+from sql_mock.table_mocks import record_used_table_mock_classes
+from sql_mock.timings import PhaseTimeSummary, get_phase_times, reset_phase_times
+
+IMPACT_CACHE_KEY = "sql_mock/impact"
+# Name of the user property that transports the dbt nodes of a test from xdist workers to the controller
+IMPACT_USER_PROPERTY = "sql_mock_impact"
+IMPACT_SKIP_REASON = "sql-mock: dbt nodes and test file unchanged since last pass"
+WAREHOUSE_TIME_USER_PROPERTY = "sql_mock_warehouse_time"
+QUEUE_TIME_USER_PROPERTY = "sql_mock_queue_time"
+PHASE_TIMES_USER_PROPERTY = "sql_mock_phase_times"
+# Number of tests with the highest warehouse time that are listed in the terminal summary
+SLOWEST_TESTS_COUNT = 10
+# Number of table mocks with the highest time that are listed in the terminal summary
+SLOWEST_MODELS_COUNT = 10
+
+
+def pytest_addhooks(pluginmanager):
+    from sql_mock import pytest_hookspecs
+
+    pluginmanager.add_hookspecs(pytest_hookspecs)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sql-mock")
+    group.addoption(
+        "--sql-mock-impact",
+        action="store_true",
+        default=False,
+        help="Skip tests whose dbt models, upstream dependencies and test file did not change since they last passed.",
+    )
+    group.addoption(
+        "--sql-mock-shared-connections",
+        action="store_true",
+        default=False,
+        help="Share database connections within the session instead of opening a new connection for every query.",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("sql_mock_shared_connections"):
+        # Connections are opened lazily by the first query of each database
+        SharedConnections.enable()
+    config.pluginmanager.register(WarehouseTimeReport(), "sql_mock_warehouse_time")
+    config.pluginmanager.register(PhaseTimeReport(config), "sql_mock_phase_time")
+    if config.getoption("sql_mock_impact") and getattr(config, "cache", None) is not None:
+        config.pluginmanager.register(ImpactAnalysis(config), "sql_mock_impact")
+
+
+def pytest_sessionfinish():
+    SharedConnections.close_all()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item):
+    reset_warehouse_time()
+    reset_phase_times()
+    yield
+    warehouse_time = get_warehouse_time()
+    if warehouse_time:
+        item.user_properties.append((WAREHOUSE_TIME_USER_PROPERTY, warehouse_time))
+        item.user_properties.append((QUEUE_TIME_USER_PROPERTY, get_queue_time()))
+    phase_times = get_phase_times()
+    if phase_times:
+        # Lists instead of tuple keys so that xdist workers can serialize them
+        item.user_properties.append(
+            (
+                PHASE_TIMES_USER_PROPERTY,
+                [[model_name, phase, seconds] for (model_name, phase), seconds in phase_times.items()],
+            )
+        )
+
+
+def _import_table_mock_class(module_name: str, class_name: str):
+    # The dependencies of the databases are optional which is why tests that need them are skipped without them
+    return getattr(pytest.importorskip(module_name), class_name)
+
+
+@pytest.fixture(scope="session")
+def bigquery_table_mock():
+    """Table mock base class of BigQuery"""
+    return _import_table_mock_class("sql_mock.bigquery.table_mocks", "BigQueryTableMock")
+
+
+@pytest.fixture(scope="session")
+def clickhouse_table_mock():
+    """Table mock base class of ClickHouse"""
+    return _import_table_mock_class("sql_mock.clickhouse.table_mocks", "ClickHouseTableMock")
+
+
+@pytest.fixture(scope="session")
+def redshift_table_mock():
+    """Table mock base class of Redshift"""
+    return _import_table_mock_class("sql_mock.redshift.table_mocks", "RedshiftTableMock")
+
+
+@pytest.fixture(scope="session")
+def snowflake_table_mock():
+    """Table mock base class of Snowflake"""
+    return _import_table_mock_class("sql_mock.snowflake.table_mocks", "SnowflakeTableMock")
+
+
+class WarehouseTimeReport:
+    """
+    Collects the time that tests spent on database queries and waiting for a query slot (see `max_concurrent_queries`
+    of the database settings) and lists the slowest tests in the terminal summary
+    """
+
+    def __init__(self):
+        self._warehouse_times: Dict[str, float] = {}
+        self._queue_times: Dict[str, float] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        user_properties = dict(report.user_properties)
+        if report.when == "call" and WAREHOUSE_TIME_USER_PROPERTY in user_properties:
+            self._warehouse_times[report.nodeid] = user_properties[WAREHOUSE_TIME_USER_PROPERTY]
+            self._queue_times[report.nodeid] = user_properties.get(QUEUE_TIME_USER_PROPERTY, 0.0)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self._warehouse_times:
+            return
+        terminalreporter.write_sep("=", "sql-mock warehouse time")
+        terminalreporter.write_line(
+            f"{sum(self._warehouse_times.values()):.2f}s spent on database queries in "
+            f"{len(self._warehouse_times)} tests"
+        )
+        queue_time = sum(self._queue_times.values())
+        if queue_time:
+            terminalreporter.write_line(
+                f"{queue_time:.2f}s waited for a query slot (consider fewer workers or more concurrent queries)"
+            )
+        slowest = sorted(self._warehouse_times.items(), key=lambda item: item[1], reverse=True)
+        for nodeid, warehouse_time in slowest[:SLOWEST_TESTS_COUNT]:
+            queue_time = self._queue_times[nodeid]
+            terminalreporter.write_line(
+                f"{warehouse_time:.2f}s {nodeid}"
+                + (f" (waited {queue_time:.2f}s for a query slot)" if queue_time else "")
+            )
+
+
+class PhaseTimeReport:
+    """
+    Collects the time that table mocks spent in each phase, passes the summary of the session to the
+    `pytest_sql_mock_phase_summary` hook and lists the slowest phases and table mocks in the terminal summary
+    """
+
+    def __init__(self, config: pytest.Config):
+        self._config = config
+        self._phase_times: Dict[Tuple[str, str], float] = {}
+        self._summary: Optional[PhaseTimeSummary] = None
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        if report.when != "call":
+            return
+        for model_name, phase, seconds in dict(report.user_properties).get(PHASE_TIMES_USER_PROPERTY, []):
+            key = (model_name, phase)
+            self._phase_times[key] = self._phase_times.get(key, 0.0) + seconds
+
+    def pytest_sessionfinish(self):
+        # xdist workers report their results to the controller which summarizes them
+        if not self._phase_times or hasattr(self._config, "workerinput"):
+            return
+        self._summary = PhaseTimeSummary.from_phase_times(self._phase_times)
+        self._config.hook.pytest_sql_mock_phase_summary(summary=self._summary, config=self._config)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self._summary is None:
+            return
+        terminalreporter.write_sep("=", "sql-mock phase time")
+        for line in self._summary.to_lines(max_models=SLOWEST_MODELS_COUNT):
+            terminalreporter.write_line(line)
+
+
+def _get_source_files(table_mock_classes: Iterable[type]) -> Set[str]:
+    """
+    Source files of table mock classes and their base classes. Classes of SQL Mock itself (e.g. the database base
+    classes or generated dbt table mocks) are covered by the SQL Mock version.
+    """
+    files = set()
+    for table_mock_class in table_mock_classes:
+        for cls in inspect.getmro(table_mock_class):
+            if cls is object or cls.__module__.split(".")[0] == "sql_mock":
+                continue
+            try:
+                source_file = inspect.getsourcefile(cls)
+            except TypeError:
+                # Built-in classes have no source file
+                continue
+            if source_file is not None:
+                files.add(source_file)
+    return files
+
+
+class ImpactAnalysis:
+    """
+    Test impact analysis based on the dbt nodes that the table mocks of a test use.
+
+    After a test passed, its used dbt nodes, the source files of its table mock classes and a fingerprint are stored in
+    the pytest cache. The fingerprint covers the SQL Mock version, the test file, the conftest.py files of the test,
+    the source files of the table mock classes and the dbt nodes. On the next run, tests with an unchanged fingerprint
+    are skipped. Tests that don't use any dbt table mocks always run.
+    """
+
+    def __init__(self, config: pytest.Config):
+        self._config = config
+        self._records: Dict[str, dict] = config.cache.get(IMPACT_CACHE_KEY, {})
+        # Fingerprints of dbt nodes per project path. The manifest is expected to stay the same during a session.
+        self._node_fingerprints: Dict[str, dict] = {}
+        self._skipped_count = 0
+
+    def _get_conftest_paths(self, test_path: str) -> List[str]:
+        """conftest.py files of the directories from the root directory to the test file"""
+        paths = []
+        for directory in Path(test_path).parents:
+            conftest_path = directory / "conftest.py"
+            if conftest_path.exists():
+                paths.append(str(conftest_path))
+            if directory == self._config.rootpath:
+                break
+        return paths
+
+    def _get_fingerprint(
+        self, test_path: str, nodes: Iterable[Tuple[str, List[str]]], files: Iterable[str] = ()
+    ) -> Optional[str]:
+        parts = [f"sql-mock {sql_mock.__version__}"]
+        for path in [test_path, *self._get_conftest_paths(test_path), *sorted(files)]:
+            file_hash = get_file_hash(path)
+            parts.append(None if file_hash is None else f"{path} {file_hash}")
+        for project_path, node_key in sorted(nodes):
+            fingerprints = self._node_fingerprints.setdefault(project_path, {})
+            parts.append(get_node_fingerprint(project_path, tuple(node_key), fingerprints))
+        if None in parts:
+            return None
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def pytest_collection_modifyitems(self, items: List[pytest.Item]):
+        for item in items:
+            record = self._records.get(item.nodeid)
+            if record is None:
+                continue
+            try:
+                fingerprint = self._get_fingerprint(str(item.path), record["nodes"], record.get("files", []))
+            except (OSError, ValueError):
+                # The dbt project is not available (anymore)
+                fingerprint = None
+            if fingerprint == record["fingerprint"]:
+                item.add_marker(pytest.mark.skip(reason=IMPACT_SKIP_REASON))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item):
+        with record_used_nodes() as used_nodes, record_used_table_mock_classes() as used_classes:
+            yield
+        if used_nodes:
+            nodes = sorted([project_path, list(node_key)] for project_path, node_key in used_nodes)
+            files = sorted(_get_source_files(used_classes))
+            item.user_properties.append(
+                (
+                    IMPACT_USER_PROPERTY,
+                    {
+                        "nodes": nodes,
+                        "files": files,
+                        "fingerprint": self._get_fingerprint(str(item.path), nodes, files),
+                    },
+                )
+            )
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport):
+        if report.failed:
+            self._records.pop(report.nodeid, None)
+        elif report.skipped and IMPACT_SKIP_REASON in str(report.longrepr):
+            self._skipped_count += 1
+        elif report.when == "call" and report.passed:
+            record = dict(report.user_properties).get(IMPACT_USER_PROPERTY)
+            if record is not None and record["fingerprint"] is not None:
+                self._records[report.nodeid] = record
+            else:
+                self._records.pop(report.nodeid, None)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self._skipped_count:
+            terminalreporter.write_line(
+                f"sql-mock impact analysis: skipped {self._skipped_count} tests with unchanged dbt nodes"
+            )
+
+    def pytest_sessionfinish(self):
+        # xdist workers report their results to the controller which stores them
+        if not hasattr(self._config, "workerinput"):
+            self._config.cache.set(IMPACT_CACHE_KEY, self._records)
@@ -0,0 +1,71 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# Strategies to render input mocks
+LITERAL_STRATEGY = "literal"
+COMPACT_STRATEGY = "compact"
+TEMP_TABLE_STRATEGY = "temp_table"
+
+# Policies for handling queries that exceed the query size budget
+AUTO_POLICY = "auto"
+COMPACT_POLICY = "compact"
+ERROR_POLICY = "error"
+IGNORE_POLICY = "ignore"
+QUERY_SIZE_POLICIES = (AUTO_POLICY, COMPACT_POLICY, ERROR_POLICY, IGNORE_POLICY)
+
+
+def get_size(sql: str) -> int:
+    """Size of a SQL string in bytes"""
+    return len(sql.encode("utf-8"))
+
+
+class InputMockSize(BaseModel):
+    """
+    Size of the SQL that is generated for an input mock.
+
+    Attributes:
+        name (str): Class name of the input mock
+        table_ref (str): Table ref of the input mock
+        size (int): Size of the input mock's CTE in the query (in bytes)
+        setup_size (int): Size of the statements that load the input mock into a temp table (in bytes)
+        strategy (str): How the input mock is rendered (literal, compact or temp_table)
+    """
+
+    name: str
+    table_ref: str
+    size: int
+    setup_size: int = 0
+    strategy: str = LITERAL_STRATEGY
+
+
+class QuerySizeReport(BaseModel):
+    """
+    Size accounting of a generated query.
+
+    Attributes:
+        query_size (int): Size of the generated query (in bytes)
+        max_query_size (int): Budget for the query size (in bytes). None if there is no budget.
+        input_mocks (list of InputMockSize): Size of each input mock, sorted by size in descending order
+    """
+
+    query_size: int
+    max_query_size: Optional[int] = None
+    input_mocks: List[InputMockSize] = []
+
+    @property
+    def exceeds_budget(self) -> bool:
+        return self.max_query_size is not None and self.query_size > self.max_query_size
+
+    def __str__(self):
+        budget = f"{self.max_query_size} bytes" if self.max_query_size is not None else "no budget"
+        lines = [f"Generated query size: {self.query_size} bytes ({budget})."]
+        if self.input_mocks:
+            lines.append("Largest input mocks:")
+            lines.extend(
+                f"  {input_mock.name} ({input_mock.table_ref}): {input_mock.size} bytes"
+                + (f" + {input_mock.setup_size} bytes of setup statements" if input_mock.setup_size else "")
+                + f" [{input_mock.strategy}]"
+                for input_mock in self.input_mocks[:10]
+            )
+        return "\n".join(lines)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,3 +10,5 @@ class RedshiftSettings(BaseSettings):
     user: str
     password: str = None
     port: int = 5439
+    # Maximum number of concurrent queries of all test processes on this machine (None means no limit)
+    max_concurrent_queries: Optional[int] = None
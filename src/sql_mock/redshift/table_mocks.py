@@ -1,11 +1,20 @@
+from typing import TYPE_CHECKING, Iterator
+
 import redshift_connector
 
 from sql_mock.redshift.settings import RedshiftSettings
 from sql_mock.table_mocks import BaseTableMock
 
+# pyarrow is an optional dependency
+if TYPE_CHECKING:
+    import pyarrow
+
 
 class RedshiftTableMock(BaseTableMock):
     _sql_dialect = "redshift"
+    # Redshift rejects statements larger than 16 MB
+    _max_query_size = 16 * 1024 * 1024
+    _supports_temp_table_inputs = True
 
     def __init__(
         self,
@@ -15,15 +24,40 @@ class RedshiftTableMock(BaseTableMock):
         self.settings = RedshiftSettings()
         super().__init__(*args, **kwargs)
 
-    def _get_results(self, query: str) -> list[dict]:
-        with redshift_connector.connect(
+    def _connect(self):
+        return redshift_connector.connect(
             host=self.settings.host,
             database=self.settings.database,
             user=self.settings.user,
             password=self.settings.password,
             port=self.settings.port,
-        ) as con:
+        )
+
+    def _get_results(self, query: str) -> list[dict]:
+        # Both comparison paths use the values of the driver (e.g. None for NULL instead of NaN with pandas)
+        return list(self._iter_results(query))
+
+    def _iter_results(self, query: str) -> Iterator[dict]:
+        with self._connection() as con:
+            with con.cursor() as cursor:
+                self._execute_setup_statements(cursor.execute)
+                cursor.execute(query)
+                # Use the same lower cased column names as `fetch_dataframe`
+                column_names = [column[0].lower() for column in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(self._result_batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(zip(column_names, row))
+
+    def _get_arrow_results(self, query: str) -> "pyarrow.Table":
+        # redshift_connector has no native Arrow support, which is why we convert the fetched dataframe
+        import pyarrow
+
+        with self._connection() as con:
             with con.cursor() as cursor:
+                self._execute_setup_statements(cursor.execute)
                 cursor.execute(query)
                 res = cursor.fetch_dataframe()
-        return res.to_dict("records")
+        return pyarrow.Table.from_pandas(res, preserve_index=False)
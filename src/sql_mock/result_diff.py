@@ -0,0 +1,172 @@
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+
+def _hashable(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(val) for val in value)
+    if isinstance(value, set):
+        return frozenset(_hashable(val) for val in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _row_key(row: dict) -> tuple:
+    return tuple(sorted((key, _hashable(value)) for key, value in row.items()))
+
+
+def _count_column_mismatches(pairs: List[Tuple[dict, dict]]) -> Dict[str, int]:
+    column_mismatches = Counter()
+    for expected_row, actual_row in pairs:
+        for column in expected_row.keys() | actual_row.keys():
+            if column not in expected_row or column not in actual_row or expected_row[column] != actual_row[column]:
+                column_mismatches[column] += 1
+    return dict(column_mismatches.most_common())
+
+
+def _format_rows(rows: List[Any], total: int) -> List[str]:
+    lines = [f"  {row}" for row in rows]
+    if total > len(rows):
+        lines.append(f"  ... and {total - len(rows)} more")
+    return lines
+
+
+class ResultDiff(BaseModel):
+    """
+    Bounded summary of the differences between the actual and expected results of a query.
+
+    Attributes:
+        expected_row_count (int): Number of expected rows
+        actual_row_count (int): Number of rows returned by the query
+        missing_row_count (int): Number of expected rows that are not part of the results
+        extra_row_count (int): Number of returned rows that are not expected
+        missing_rows (list of dicts): Examples of missing rows
+        extra_rows (list of dicts): Examples of unexpected rows
+        column_mismatches (dict): Number of mismatches per column between paired rows. For ordered comparisons, rows at
+            the same position are paired. Otherwise, missing and unexpected rows are paired in their order of occurrence.
+        misplaced_row_count (int): Number of positions with mismatching rows (only for ordered comparisons)
+        misplaced_rows (list of tuples): Examples of (position, expected row, actual row) for ordered comparisons
+        stopped_early (bool): Whether an ordered comparison stopped fetching results at the first mismatching row.
+            In that case, only the fetched rows are compared with the same number of expected rows.
+    """
+
+    expected_row_count: int
+    actual_row_count: int
+    missing_row_count: int = 0
+    extra_row_count: int = 0
+    missing_rows: List[dict] = []
+    extra_rows: List[dict] = []
+    column_mismatches: Dict[str, int] = {}
+    misplaced_row_count: int = 0
+    misplaced_rows: List[Tuple[int, dict, dict]] = []
+    stopped_early: bool = False
+
+    def __bool__(self):
+        return bool(self.missing_row_count or self.extra_row_count or self.misplaced_row_count)
+
+    def __str__(self):
+        if self.stopped_early:
+            row_counts = (
+                f"Expected {self.expected_row_count} rows. Fetching stopped at the first mismatching row after "
+                f"{self.actual_row_count} rows, the following differences only cover the fetched rows."
+            )
+        else:
+            row_counts = f"Expected {self.expected_row_count} rows, got {self.actual_row_count} rows."
+        lines = ["Query results do not match the expected data.", row_counts]
+        if self.missing_row_count:
+            lines.append(f"Missing rows (expected but not returned): {self.missing_row_count}")
+            lines.extend(_format_rows(self.missing_rows, self.missing_row_count))
+        if self.extra_row_count:
+            lines.append(f"Unexpected rows (returned but not expected): {self.extra_row_count}")
+            lines.extend(_format_rows(self.extra_rows, self.extra_row_count))
+        if self.misplaced_row_count:
+            lines.append(f"Positions with mismatching rows: {self.misplaced_row_count}")
+            misplaced = [
+                f"#{index}: expected {expected_row}, got {actual_row}"
+                for index, expected_row, actual_row in self.misplaced_rows
+            ]
+            lines.extend(_format_rows(misplaced, self.misplaced_row_count))
+        if self.column_mismatches:
+            lines.append(f"Mismatches per column between paired rows: {self.column_mismatches}")
+        return "\n".join(lines)
+
+
+def get_result_diff(
+    data: List[dict],
+    expected: List[dict],
+    ignore_order: bool,
+    max_examples: int,
+    expected_row_count: int = None,
+    stopped_early: bool = False,
+    actual_row_count: int = None,
+    positions: List[int] = None,
+) -> ResultDiff:
+    """
+    Compute a bounded diff between actual and expected rows in linear time.
+
+    Args:
+        data (list of dicts): Actual result rows
+        expected (list of dicts): Expected rows
+        ignore_order (bool): If false, rows at the same position are compared with each other
+        max_examples (int): Maximum number of example rows that are kept per category
+        expected_row_count (int): Total number of expected rows if `expected` only contains a part of them
+            (e.g. because fetching stopped early). Defaults to the length of `expected`.
+        stopped_early (bool): Whether fetching the results stopped at the first mismatching row
+        actual_row_count (int): Total number of actual rows if `data` only contains a part of them
+            (e.g. only the mismatching rows). Defaults to the length of `data`.
+        positions (list of ints): Positions in the results of the rows in `data` and `expected` for ordered
+            comparisons of a part of the rows. Defaults to the positions in the lists.
+    """
+    expected_keys = [_row_key(row) for row in expected]
+    actual_keys = [_row_key(row) for row in data]
+    expected_counts = Counter(expected_keys)
+    actual_counts = Counter(actual_keys)
+    missing_counts = expected_counts - actual_counts
+    extra_counts = actual_counts - expected_counts
+
+    diff = ResultDiff(
+        expected_row_count=len(expected) if expected_row_count is None else expected_row_count,
+        actual_row_count=len(data) if actual_row_count is None else actual_row_count,
+        missing_row_count=sum(missing_counts.values()),
+        extra_row_count=sum(extra_counts.values()),
+        stopped_early=stopped_early,
+    )
+
+    # Collect unmatched rows in their order of occurrence
+    missing_rows, extra_rows = [], []
+    for rows, keys, counts, unmatched in [
+        (expected, expected_keys, missing_counts, missing_rows),
+        (data, actual_keys, extra_counts, extra_rows),
+    ]:
+        remaining = Counter(counts)
+        for row, key in zip(rows, keys):
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                unmatched.append(row)
+
+    if ignore_order:
+        pairs = list(zip(missing_rows, extra_rows))
+    else:
+        misplaced = [
+            (index if positions is None else positions[index], expected_row, actual_row)
+            for index, (expected_key, actual_key, expected_row, actual_row) in enumerate(
+                zip(expected_keys, actual_keys, expected, data)
+            )
+            if expected_key != actual_key
+        ]
+        # Rows that only exist on one side are reported as missing or unexpected rows
+        diff.misplaced_row_count = len(misplaced)
+        diff.misplaced_rows = misplaced[:max_examples]
+        pairs = [(expected_row, actual_row) for _, expected_row, actual_row in misplaced]
+
+    diff.missing_rows = missing_rows[:max_examples]
+    diff.extra_rows = extra_rows[:max_examples]
+    diff.column_mismatches = _count_column_mismatches(pairs)
+    return diff
@@ -2,7 +2,8 @@ from sql_mock.column_mocks import BaseColumnMock
 
 
 class SnowflakeColumnMock(BaseColumnMock):
-    pass
+    # Snowflake treats backslashes in string literals as escape characters
+    escape_sequences = (("\\", "\\\\"), ("'", "''"))
 
 
 class INTEGER(SnowflakeColumnMock):
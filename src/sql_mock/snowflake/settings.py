@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,3 +8,5 @@ class SnowflakeSettings(BaseSettings):
     account: str
     user: str
     password: str
+    # Maximum number of concurrent queries of all test processes on this machine (None means no limit)
+    max_concurrent_queries: Optional[int] = None
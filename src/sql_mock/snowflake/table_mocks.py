@@ -1,11 +1,22 @@
+from typing import TYPE_CHECKING, Iterator
+
 from snowflake.connector import DictCursor, connect
 
 from sql_mock.snowflake.settings import SnowflakeSettings
 from sql_mock.table_mocks import BaseTableMock
 
+# pyarrow is an optional dependency
+if TYPE_CHECKING:
+    import pyarrow
+
 
 class SnowflakeTableMock(BaseTableMock):
     _sql_dialect = "snowflake"
+    # Snowflake rejects statements larger than 16 MB
+    _max_query_size = 16 * 1024 * 1024
+    _supports_temp_table_inputs = True
+    # Snowflake may inline CTEs so input mocks that are referenced multiple times could be evaluated multiple times
+    _materialize_repeated_inputs = True
 
     def __init__(
         self,
@@ -15,12 +26,35 @@ class SnowflakeTableMock(BaseTableMock):
         self.settings = SnowflakeSettings()
         super().__init__(*args, **kwargs)
 
-    def _get_results(self, query: str) -> list[dict]:
-        with connect(
+    def _connect(self):
+        return connect(
             user=self.settings.user,
             password=self.settings.password,
             account=self.settings.account,
-        ) as conn:
+        )
+
+    def _get_results(self, query: str) -> list[dict]:
+        with self._connection() as conn:
             with conn.cursor(DictCursor) as cur:
+                self._execute_setup_statements(cur.execute)
                 cur.execute(query)
                 return cur.fetchall()
+
+    def _iter_results(self, query: str) -> Iterator[dict]:
+        with self._connection() as conn:
+            with conn.cursor(DictCursor) as cur:
+                self._execute_setup_statements(cur.execute)
+                cur.execute(query)
+                while True:
+                    rows = cur.fetchmany(self._result_batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+
+    def _get_arrow_results(self, query: str) -> "pyarrow.Table":
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                self._execute_setup_statements(cur.execute)
+                cur.execute(query)
+                # Without forcing a table, an empty result would be returned as None
+                return cur.fetch_arrow_all(force_return_table=True)
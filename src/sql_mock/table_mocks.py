@@ -1,22 +1,120 @@
+import inspect
+import re
+import uuid
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
 from textwrap import dedent, indent
-from typing import List, Type
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 import sqlglot
 from sqlglot.optimizer.eliminate_ctes import eliminate_ctes
 from jinja2 import Template
-from pydantic import BaseModel, ConfigDict, SkipValidation
+from pydantic import BaseModel, ConfigDict, PrivateAttr, SkipValidation
 
 from sql_mock.column_mocks import BaseColumnMock
+from sql_mock.config import SQLMockConfig
+from sql_mock.connections import get_warehouse_time, open_connection
 from sql_mock.constants import NO_INPUT
+from sql_mock.exceptions import QuerySizeExceededError
 from sql_mock.helpers import (
+    QueryDependencyIndex,
+    all_values_equal,
+    get_cte_evaluation_counts,
     get_keys_from_list_of_dicts,
+    get_referenced_columns,
     parse_table_refs,
     replace_original_table_references,
     remove_cte_from_query,
-    select_from_cte,
+    select_from_cte_ast,
+    take_rows_until_mismatch,
+    truncate_query,
     validate_all_input_mocks_for_query_provided,
     validate_input_mocks,
 )
+from sql_mock.query_size import (
+    AUTO_POLICY,
+    COMPACT_POLICY,
+    COMPACT_STRATEGY,
+    IGNORE_POLICY,
+    LITERAL_STRATEGY,
+    TEMP_TABLE_STRATEGY,
+    InputMockSize,
+    QuerySizeReport,
+    get_size,
+)
+from sql_mock.result_diff import get_result_diff
+from sql_mock.timings import (
+    COMPARISON_PHASE,
+    EXECUTION_PHASE,
+    LITERALS_PHASE,
+    PARSE_PHASE,
+    RENDER_PHASE,
+    REWRITE_PHASE,
+    VALIDATION_PHASE,
+    PhaseTimer,
+    add_phase_time,
+)
+
+# pyarrow is an optional dependency
+if TYPE_CHECKING:
+    import pyarrow
+
+# The data of input mocks is not parsed by sqlglot. Their CTEs contain a placeholder while the query is processed
+# which is exchanged with the rendered data when the query is converted to a string.
+INPUT_PLACEHOLDER = "sql_mock__input_{index}"
+INPUT_PLACEHOLDER_PATTERN = re.compile(r"\(\s*SELECT\s+'sql_mock__input_(\d+)'\s*\)")
+# Makes the names of temporary tables unique per process. Databases like Redshift and Snowflake have no DROP statement
+# that is restricted to temporary tables, so without it a permanent table with the same name could be dropped.
+TEMP_TABLE_NAME_SUFFIX = f"__{uuid.uuid4().hex[:12]}"
+# Number of rendered queries per table mock class whose dependency index is cached (e.g. different Jinja variables)
+DEPENDENCY_INDEX_CACHE_SIZE = 8
+
+# Table mock classes that are instantiated while recording (see `record_used_table_mock_classes`)
+_used_table_mock_classes: Optional[set] = None
+
+
+@contextmanager
+def record_used_table_mock_classes() -> Iterator[set]:
+    """
+    Record the table mock classes that are instantiated within the context.
+
+    Yields:
+        Set that is filled with the table mock classes
+    """
+    global _used_table_mock_classes
+    previous_used_classes, _used_table_mock_classes = _used_table_mock_classes, set()
+    try:
+        yield _used_table_mock_classes
+    finally:
+        if previous_used_classes is not None:
+            previous_used_classes.update(_used_table_mock_classes)
+        _used_table_mock_classes = previous_used_classes
+
+
+def _splice_input_queries(query: str, input_queries: List[str], pretty: bool = False) -> str:
+    """Replace the input CTE placeholders of a generated query with the queries that render the input data"""
+
+    def replace(match: re.Match) -> str:
+        input_query = input_queries[int(match.group(1))]
+        if pretty:
+            return f"(\n{indent(input_query, '  ')}\n)"
+        return f"({input_query})"
+
+    return INPUT_PLACEHOLDER_PATTERN.sub(replace, query)
 
 
 def table_meta(
@@ -51,6 +149,11 @@ def table_meta(
     return decorator
 
 
+def _remove_column_aliases(rendered_values: List[str], column_name: str) -> List[str]:
+    suffix = f" AS {column_name}"
+    return [value[: -len(suffix)] if value.endswith(suffix) else value for value in rendered_values]
+
+
 class SQLMockData(BaseModel):
     """
     Class to store data on BaseTableMock instances which is used during processing.
@@ -61,9 +164,44 @@ class SQLMockData(BaseModel):
 
     columns: dict[str, Type[BaseColumnMock]] = None
     data: list[dict] = None
+    # Column oriented data (pyarrow.Table) which is used instead of `data` if provided
+    columnar_data: Any = None
     input_data: list[dict] = None
     rendered_query: str = None
-    last_query: str = None
+    # Parsed rendered query with mocked CTEs removed. It is shared by validation and query generation.
+    query_ast: sqlglot.Expression = None
+    # Compact version of the last generated query which is sent to the database
+    executed_query: str = None
+    # Statements that need to run on the same connection before the last query (e.g. to load temp tables)
+    setup_statements: list[str] = []
+    query_size_report: QuerySizeReport = None
+    # Whether the database answered the last query from its result cache. None if the database doesn't report it.
+    cache_hit: Optional[bool] = None
+    # Seconds spent per phase (e.g. rendering, execution or comparison) of this table mock. See `sql_mock.timings`.
+    phase_timings: Dict[str, float] = {}
+
+    _last_query: str = PrivateAttr(default=None)
+    _last_query_renderer: Callable[[], str] = PrivateAttr(default=None)
+
+    @property
+    def last_query(self) -> str:
+        """
+        Last generated query in a readable format for debugging. It starts with the setup statements of the query
+        (e.g. those that load input mocks into temp tables). Pretty-printing is slow for large queries which is why it only happens on access.
+        """
+        if self._last_query is None and self._last_query_renderer is not None:
+            self._last_query = self._last_query_renderer()
+        return self._last_query
+
+    @last_query.setter
+    def last_query(self, query: str):
+        self._last_query = query
+        self._last_query_renderer = None
+
+    def set_last_query_renderer(self, renderer: Callable[[], str]):
+        """Set a function that renders the readable version of the last query when it is accessed"""
+        self._last_query = None
+        self._last_query_renderer = renderer
 
 
 class BaseTableMock:
@@ -76,11 +214,33 @@ class BaseTableMock:
     Attributes:
         _sql_mock_data (SQLMockData): A class that stores data which is for processing. This is automatically created on instantiation.
         _sql_dialect (str): The sql dialect that the mock model uses. It will be leveraged by sqlglot.
+        _result_batch_size (int): Number of rows that are fetched at once when results are streamed from the database.
+        _max_query_size (int): Maximum size of a query in bytes that the database accepts. None if there is no limit.
+        _supports_temp_table_inputs (bool): Whether input mocks can be loaded into temporary tables with setup statements
+            that run on the same connection before the query (see `SQLMockData.setup_statements`).
+        _create_temp_table_statement (str): Template to create a temporary table from a query
+        _drop_temp_table_statement (str): Template to drop a temporary table if it exists (e.g. from a previous query
+            on a shared connection)
+        _temp_table_name_suffix (str): Suffix of the names of temporary tables. Can be empty if
+            `_drop_temp_table_statement` only affects temporary tables.
+        _insert_statement (str): Template to insert the results of a query into a table
+        _materialize_repeated_inputs (bool): Whether input mocks that are evaluated multiple times by the query
+            (e.g. self joins) can be loaded into temporary tables. Useful for databases that inline CTEs for every
+            reference. Requires `_supports_temp_table_inputs` and is only done if enabled with
+            `SQLMockConfig.set_materialize_repeated_inputs`.
     """
 
     _sql_mock_data: SQLMockData = None
     _sql_mock_meta: "TableMockMeta" = None
     _sql_dialect: str = None
+    _result_batch_size: int = 1000
+    _max_query_size: int = None
+    _supports_temp_table_inputs: bool = False
+    _create_temp_table_statement: str = "CREATE TEMPORARY TABLE {table_name} AS {query}"
+    _drop_temp_table_statement: str = "DROP TABLE IF EXISTS {table_name}"
+    _temp_table_name_suffix: str = TEMP_TABLE_NAME_SUFFIX
+    _insert_statement: str = "INSERT INTO {table_name} {query}"
+    _materialize_repeated_inputs: bool = False
 
     def __init__(self, data: list[dict] = None, sql_mock_data: SQLMockData = None) -> None:
         """
@@ -89,6 +249,8 @@ class BaseTableMock:
         Args:
             data (list[dict]): A list of dictionaries representing rows of data.
         """
+        if _used_table_mock_classes is not None:
+            _used_table_mock_classes.add(type(self))
         # Create a data class instance to avoid collision with column names of the table we want to mock
         if sql_mock_data is not None:
             self._sql_mock_data = sql_mock_data
@@ -96,8 +258,11 @@ class BaseTableMock:
         elif self._sql_mock_data is None:
             self._sql_mock_data = SQLMockData()
 
+        # Look up attributes statically to avoid evaluating descriptors (e.g. the deferred metadata of dbt mocks)
         self._sql_mock_data.columns = {
-            field: getattr(self, field) for field in dir(self) if isinstance(getattr(self, field), BaseColumnMock)
+            field: getattr(self, field)
+            for field in dir(self)
+            if isinstance(inspect.getattr_static(self, field), BaseColumnMock)
         }
 
         if data is not None:
@@ -114,6 +279,60 @@ class BaseTableMock:
     def from_dicts(cls, data: list[dict] = None):
         return cls(data=data)
 
+    @classmethod
+    def from_arrow(cls, table: "pyarrow.Table"):
+        """
+        Instantiate the mock table from a pyarrow Table. The data is kept column oriented and never converted into
+        a list of dictionaries.
+
+        Args:
+            table (pyarrow.Table): Table with columns that are a subset of the table mock's columns.
+        """
+        instance = cls()
+        not_existing_fields = [name for name in table.column_names if name not in instance._sql_mock_data.columns]
+        if not_existing_fields:
+            raise ValueError(
+                f"Fields provided that are not part of the table's fields. Non existing fields: {not_existing_fields}"
+            )
+        instance._sql_mock_data.columnar_data = table
+        return instance
+
+    @classmethod
+    def from_parquet(cls, path: str):
+        """
+        Instantiate the mock table from a parquet file. The file is memory-mapped and its data kept column oriented.
+
+        Args:
+            path (str): Path to the parquet file. Its columns need to be a subset of the table mock's columns.
+        """
+        # pyarrow is an optional dependency
+        import pyarrow.parquet
+
+        return cls.from_arrow(pyarrow.parquet.read_table(path, memory_map=True))
+
+    @classmethod
+    def from_csv(cls, path: str):
+        """
+        Instantiate the mock table from a CSV file with a header row. The data is kept column oriented.
+
+        All values are read as strings since they are cast to the column types in SQL anyways.
+        Empty values and values like `NULL` are treated as NULL.
+
+        Args:
+            path (str): Path to the CSV file. Its columns need to be a subset of the table mock's columns.
+        """
+        # pyarrow is an optional dependency
+        import pyarrow
+        import pyarrow.csv
+
+        # Look up attributes statically to avoid evaluating descriptors (e.g. the deferred metadata of dbt mocks)
+        column_names = [field for field in dir(cls) if isinstance(inspect.getattr_static(cls, field), BaseColumnMock)]
+        convert_options = pyarrow.csv.ConvertOptions(
+            column_types={column_name: pyarrow.string() for column_name in column_names},
+            strings_can_be_null=True,
+        )
+        return cls.from_arrow(pyarrow.csv.read_csv(path, convert_options=convert_options))
+
     @classmethod
     def from_mocks(
         cls, input_data: list["BaseTableMock"] = None, query_template_kwargs: dict = None, query: str = None
@@ -127,9 +346,11 @@ class BaseTableMock:
             query: String of the SQL query that is used to generate the model. Can be a Jinja template. If provided, it overwrites the query on cls._sql_mock_meta.query.
         """
         instance = cls(data=[])
+        timer = instance._phase_timer()
         query_template = Template(query or cls._sql_mock_meta.query)
         query = query_template.render(query_template_kwargs or {})
         instance._sql_mock_data.rendered_query = query
+        timer.lap(RENDER_PHASE)
 
         # Update defaults with provided data. We use the table ref dictionaries to avoid duplicated inputs.
         if getattr(cls._sql_mock_meta, "default_inputs", None):
@@ -140,15 +361,70 @@ class BaseTableMock:
             input_data = list({**default_inputs, **input_dict}.values())
 
         validate_input_mocks(input_data)
-        validate_all_input_mocks_for_query_provided(query=query, dialect=cls._sql_dialect, input_mocks=input_data)
+        # The query is only analyzed once per model. Validation and query generation both use the cached index.
+        sql_mock_meta = cls._sql_mock_meta or TableMockMeta()
+        timer.lap(VALIDATION_PHASE)
+        dependency_index = sql_mock_meta.get_dependency_index(query, dialect=cls._sql_dialect)
+        timer.lap(PARSE_PHASE)
+        validate_all_input_mocks_for_query_provided(
+            query=dependency_index.query_ast,
+            dialect=cls._sql_dialect,
+            input_mocks=input_data,
+            dependency_index=dependency_index,
+        )
+        timer.lap(VALIDATION_PHASE)
+        query_ast = dependency_index.query_ast.copy()
+        for table_mock in input_data:
+            query_ast = remove_cte_from_query(query_ast=query_ast, cte_name=table_mock._sql_mock_meta.table_ref)
         instance._sql_mock_data.input_data = input_data
+        instance._sql_mock_data.query_ast = query_ast
+        timer.lap(REWRITE_PHASE)
 
         return instance
 
-    def _generate_input_data_cte_snippet(self):
-        # Convert instances into SQL snippets that serve as input to a CTE
-        table_ctes = [table_mock.as_sql_input() for table_mock in self._sql_mock_data.input_data]
-        return ",\n".join(table_ctes)
+    def _render_input_query(
+        self, table_mock: "BaseTableMock", column_names: Optional[Set[str]], strategy: str, max_query_size: int = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Render the query of an input mock's CTE with the given strategy.
+
+        Returns:
+            Tuple of the query and the setup statements that need to run before the query
+        """
+        if strategy == TEMP_TABLE_STRATEGY:
+            # The statements of the input mock need to be executed by this table mock's database connection
+            return table_mock._as_temp_table_input(
+                column_names=column_names,
+                statement_max_size=max_query_size,
+                create_temp_table_statement=self._create_temp_table_statement,
+                insert_statement=self._insert_statement,
+                drop_temp_table_statement=self._drop_temp_table_statement,
+                temp_table_name_suffix=self._temp_table_name_suffix,
+            )
+        return table_mock._to_sql_selects(column_names=column_names, compact=strategy == COMPACT_STRATEGY)[0], []
+
+    def _render_query(
+        self, query_template: str, input_data: List["BaseTableMock"], result_query_ast: sqlglot.Expression
+    ) -> sqlglot.Expression:
+        """
+        Build the AST of the final query. Input CTEs only contain placeholders (see `_splice_input_queries`)
+        so that the cost of parsing and generating the query does not depend on the amount of mock data.
+        """
+        input_ctes = [
+            f"{table_mock._sql_mock_meta.cte_name} AS (SELECT '{INPUT_PLACEHOLDER.format(index=index)}')"
+            for index, table_mock in enumerate(input_data)
+        ]
+        # The result CTE gets a placeholder which is exchanged with the parsed query afterwards
+        query = query_template.format(input_data_ctes=",\n".join(input_ctes), result_query="SELECT 1")
+
+        query_ast = sqlglot.parse_one(query, dialect=self._sql_dialect)
+        result_cte = next(cte for cte in query_ast.find_all(sqlglot.exp.CTE) if cte.alias == "result")
+        result_cte.set("this", result_query_ast.copy())
+        for table_mock in input_data:
+            query_ast = table_mock.replace_original_references(query_ast=query_ast)
+
+        # Remove superfluous CTEs
+        return eliminate_ctes(query_ast)
 
     def _generate_query(
         self,
@@ -167,82 +443,445 @@ class BaseTableMock:
         FROM result
         """
         )
-        input_data_ctes = self._generate_input_data_cte_snippet()
-
-        # Parse the query with sqlglot to to standardize it (e.g. removes semi-colons)
-        result_query = sqlglot.parse_one(self._sql_mock_data.rendered_query, dialect=self._sql_dialect).sql(
-            dialect=self._sql_dialect
-        )
+        timer = self._phase_timer()
+        # Work on a copy of the already parsed query so that it can be reused for multiple assertions
+        if self._sql_mock_data.query_ast is None:
+            self._sql_mock_data.query_ast = sqlglot.parse_one(
+                self._sql_mock_data.rendered_query, dialect=self._sql_dialect
+            )
+            timer.lap(PARSE_PHASE)
+        result_query_ast = self._sql_mock_data.query_ast.copy()
 
         if cte_to_select is not None:
-            result_query = select_from_cte(result_query, cte_to_select, sql_dialect=self._sql_dialect)
+            result_query_ast = select_from_cte_ast(result_query_ast, cte_to_select)
             final_columns_to_select = "*"
         else:
             final_columns_to_select = ",\n".join(
                 [col.cast_field(column_name=column_name) for column_name, col in self._sql_mock_data.columns.items()]
             )
+        query_template = query_template.replace("{final_columns_to_select}", final_columns_to_select)
 
-        query = query_template.format(
-            input_data_ctes=input_data_ctes,
-            result_query=result_query,
-            final_columns_to_select=final_columns_to_select,
-        )
+        # Input CTEs are sorted so that the same test always generates the same query text independent of the order
+        # of the input mocks. This allows databases to serve repeated test runs from their result cache.
+        input_data = sorted(self._sql_mock_data.input_data, key=lambda table_mock: table_mock._sql_mock_meta.cte_name)
+        # Only render the columns of the input mocks that are used by the query
+        referenced_columns = {}
+        if SQLMockConfig.get_projection_pushdown():
+            referenced_columns = get_referenced_columns(
+                result_query_ast, [table_mock._sql_mock_meta.table_ref for table_mock in input_data]
+            )
+        column_names = [referenced_columns.get(table_mock._sql_mock_meta.table_ref) for table_mock in input_data]
+        timer.lap(REWRITE_PHASE)
 
-        query_ast = sqlglot.parse_one(query, dialect=self._sql_dialect)
-        for table_mock in self._sql_mock_data.input_data:
-            query_ast = table_mock.replace_original_references(query_ast=query_ast)
+        strategies = [LITERAL_STRATEGY] * len(input_data)
+        input_queries = [
+            table_mock._to_sql_selects(column_names=names)[0] for table_mock, names in zip(input_data, column_names)
+        ]
+        setup_statements = [[] for _ in input_data]
+        timer.lap(LITERALS_PHASE)
+        query_ast = self._render_query(query_template, input_data, result_query_ast)
+        # The compact query is sent to the database. A pretty version is only rendered for debugging.
+        query_skeleton = query_ast.sql(dialect=self._sql_dialect)
+        timer.lap(REWRITE_PHASE)
 
-        # Remove superfluous CTEs
-        query_ast = eliminate_ctes(query_ast)
-        query = query_ast.sql(pretty=True, dialect=self._sql_dialect)
-        # Store last query for debugging
-        self._sql_mock_data.last_query = query
+        max_query_size = SQLMockConfig.get_max_query_size() or self._max_query_size
+        policy = SQLMockConfig.get_query_size_policy()
+
+        if (
+            SQLMockConfig.get_materialize_repeated_inputs()
+            and self._materialize_repeated_inputs
+            and self._supports_temp_table_inputs
+        ):
+            # The data of an input mock would be evaluated again for every reference of its CTE
+            evaluation_counts = get_cte_evaluation_counts(query_ast)
+            for index, table_mock in enumerate(input_data):
+                if evaluation_counts.get(table_mock._sql_mock_meta.cte_name, 0) > 1:
+                    input_queries[index], setup_statements[index] = self._render_input_query(
+                        table_mock, column_names[index], strategy=TEMP_TABLE_STRATEGY, max_query_size=max_query_size
+                    )
+                    strategies[index] = TEMP_TABLE_STRATEGY
+        query = _splice_input_queries(query_skeleton, input_queries)
+
+        switched_for_budget = False
+        if max_query_size is not None and policy in (AUTO_POLICY, COMPACT_POLICY) and get_size(query) > max_query_size:
+            fallback_strategies = [COMPACT_STRATEGY]
+            if policy == AUTO_POLICY and self._supports_temp_table_inputs:
+                fallback_strategies.append(TEMP_TABLE_STRATEGY)
+
+            for strategy in fallback_strategies:
+                # Switch the largest input mocks first until the query is estimated to fit into the budget
+                estimated_size = get_size(query)
+                for index in sorted(range(len(input_data)), key=lambda i: get_size(input_queries[i]), reverse=True):
+                    if estimated_size <= max_query_size:
+                        break
+                    if strategies[index] == TEMP_TABLE_STRATEGY:
+                        continue
+                    previous_size = get_size(input_queries[index])
+                    input_queries[index], setup_statements[index] = self._render_input_query(
+                        input_data[index], column_names[index], strategy=strategy, max_query_size=max_query_size
+                    )
+                    strategies[index] = strategy
+                    switched_for_budget = True
+                    estimated_size -= previous_size - get_size(input_queries[index])
+                query = _splice_input_queries(query_skeleton, input_queries)
+                if get_size(query) <= max_query_size:
+                    break
+
+        report = QuerySizeReport(
+            query_size=get_size(query),
+            max_query_size=max_query_size,
+            input_mocks=sorted(
+                [
+                    InputMockSize(
+                        name=type(table_mock).__name__,
+                        table_ref=table_mock._sql_mock_meta.table_ref,
+                        size=get_size(input_query),
+                        setup_size=sum(get_size(statement) for statement in statements),
+                        strategy=strategy,
+                    )
+                    for table_mock, input_query, statements, strategy in zip(
+                        input_data, input_queries, setup_statements, strategies
+                    )
+                ],
+                key=lambda input_mock_size: input_mock_size.size,
+                reverse=True,
+            ),
+        )
+        self._sql_mock_data.query_size_report = report
+        timer.lap(LITERALS_PHASE)
+        all_setup_statements = [statement for statements in setup_statements for statement in statements]
+        self._sql_mock_data.setup_statements = all_setup_statements
+        self._sql_mock_data.executed_query = query
+        # Store last query for debugging. Setup statements come first since they contain the data of temp table inputs.
+        self._sql_mock_data.set_last_query_renderer(
+            lambda: "".join(f"{statement};\n\n" for statement in all_setup_statements)
+            + _splice_input_queries(query_ast.sql(pretty=True, dialect=self._sql_dialect), input_queries, pretty=True)
+        )
+
+        if report.exceeds_budget and policy != IGNORE_POLICY:
+            raise QuerySizeExceededError(
+                f"The generated query exceeds the query size budget. See SQLMockConfig.set_query_size_policy.\n{report}",
+                report=report,
+            )
+        if switched_for_budget:
+            warnings.warn(
+                f"Input mocks were rendered with a more compact strategy to fit the query size budget.\n{report}"
+            )
         return query
 
+    def _connect(self):
+        """
+        Open a new connection (or client) to the database that can be used as context manager.
+        This method needs to be implemented for database specific Table Mocks
+        """
+        raise NotImplementedError("Child classes need to implement this method")
+
+    def _connection(self) -> ContextManager:
+        """
+        Connection for a query. If shared connections are enabled (e.g. by the pytest plugin), the connection is
+        reused by all table mocks with the same database settings. Otherwise, a new connection is opened and closed.
+        The number of concurrent queries of all processes is limited by the `max_concurrent_queries` setting.
+        """
+        settings = getattr(self, "settings", None)
+        key = (type(self).__name__, settings.model_dump_json() if settings is not None else None)
+        max_concurrent_queries = getattr(settings, "max_concurrent_queries", None)
+        return open_connection(key, self._connect, max_concurrent_queries=max_concurrent_queries)
+
+    def _phase_timer(self) -> PhaseTimer:
+        return PhaseTimer(self._sql_mock_data.phase_timings, type(self).__name__)
+
+    def _add_phase_time(self, phase: str, seconds: float):
+        add_phase_time(self._sql_mock_data.phase_timings, type(self).__name__, phase, seconds)
+
     def _get_results(self, query: str) -> list[dict]:
         """
         This method needs to be implemented for database specific Table Mocks
         """
         raise NotImplementedError("Child classes need to implement this method")
 
-    def _to_sql_row(self, row_data: dict) -> str:
+    def _get_arrow_results(self, query: str) -> "pyarrow.Table":
+        """
+        Return the results of the query as a pyarrow Table.
+        This needs to be implemented for database specific Table Mocks that support Arrow results.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support Arrow results")
+
+    def _iter_results(self, query: str) -> Iterator[dict]:
+        """
+        Yield the result rows of the query one by one.
+
+        Database specific Table Mocks should override this method to fetch rows incrementally. This allows ordered
+        comparisons to stop consuming (and abort) the query as soon as the first mismatching row is found.
+        By default, it falls back to the fully materialized results of `_get_results`.
+        """
+        yield from self._get_results(query)
+
+    def _get_columns_to_render(self, column_names: Optional[Set[str]] = None) -> dict:
+        """
+        Get the column mocks that should be rendered.
+
+        Args:
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
+        """
+        columns = self._sql_mock_data.columns
+        if column_names is None:
+            return columns
+        selected_columns = {name: col for name, col in columns.items() if name.lower() in column_names}
+        # Render at least one column to keep the CTE valid (e.g. for `SELECT COUNT(*) FROM table`)
+        if not selected_columns and columns:
+            first_column_name = next(iter(columns))
+            selected_columns = {first_column_name: columns[first_column_name]}
+        return selected_columns
+
+    def _to_sql_row(self, row_data: dict, column_names: Optional[Set[str]] = None) -> str:
         """
         Convert a dictionary of column-value pairs into a SQL row string.
 
         Args:
             row_data (dict): Dictionary containing the column-value pairs for the row.
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
 
         Returns:
             str: A SQL row string.
         """
         return ", ".join(
             [
-                col.to_sql(column_name=column_name, value=row_data.get(column_name, NO_INPUT))
-                for column_name, col in self._sql_mock_data.columns.items()
+                col.to_sql(
+                    column_name=column_name, value=row_data.get(column_name, NO_INPUT), dialect=self._sql_dialect
+                )
+                for column_name, col in self._get_columns_to_render(column_names).items()
             ]
         )
 
-    def as_sql_input(self):
+    def _num_rows(self) -> int:
+        if self._sql_mock_data.columnar_data is not None:
+            return self._sql_mock_data.columnar_data.num_rows
+        return len(self._sql_mock_data.data)
+
+    def _get_column_values(self, column_name: str):
+        """
+        Get the values of a column. Returns a list (which contains NO_INPUT for missing values) or a pyarrow
+        ChunkedArray for columnar data. Returns None if the column is not part of the columnar data.
+        """
+        table = self._sql_mock_data.columnar_data
+        if table is None:
+            return [row_data.get(column_name, NO_INPUT) for row_data in self._sql_mock_data.data]
+        if column_name in table.column_names:
+            return table.column(column_name)
+        return None
+
+    def _get_constant_columns(self, column_names: Optional[Set[str]] = None) -> Dict[str, str]:
+        """
+        Get the rendered SQL of columns that have the same value in all rows (e.g. because they are not provided).
+
+        Args:
+            column_names (set): Lowercased names of the columns to consider. If None, all columns are considered.
+
+        Returns:
+            Dict[str, str]: Rendered SQL per constant column
+        """
+        constant_columns = {}
+        for column_name, col in self._get_columns_to_render(column_names).items():
+            values = self._get_column_values(column_name)
+            if values is None:
+                constant_columns[column_name] = col.to_sql(column_name=column_name, dialect=self._sql_dialect)
+            elif isinstance(values, list):
+                if values and all_values_equal(values):
+                    constant_columns[column_name] = col.to_sql(
+                        column_name=column_name, value=values[0], dialect=self._sql_dialect
+                    )
+            else:
+                # pyarrow is an optional dependency
+                from sql_mock.arrow import is_constant
+
+                if len(values) and is_constant(values):
+                    first_value = values.slice(0, 1)
+                    constant_columns[column_name] = col.to_sql_batch(
+                        column_name=column_name, values=first_value, dialect=self._sql_dialect
+                    )[0]
+        return constant_columns
+
+    def _render_columns(
+        self, column_names: Optional[Set[str]] = None, excluded_columns: Iterable[str] = ()
+    ) -> Dict[str, List[str]]:
+        """Render the values of each column (see `BaseColumnMock.to_sql_batch`)"""
+        rendered_columns = {}
+        for column_name, col in self._get_columns_to_render(column_names).items():
+            if column_name in excluded_columns:
+                continue
+            values = self._get_column_values(column_name)
+            if values is None:
+                # Columns that are not provided use the default which only needs to be rendered once
+                default = col.to_sql(column_name=column_name, dialect=self._sql_dialect)
+                rendered_columns[column_name] = [default] * self._num_rows()
+            else:
+                rendered_columns[column_name] = col.to_sql_batch(
+                    column_name=column_name, values=values, dialect=self._sql_dialect
+                )
+        return rendered_columns
+
+    def _to_sql_rows(
+        self, column_names: Optional[Set[str]] = None, excluded_columns: Iterable[str] = (), with_aliases: bool = True
+    ) -> List[str]:
+        """
+        Convert the data of the table mock into SQL row strings.
+        The values are rendered column by column (see `BaseColumnMock.to_sql_batch`) and then combined into rows.
+
+        Args:
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
+            excluded_columns (Iterable[str]): Names of columns that should not be rendered
+            with_aliases (bool): If false, the `AS <column_name>` aliases are omitted
+
+        Returns:
+            List[str]: A SQL row string for each row.
+        """
+        rendered_columns = self._render_columns(column_names=column_names, excluded_columns=excluded_columns)
+        if not with_aliases:
+            rendered_columns = {
+                column_name: _remove_column_aliases(values, column_name)
+                for column_name, values in rendered_columns.items()
+            }
+        return [", ".join(row) for row in zip(*rendered_columns.values())]
+
+    def _to_sql_selects(
+        self, column_names: Optional[Set[str]] = None, compact: bool = False, max_size: int = None
+    ) -> List[str]:
+        """
+        Render the data of the table mock as SELECT statement that combines all rows with UNION ALL.
+        Columns that have the same value in all rows are rendered only once in a SELECT that wraps the rows.
+
+        Args:
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
+            compact (bool): If true, column aliases are only rendered for the first row and no line breaks are used.
+            max_size (int): If provided, the rows are split into multiple SELECT statements of at most this many bytes
+                (as long as a single row is not larger).
+
+        Returns:
+            List[str]: The SELECT statements
+        """
+        num_rows = self._num_rows()
+        if num_rows == 0:
+            # Populate default values row with a WHERE FALSE statement to simulate no rows for the model
+            return [f"SELECT {self._to_sql_row({}, column_names=column_names)} FROM (SELECT 1) WHERE FALSE"]
+
+        columns = self._get_columns_to_render(column_names)
+        constant_columns = self._get_constant_columns(column_names) if num_rows > 1 else {}
+        if len(constant_columns) == len(columns):
+            # At least one column needs to be rendered per row to keep the number of rows
+            constant_columns.pop(next(iter(columns)))
+
+        rows = self._to_sql_rows(column_names=column_names, excluded_columns=constant_columns)
+        if compact:
+            # UNION ALL takes the column names from the first SELECT
+            rows_without_aliases = self._to_sql_rows(
+                column_names=column_names, excluded_columns=constant_columns, with_aliases=False
+            )
+            separator = " UNION ALL SELECT "
+        else:
+            separator = "\nUNION ALL\nSELECT "
+
+        # Keep the original column order
+        hoisted_columns = ", ".join(constant_columns.get(name, name) for name in columns)
+
+        def to_select(start: int, end: int) -> str:
+            chunk_rows = [rows[start], *(rows_without_aliases[start + 1 : end] if compact else rows[start + 1 : end])]
+            select = "SELECT " + separator.join(chunk_rows)
+            if not constant_columns:
+                return select
+            if not compact:
+                select = "\n" + indent(select, "\t") + "\n"
+            return f"SELECT {hoisted_columns} FROM ({select}) AS sql_mock__rows"
+
+        if max_size is None:
+            return [to_select(0, num_rows)]
+
+        # Split the rows into chunks that don't exceed the max size
+        selects = []
+        overhead = get_size(to_select(0, 1)) - get_size(rows[0])
+        start, chunk_size = 0, overhead
+        for index in range(num_rows):
+            row_size = get_size(rows_without_aliases[index] if compact else rows[index]) + get_size(separator)
+            if index > start and chunk_size + row_size > max_size:
+                selects.append(to_select(start, index))
+                start, chunk_size = index, overhead
+            chunk_size += row_size
+        selects.append(to_select(start, num_rows))
+        return selects
+
+    def as_sql_input(self, column_names: Optional[Set[str]] = None, compact: bool = False):
         """
         Generate a UNION ALL SQL CTE that combines data from all rows.
+        Columns that have the same value in all rows are rendered only once in a SELECT that wraps the rows.
+
+        Args:
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
+            compact (bool): If true, column aliases are only rendered for the first row and no line breaks are used.
 
         Returns:
             str: A SQL query that combines data from all rows.
         """
         # Convert the instance into a SQL snippet for CTE input
-        if len(self._sql_mock_data.data) == 0:
-            # Populate default values row with a WHERE FALSE statement to simulate no rows for the model
-            snippet = self._to_sql_row({})
-            snippet += " FROM (SELECT 1) WHERE FALSE"
-        else:
-            snippet = "\nUNION ALL\nSELECT ".join(
-                [self._to_sql_row(row_data) for row_data in self._sql_mock_data.data]
-            )
+        snippet = self._to_sql_selects(column_names=column_names, compact=compact)[0]
+        if compact:
+            return f"{self._sql_mock_meta.cte_name} AS ({snippet})"
 
         # Indent whole CTE content for better query readability
-        snippet = indent(f"SELECT {snippet}", "\t")
+        snippet = indent(snippet, "\t")
         return f"{self._sql_mock_meta.cte_name} AS (\n{snippet}\n)"
 
+    def _as_temp_table_input(
+        self,
+        column_names: Optional[Set[str]],
+        statement_max_size: int,
+        create_temp_table_statement: str,
+        insert_statement: str,
+        drop_temp_table_statement: str,
+        temp_table_name_suffix: str = "",
+    ) -> Tuple[str, List[str]]:
+        """
+        Load the data of the input mock into a temporary table instead of rendering it into the query.
+        This is done with multiple statements which each stay below the max size.
+
+        Args:
+            column_names (set): Lowercased names of the columns to render. If None, all columns are rendered.
+            statement_max_size (int): Maximum size of each statement in bytes. None if there is no limit.
+            create_temp_table_statement (str): Template to create a temporary table from a query
+            insert_statement (str): Template to insert the results of a query into a table
+            drop_temp_table_statement (str): Template to drop the temporary table if it exists
+            temp_table_name_suffix (str): Suffix of the name of the temporary table
+
+        Returns:
+            Tuple of the query that selects from the temporary table and the statements that (re)create and fill it
+        """
+        temp_table_name = f"{self._sql_mock_meta.cte_name}__input{temp_table_name_suffix}"
+        statement_templates = [
+            create_temp_table_statement.format(table_name=temp_table_name, query=""),
+            insert_statement.format(table_name=temp_table_name, query=""),
+        ]
+        max_size = None
+        if statement_max_size is not None:
+            max_size = statement_max_size - max(get_size(template) for template in statement_templates)
+        selects = self._to_sql_selects(column_names=column_names, compact=True, max_size=max_size)
+
+        setup_statements = [
+            drop_temp_table_statement.format(table_name=temp_table_name),
+            create_temp_table_statement.format(table_name=temp_table_name, query=selects[0]),
+        ]
+        setup_statements += [
+            insert_statement.format(table_name=temp_table_name, query=select) for select in selects[1:]
+        ]
+        return f"SELECT * FROM {temp_table_name}", setup_statements
+
+    def _execute_setup_statements(self, execute: Callable[[str], Any]):
+        """
+        Run the setup statements of the last generated query (e.g. to load input mocks into temp tables).
+
+        Args:
+            execute (Callable): Function that executes a statement on the connection that is used for the query
+        """
+        for statement in self._sql_mock_data.setup_statements:
+            execute(statement)
+
     def replace_original_references(self, query_ast: sqlglot.Expression) -> sqlglot.Expression:
         # In case we mock a CTE, we need to drop the original CTE from the query
         query_ast = remove_cte_from_query(query_ast=query_ast, cte_name=self._sql_mock_meta.table_ref)
@@ -254,29 +893,69 @@ class BaseTableMock:
             dialect=self._sql_dialect,
         )
 
+    def _get_results_for_assertion(self, query: str, ignore_order: bool, use_arrow: bool):
+        # Backends that report result cache usage set it while fetching the results
+        self._sql_mock_data.cache_hit = None
+        if use_arrow:
+            return self._get_arrow_results(query)
+        if ignore_order:
+            return self._get_results(query)
+        # Ordered comparisons can consume the results row by row
+        return self._iter_results(query)
+
     def _assert_equal(
         self,
-        data: [dict],
+        data: Iterable[dict],
         expected: [dict],
         ignore_missing_keys: bool = False,
         ignore_order: bool = True,
         print_query_on_fail: bool = True,
+        use_arrow: bool = False,
     ):
         """
         Assert that the provided data matches the expected data.
 
         Args:
-            data (list of dicts): Actual result data to compare the class data against
+            data (iterable of dicts or pyarrow.Table): Actual result data to compare the class data against.
+                If the order is not ignored, the rows are consumed lazily and consumption stops at the first mismatching row.
             expected (list of dicts): Expected data to compare the class data against
             ignore_missing_keys (bool): If true, the comparison will only happen for the fields that are present in the
                 list of dictionaries of the `expected` argument.
             ignore_order (bool): If true, the order of dicts / rows will be ignored for comparison.
-            print_query_on_fai (bool)l: If true, the tested query will be printed to the console output when the test fails.
+            print_query_on_fail (bool): If true, the tested query will be printed to the console output when the test fails.
+                Long queries are truncated (see `SQLMockConfig.set_failed_query_max_length`).
+            use_arrow (bool): If true, `data` is a pyarrow Table. Results that are too large for the detailed diff are
+                compared with vectorized Arrow operations and only mismatching rows are converted to Python objects.
         """
-        if ignore_missing_keys:
-            keys_to_keep = get_keys_from_list_of_dicts(expected)
+        if use_arrow:
+            if data.num_rows + len(expected) > SQLMockConfig.get_detailed_diff_max_rows():
+                self._assert_arrow_equal(
+                    data=data,
+                    expected=expected,
+                    ignore_missing_keys=ignore_missing_keys,
+                    ignore_order=ignore_order,
+                    print_query_on_fail=print_query_on_fail,
+                )
+                return
+            # Small results get the detailed diff of all rows
+            data = data.to_pylist()
+        keys_to_keep = get_keys_from_list_of_dicts(expected) if ignore_missing_keys else None
+        expected_row_count = len(expected)
+        stopped_early = False
+        if not ignore_order:
+            # Rows are compared while they are consumed so that we can stop fetching on the first mismatch
+            data, stopped_early = take_rows_until_mismatch(rows=data, expected=expected, keys_to_keep=keys_to_keep)
+            if stopped_early:
+                # Only compare the part of the expected data that has been checked so far
+                expected = expected[: len(data)]
+        elif ignore_missing_keys:
             data = [{key: value for key, value in dictionary.items() if key in keys_to_keep} for dictionary in data]
-        if ignore_order:
+        else:
+            data = list(data)
+
+        # pytest's assertion rewriting gives a rich diff which gets very slow for large results
+        show_detailed_diff = len(expected) + len(data) <= SQLMockConfig.get_detailed_diff_max_rows()
+        if ignore_order and show_detailed_diff:
             def sort_handling_none(d):
                 """
                 Sorts a dictionary by its values, but handles None values as -inf.
@@ -287,12 +966,98 @@ class BaseTableMock:
             data = sorted(data, key=sort_handling_none)
             expected = sorted(expected, key=sort_handling_none)
         try:
-            assert expected == data
+            if show_detailed_diff:
+                if stopped_early:
+                    assert expected == data, (
+                        f"Fetching stopped at the first mismatching row after {len(data)} of "
+                        f"{expected_row_count} expected rows"
+                    )
+                assert expected == data
+            else:
+                diff = get_result_diff(
+                    data=data,
+                    expected=expected,
+                    ignore_order=ignore_order,
+                    max_examples=SQLMockConfig.get_failure_diff_max_examples(),
+                    expected_row_count=expected_row_count,
+                    stopped_early=stopped_early,
+                )
+                if diff:
+                    raise AssertionError(str(diff))
+        except Exception as e:
+            if print_query_on_fail:
+                print(truncate_query(self._sql_mock_data.last_query, SQLMockConfig.get_failed_query_max_length()))
+            raise e
+
+    def _assert_arrow_equal(
+        self,
+        data,
+        expected: [dict],
+        ignore_missing_keys: bool,
+        ignore_order: bool,
+        print_query_on_fail: bool,
+    ):
+        """
+        Assert that a pyarrow Table matches the expected data using vectorized Arrow operations.
+        Only mismatching rows are converted to Python objects, the failure message reports the total row counts and
+        the positions of the mismatching rows in the results.
+        """
+        # pyarrow is an optional dependency
+        from sql_mock.arrow import get_mismatches
+
+        try:
+            mismatches = get_mismatches(
+                actual=data, expected=expected, ignore_missing_keys=ignore_missing_keys, ignore_order=ignore_order
+            )
+            diff = get_result_diff(
+                data=mismatches.data,
+                expected=mismatches.expected,
+                ignore_order=ignore_order,
+                max_examples=SQLMockConfig.get_failure_diff_max_examples(),
+                expected_row_count=mismatches.expected_row_count,
+                actual_row_count=mismatches.actual_row_count,
+                positions=mismatches.positions,
+            )
+            if diff:
+                raise AssertionError(str(diff))
         except Exception as e:
             if print_query_on_fail:
-                print(self._sql_mock_data.last_query)
+                print(truncate_query(self._sql_mock_data.last_query, SQLMockConfig.get_failed_query_max_length()))
             raise e
 
+    def _assert_query_result(
+        self,
+        query: str,
+        expected: [dict],
+        ignore_missing_keys: bool,
+        ignore_order: bool,
+        print_query_on_fail: bool,
+        use_arrow: bool,
+    ):
+        """Run the query and assert that its results equal the expected data while timing execution and comparison"""
+        timer = self._phase_timer()
+        data = self._get_results_for_assertion(query, ignore_order=ignore_order, use_arrow=use_arrow)
+        timer.lap(EXECUTION_PHASE)
+        # Streamed results are fetched while they are compared. The time spent on the database connection during the
+        # comparison is attributed to the execution.
+        warehouse_time = get_warehouse_time()
+        try:
+            self._assert_equal(
+                data=data,
+                expected=expected,
+                ignore_missing_keys=ignore_missing_keys,
+                ignore_order=ignore_order,
+                print_query_on_fail=print_query_on_fail,
+                use_arrow=use_arrow,
+            )
+        finally:
+            # Releasing the results closes the connection of streamed results which haven't been consumed completely
+            del data
+            fetch_time = get_warehouse_time() - warehouse_time
+            timer.lap(COMPARISON_PHASE)
+            self._add_phase_time(COMPARISON_PHASE, -fetch_time)
+            self._add_phase_time(EXECUTION_PHASE, fetch_time)
+
     def assert_cte_equal(
         self,
         cte_name,
@@ -300,6 +1065,7 @@ class BaseTableMock:
         ignore_missing_keys: bool = False,
         ignore_order: bool = True,
         print_query_on_fail: bool = True,
+        use_arrow: bool = False,
     ):
         """
         Assert that a CTE within the table mock's query equals the provided expected data.
@@ -311,15 +1077,17 @@ class BaseTableMock:
                 list of dictionaries of the `expected` argument.
             ignore_order (bool): If true, the order of dicts / rows will be ignored for comparison.
             print_query_on_fail (bool): If true, the tested query will be printed to the console output when the test fails.
+            use_arrow (bool): If true, the results are fetched as Arrow table and compared with vectorized operations.
+                Requires pyarrow to be installed.
         """
         query = self._generate_query(cte_to_select=cte_name)
-        data = self._get_results(query)
-        self._assert_equal(
-            data=data,
+        self._assert_query_result(
+            query=query,
             expected=expected,
             ignore_missing_keys=ignore_missing_keys,
             ignore_order=ignore_order,
             print_query_on_fail=print_query_on_fail,
+            use_arrow=use_arrow,
         )
 
     def assert_equal(
@@ -328,6 +1096,7 @@ class BaseTableMock:
         ignore_missing_keys: bool = False,
         ignore_order: bool = True,
         print_query_on_fail: bool = True,
+        use_arrow: bool = False,
     ):
         """
         Assert that the result of the table mock's query equals the provided expected data.
@@ -338,15 +1107,17 @@ class BaseTableMock:
                 list of dictionaries of the `expected` argument.
             ignore_order (bool): If true, the order of dicts / rows will be ignored for comparison.
             print_query_on_fail (bool): If true, the tested query will be printed to the console output when the test fails.
+            use_arrow (bool): If true, the results are fetched as Arrow table and compared with vectorized operations.
+                Requires pyarrow to be installed.
         """
         query = self._generate_query()
-        data = self._get_results(query)
-        self._assert_equal(
-            data=data,
+        self._assert_query_result(
+            query=query,
             expected=expected,
             ignore_missing_keys=ignore_missing_keys,
             ignore_order=ignore_order,
             print_query_on_fail=print_query_on_fail,
+            use_arrow=use_arrow,
         )
 
 
@@ -366,6 +1137,35 @@ class TableMockMeta(BaseModel):
     table_ref: str = None
     query: str = None
 
+    _dependency_indexes: "OrderedDict[Tuple[str, str], QueryDependencyIndex]" = PrivateAttr(
+        default_factory=OrderedDict
+    )
+
+    def get_dependency_index(self, rendered_query: str, dialect: str) -> QueryDependencyIndex:
+        """
+        Get the dependency index of a rendered query. The index is computed on first access and cached
+        since the dependencies of a query don't change between tests. Only the indexes of the
+        `DEPENDENCY_INDEX_CACHE_SIZE` most recently used queries are kept.
+
+        Args:
+            rendered_query (str): The rendered SQL query
+            dialect (str): The SQL dialect to use for parsing the query
+        """
+        key = (rendered_query, dialect)
+        if key in self._dependency_indexes:
+            self._dependency_indexes.move_to_end(key)
+        else:
+            self._dependency_indexes[key] = QueryDependencyIndex.from_query(
+                self._parse_query(rendered_query, dialect=dialect), dialect=dialect
+            )
+            if len(self._dependency_indexes) > DEPENDENCY_INDEX_CACHE_SIZE:
+                self._dependency_indexes.popitem(last=False)
+        return self._dependency_indexes[key]
+
+    def _parse_query(self, rendered_query: str, dialect: str) -> sqlglot.Expression:
+        """Parse a rendered query. Subclasses can override this to load the AST from a cache."""
+        return sqlglot.parse_one(rendered_query, dialect=dialect)
+
     @property
     def cte_name(self):
         if getattr(self, "table_ref", None):
@@ -0,0 +1,108 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+# Phases of a table mock assertion
+RENDER_PHASE = "render"  # Rendering the Jinja template of the query
+PARSE_PHASE = "parse"  # Parsing the query and indexing its dependencies
+VALIDATION_PHASE = "validation"  # Validating the input mocks against the query
+REWRITE_PHASE = "rewrite"  # Rewriting the query with sqlglot (e.g. replacing table references by input CTEs)
+LITERALS_PHASE = "literals"  # Rendering the data of the input mocks as SQL
+EXECUTION_PHASE = "execution"  # Running the query and fetching the results
+COMPARISON_PHASE = "comparison"  # Comparing the results against the expected data
+PHASES = (
+    RENDER_PHASE,
+    PARSE_PHASE,
+    VALIDATION_PHASE,
+    REWRITE_PHASE,
+    LITERALS_PHASE,
+    EXECUTION_PHASE,
+    COMPARISON_PHASE,
+)
+
+# Seconds per (table mock name, phase) since the last reset
+_phase_times: Dict[Tuple[str, str], float] = defaultdict(float)
+
+
+def get_phase_times() -> Dict[Tuple[str, str], float]:
+    """Seconds spent per (table mock name, phase) since the last reset"""
+    return dict(_phase_times)
+
+
+def reset_phase_times():
+    _phase_times.clear()
+
+
+def add_phase_time(timings: Dict[str, float], model_name: str, phase: str, seconds: float):
+    """
+    Add the time of a phase to the timings of a table mock and to the times of the process.
+
+    Args:
+        timings (dict): Seconds per phase of the table mock (see `SQLMockData.phase_timings`)
+        model_name (str): Name of the table mock class
+        phase (str): Name of the phase
+        seconds (float): Time spent in the phase
+    """
+    timings[phase] = timings.get(phase, 0.0) + seconds
+    _phase_times[(model_name, phase)] += seconds
+
+
+class PhaseTimer:
+    """
+    Measures consecutive phases with a single clock read per phase.
+    Each call of `lap` adds the time since the previous call (or since the start) to a phase.
+    """
+
+    def __init__(self, timings: Dict[str, float], model_name: str):
+        self._timings = timings
+        self._model_name = model_name
+        self._start = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        add_phase_time(self._timings, self._model_name, phase, now - self._start)
+        self._start = now
+
+
+class PhaseTimeSummary(BaseModel):
+    """
+    Summary of the time spent per phase and table mock (e.g. during a test session).
+
+    Attributes:
+        phases (list of tuples): Seconds per phase, sorted in descending order
+        models (list of tuples): Seconds per table mock name, sorted in descending order
+        model_phases (dict): Seconds per phase of each table mock
+    """
+
+    phases: List[Tuple[str, float]] = []
+    models: List[Tuple[str, float]] = []
+    model_phases: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_phase_times(cls, phase_times: Dict[Tuple[str, str], float]) -> "PhaseTimeSummary":
+        phases = defaultdict(float)
+        model_phases = defaultdict(dict)
+        for (model_name, phase), seconds in phase_times.items():
+            phases[phase] += seconds
+            model_phases[model_name][phase] = model_phases[model_name].get(phase, 0.0) + seconds
+        models = {model_name: sum(timings.values()) for model_name, timings in model_phases.items()}
+        return cls(
+            phases=sorted(phases.items(), key=lambda item: item[1], reverse=True),
+            models=sorted(models.items(), key=lambda item: item[1], reverse=True),
+            model_phases=dict(model_phases),
+        )
+
+    def to_lines(self, max_models: int = 10) -> List[str]:
+        lines = ["Slowest phases:"]
+        lines.extend(f"  {seconds:.2f}s {phase}" for phase, seconds in self.phases)
+        lines.append("Slowest models:")
+        for model_name, seconds in self.models[:max_models]:
+            timings = sorted(self.model_phases[model_name].items(), key=lambda item: item[1], reverse=True)
+            details = ", ".join(f"{phase} {phase_seconds:.2f}s" for phase, phase_seconds in timings)
+            lines.append(f"  {seconds:.2f}s {model_name} ({details})")
+        return lines
+
+    def __str__(self):
+        return "\n".join(self.to_lines())
@@ -58,3 +58,11 @@ def test_array_column_inner_dtype():
     assert int_array_col.dtype == "Array<Integer>"
     assert int_array_col.default == [1, 2]
     assert int_array_col.nullable is False
+
+
+def test_to_sql_escapes_quotes_and_backslashes():
+    """...then quotes and backslashes should be escaped with a backslash"""
+    column = String(default=None)
+
+    assert column.to_sql("col", value="it's a \\d") == "cast('it\\'s a \\\\d' AS String) AS col"
+    assert column.to_sql_batch("col", values=["it's"]) == ["cast('it\\'s' AS String) AS col"]
@@ -4,7 +4,7 @@ import pytest
 from google.cloud import bigquery
 from pydantic import ValidationError
 
-from sql_mock.bigquery.column_mocks import Int
+from sql_mock.bigquery.column_mocks import Array, Boolean, Float, Int, String
 from sql_mock.bigquery.table_mocks import BigQueryTableMock
 from sql_mock.table_mocks import table_meta
 
@@ -54,12 +54,73 @@ def test_get_results(mocker):
 
     # Mock the Client and QueryJob classes and their methods
     mocker.patch("google.cloud.bigquery.Client")
-    mock_client = bigquery.Client.return_value
+    mock_client = bigquery.Client.return_value.__enter__.return_value
     query_job_instance = mock_client.query.return_value
     query_job_instance.result.return_value = mock_query_job_result
 
+    query_job_instance.cache_hit = True
+
     instance = BigQueryTableMock()
     result = instance._get_results(query=query)
 
     assert result == mock_query_job_result
     mock_client.query.assert_called_once_with(query)
+    assert instance._sql_mock_data.cache_hit is True
+
+
+def test_iter_results(mocker):
+    """Test the _iter_results method."""
+    mock_query_job_result = [
+        {"column1": "value1", "column2": "value2"},
+        {"column1": "value3", "column2": "value4"},
+    ]
+    query = "SELECT 1, 2"
+
+    mocker.patch("google.cloud.bigquery.Client")
+    mock_client = bigquery.Client.return_value.__enter__.return_value
+    query_job_instance = mock_client.query.return_value
+    query_job_instance.result.return_value = iter(mock_query_job_result)
+
+    instance = BigQueryTableMock()
+    result = list(instance._iter_results(query=query))
+
+    assert result == mock_query_job_result
+    mock_client.query.assert_called_once_with(query)
+    query_job_instance.result.assert_called_once_with(page_size=instance._result_batch_size)
+
+
+def test_get_arrow_results(mocker):
+    """Test the _get_arrow_results method."""
+    query = "SELECT 1, 2"
+    mocker.patch("google.cloud.bigquery.Client")
+    mock_client = bigquery.Client.return_value.__enter__.return_value
+    query_job_instance = mock_client.query.return_value
+
+    instance = BigQueryTableMock()
+    result = instance._get_arrow_results(query=query)
+
+    assert result == query_job_instance.to_arrow.return_value
+    mock_client.query.assert_called_once_with(query)
+
+
+def test_generate_query_uses_bigquery_types():
+    """...then the data of input mocks should be cast to the type names of BigQuery"""
+
+    @table_meta(table_ref="data.typed_table")
+    class TypedTable(BigQueryTableMock):
+        id = Int(default=1)
+        price = Float(default=2.5)
+        active = Boolean(default=True)
+        tags = Array(inner_type=String, default=["a"])
+
+    @table_meta(table_ref="result_table", query="SELECT id, price, active, tags FROM data.typed_table")
+    class ResultTable(BigQueryTableMock):
+        id = Int(default=1)
+
+    query = ResultTable.from_mocks(input_data=[TypedTable()])._generate_query()
+
+    assert "cast('1' AS INT64) AS id" in query
+    assert "cast('2.5' AS FLOAT64) AS price" in query
+    assert "cast('True' AS BOOL) AS active" in query
+    assert "AS ARRAY<STRING>) AS tags" in query
+    assert " AS Float)" not in query
@@ -3,7 +3,7 @@ import os
 import pytest
 from pydantic import ValidationError
 
-from sql_mock.clickhouse.column_mocks import Int
+from sql_mock.clickhouse.column_mocks import Float, Int
 from sql_mock.clickhouse.table_mocks import ClickHouseTableMock
 from sql_mock.table_mocks import table_meta
 
@@ -38,6 +38,20 @@ def test_init_with_environment_variables(patch_os_environment_variables):
     assert table.settings.port == "9000"
 
 
+def test_max_concurrent_queries(mocker):
+    """
+    ...then the number of concurrent queries from the settings should limit the connections
+    """
+    mocker.patch.dict(os.environ, {"SQL_MOCK_CLICKHOUSE_MAX_CONCURRENT_QUERIES": "4"})
+    mocked_open_connection = mocker.patch("sql_mock.table_mocks.open_connection")
+
+    table = MockTestTable()
+    table._connection()
+
+    assert table.settings.max_concurrent_queries == 4
+    assert mocked_open_connection.call_args.kwargs["max_concurrent_queries"] == 4
+
+
 def test_init_with_missing_configs(mocker):
     """
     ...then it should raise an error
@@ -69,3 +83,69 @@ def test_get_results(mocker):
 
     assert result == mock_query_result
     mock_client.return_value.__enter__.return_value.query.assert_called_once_with(query, use_none=True)
+
+
+def test_iter_results(mocker):
+    """
+    Test the _iter_results method.
+    """
+    mock_client = mocker.patch("sql_mock.clickhouse.table_mocks.clickhouse_connect.get_client")
+    query = "SELECT 1, 2"
+
+    mock_stream = mocker.MagicMock()
+    mock_stream.source.column_names = ("column1", "column2")
+    mock_stream.__iter__.return_value = iter([[("value1", 42)], [("value2", 43)]])
+    mocked_query_stream = mock_client.return_value.__enter__.return_value.query_row_block_stream
+    mocked_query_stream.return_value.__enter__.return_value = mock_stream
+
+    instance = ClickHouseTableMock()
+    result = list(instance._iter_results(query=query))
+
+    assert result == [{"column1": "value1", "column2": 42}, {"column1": "value2", "column2": 43}]
+    mocked_query_stream.assert_called_once_with(query, use_none=True)
+
+
+def test_get_arrow_results(mocker):
+    """
+    Test the _get_arrow_results method.
+    """
+    mock_client = mocker.patch("sql_mock.clickhouse.table_mocks.clickhouse_connect.get_client")
+    mocked_query_arrow = mock_client.return_value.__enter__.return_value.query_arrow
+    query = "SELECT 1, 2"
+
+    instance = ClickHouseTableMock()
+    result = instance._get_arrow_results(query=query)
+
+    assert result == mocked_query_arrow.return_value
+    mocked_query_arrow.assert_called_once_with(query, use_strings=True)
+
+
+def test_generate_query_uses_clickhouse_types():
+    """...then the data of input mocks should be cast to the type names of ClickHouse"""
+
+    @table_meta(table_ref="typed_table")
+    class TypedTable(ClickHouseTableMock):
+        id = Int(default=1)
+        price = Float(default=2.5, nullable=True)
+
+    @table_meta(table_ref="result_table", query="SELECT id, price FROM typed_table")
+    class ResultTable(ClickHouseTableMock):
+        id = Int(default=1)
+
+    query = ResultTable.from_mocks(input_data=[TypedTable()])._generate_query()
+
+    assert "cast('1' AS Int32) AS id" in query
+    assert "cast('2.5' AS Nullable(Float32)) AS price" in query
+
+
+def test_temp_table_input():
+    """...then only temporary tables should be dropped before the temporary table is created"""
+    instance = ClickHouseTableMock()
+
+    query, setup_statements = instance._render_input_query(MockTestTable(), column_names=None, strategy="temp_table")
+
+    assert setup_statements[0] == "DROP TEMPORARY TABLE IF EXISTS sql_mock__mock_test_table__input"
+    assert setup_statements[1].startswith(
+        "CREATE TEMPORARY TABLE sql_mock__mock_test_table__input ENGINE = Memory AS SELECT"
+    )
+    assert query == "SELECT * FROM sql_mock__mock_test_table__input"
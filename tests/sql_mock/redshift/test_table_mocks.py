@@ -48,26 +48,39 @@ def test_init_with_missing_configs(mocker):
 
 
 def test_get_results(mocker):
-    """Test the _get_results method."""
-    # Create a mock query job result
-    mock_query_job_result = [
-        {"column1": "value1", "column2": "value2"},
-        {"column1": "value3", "column2": "value4"}
-        # Add more rows as needed
-    ]
+    """...then the values of the driver should be returned like for streamed results"""
     query = "SELECT 1, 2"
-    # Mock the Redshift connector and the fetch_dataframe method from the following code:
     mock_connector = mocker.patch("sql_mock.redshift.table_mocks.redshift_connector")
     mocked_connect = mock_connector.connect.return_value.__enter__.return_value
     mocked_cursor = mocked_connect.cursor.return_value.__enter__.return_value
-    mocked_execute = mocked_cursor.execute
-    mocked_fetch_dataframe = mocked_cursor.fetch_dataframe
-    mock_dataframe = mocker.MagicMock()
-    mock_dataframe.to_dict.return_value = mock_query_job_result
-    mocked_fetch_dataframe.return_value = mock_dataframe
+    mocked_cursor.description = [("Column1",), ("column2",)]
+    mocked_cursor.fetchmany.side_effect = [[("value1", 1)], [("value3", None)], []]
 
     instance = RedshiftTableMock()
     result = instance._get_results(query=query)
 
-    assert result == mock_query_job_result
-    mocked_execute.assert_called_once_with(query)
+    assert result == [
+        {"column1": "value1", "column2": 1},
+        {"column1": "value3", "column2": None},
+    ]
+    mocked_cursor.execute.assert_called_once_with(query)
+    mocked_cursor.fetch_dataframe.assert_not_called()
+
+
+def test_iter_results(mocker):
+    """Test the _iter_results method."""
+    query = "SELECT 1, 2"
+    mock_connector = mocker.patch("sql_mock.redshift.table_mocks.redshift_connector")
+    mocked_connect = mock_connector.connect.return_value.__enter__.return_value
+    mocked_cursor = mocked_connect.cursor.return_value.__enter__.return_value
+    mocked_cursor.description = [("Column1",), ("column2",)]
+    mocked_cursor.fetchmany.side_effect = [[("value1", "value2")], [("value3", "value4")], []]
+
+    instance = RedshiftTableMock()
+    result = list(instance._iter_results(query=query))
+
+    assert result == [
+        {"column1": "value1", "column2": "value2"},
+        {"column1": "value3", "column2": "value4"},
+    ]
+    mocked_cursor.execute.assert_called_once_with(query)
@@ -1,4 +1,4 @@
-from sql_mock.snowflake.column_mocks import DECIMAL, SnowflakeColumnMock
+from sql_mock.snowflake.column_mocks import DECIMAL, STRING, SnowflakeColumnMock
 
 
 def test_init_nullable():
@@ -45,3 +45,11 @@ class TestDecimalColumn:
         assert decimal_col.dtype == "DECIMAL(10, 2)"
         assert decimal_col.default is None
         assert decimal_col.nullable
+
+
+def test_to_sql_escapes_quotes_and_backslashes():
+    """...then backslashes should be escaped and quotes doubled"""
+    column = STRING(default=None)
+
+    assert column.to_sql("col", value="it's a \\") == "cast('it''s a \\\\' AS STRING) AS col"
+    assert column.to_sql_batch("col", values=["\\'"]) == ["cast('\\\\''' AS STRING) AS col"]
@@ -5,7 +5,7 @@ from pydantic import ValidationError
 
 from sql_mock.snowflake.column_mocks import INTEGER
 from sql_mock.snowflake.table_mocks import SnowflakeTableMock
-from sql_mock.table_mocks import table_meta
+from sql_mock.table_mocks import TEMP_TABLE_NAME_SUFFIX, table_meta
 
 
 @table_meta(table_ref="mock_test_table")
@@ -66,3 +66,64 @@ def test_get_results(mocker):
 
     assert result == mock_query_job_result
     mock_execute.assert_called_once_with(query)
+
+
+def test_iter_results(mocker):
+    """Test the _iter_results method."""
+    batches = [
+        [{"column1": "value1", "column2": "value2"}],
+        [{"column1": "value3", "column2": "value4"}],
+        [],
+    ]
+    query = "SELECT 1, 2"
+    mock_connect = mocker.patch("sql_mock.snowflake.table_mocks.connect")
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    mock_cursor.fetchmany.side_effect = batches
+
+    instance = SnowflakeTableMock()
+    result = list(instance._iter_results(query=query))
+
+    assert result == [*batches[0], *batches[1]]
+    mock_cursor.execute.assert_called_once_with(query)
+    mock_cursor.fetchmany.assert_called_with(instance._result_batch_size)
+
+
+def test_get_arrow_results(mocker):
+    """Test the _get_arrow_results method."""
+    query = "SELECT 1, 2"
+    mock_connect = mocker.patch("sql_mock.snowflake.table_mocks.connect")
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+
+    instance = SnowflakeTableMock()
+    result = instance._get_arrow_results(query=query)
+
+    assert result == mock_cursor.fetch_arrow_all.return_value
+    mock_cursor.execute.assert_called_once_with(query)
+    mock_cursor.fetch_arrow_all.assert_called_once_with(force_return_table=True)
+
+
+def test_get_results_runs_setup_statements(mocker):
+    """...then the setup statements should be executed on the same cursor before the query"""
+    query = "SELECT 1, 2"
+    mock_connect = mocker.patch("sql_mock.snowflake.table_mocks.connect")
+    mock_cursor = mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+
+    instance = SnowflakeTableMock()
+    instance._sql_mock_data.setup_statements = ["CREATE TEMPORARY TABLE foo AS SELECT 1", "INSERT INTO foo SELECT 2"]
+    instance._get_results(query=query)
+
+    assert [call.args[0] for call in mock_cursor.execute.call_args_list] == [
+        *instance._sql_mock_data.setup_statements,
+        query,
+    ]
+
+
+def test_temp_table_names_are_unique():
+    """...then the temporary table should have a unique name so that the drop can't affect a permanent table"""
+    instance = SnowflakeTableMock()
+
+    query, setup_statements = instance._render_input_query(MockTestTable(), column_names=None, strategy="temp_table")
+
+    temp_table_name = f"sql_mock__mock_test_table__input{TEMP_TABLE_NAME_SUFFIX}"
+    assert setup_statements[0] == f"DROP TABLE IF EXISTS {temp_table_name}"
+    assert query == f"SELECT * FROM {temp_table_name}"
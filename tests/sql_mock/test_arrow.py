@@ -0,0 +1,311 @@
+import datetime
+
+import pytest
+
+from sql_mock.column_mocks import BaseColumnMock
+from sql_mock.config import SQLMockConfig
+from sql_mock.table_mocks import BaseTableMock, table_meta
+
+pa = pytest.importorskip("pyarrow")
+
+from sql_mock.arrow import get_mismatches, get_mismatching_rows, render_sql_casts  # noqa: E402
+
+
+class IntTestColumn(BaseColumnMock):
+    dtype = "Integer"
+
+
+class StringTestColumn(BaseColumnMock):
+    dtype = "String"
+
+
+@table_meta(table_ref="test_data")
+class MockTestTable(BaseTableMock):
+    id = IntTestColumn(default=1)
+
+
+actual = pa.table(
+    {
+        "name": ["Alice", "Bob", None],
+        "age": pa.array([25, 30, None], pa.int32()),
+        "birthday": [datetime.date(2000, 1, 1), None, datetime.date(2000, 1, 3)],
+    }
+)
+alice = {"name": "Alice", "age": 25, "birthday": datetime.date(2000, 1, 1)}
+bob = {"name": "Bob", "age": 30, "birthday": None}
+nobody = {"name": None, "age": None, "birthday": datetime.date(2000, 1, 3)}
+
+
+class TestGetMismatchingRows:
+    def test_unordered_equal(self):
+        """...then no rows should be returned"""
+        assert get_mismatching_rows(actual, [nobody, bob, alice], ignore_order=True) == ([], [])
+
+    def test_unordered_not_equal(self):
+        """...then only the rows that differ should be returned"""
+        data, expected = get_mismatching_rows(actual, [bob, alice, {**nobody, "age": 1}], ignore_order=True)
+
+        assert data == [nobody]
+        assert expected == [{**nobody, "age": 1}]
+
+    def test_unordered_duplicated_rows(self):
+        """...then the number of occurrences should be taken into account"""
+        data, expected = get_mismatching_rows(actual, [alice, alice, bob, nobody], ignore_order=True)
+
+        assert data == []
+        assert expected == [alice]
+
+    def test_ordered_equal(self):
+        """...then no rows should be returned"""
+        assert get_mismatching_rows(actual, [alice, bob, nobody], ignore_order=False) == ([], [])
+
+    def test_ordered_wrong_order(self):
+        """...then the rows at mismatching positions should be returned"""
+        data, expected = get_mismatching_rows(actual, [bob, alice, nobody], ignore_order=False)
+
+        assert data == [alice, bob]
+        assert expected == [bob, alice]
+
+    def test_ordered_additional_rows(self):
+        """...then rows that only exist on one side should be returned"""
+        data, expected = get_mismatching_rows(actual, [alice, bob], ignore_order=False)
+
+        assert data == [nobody]
+        assert expected == []
+
+    def test_ignore_missing_keys(self):
+        """...then only the columns of the expected rows should be compared"""
+        data, expected = get_mismatching_rows(
+            actual, [{"name": "Bob"}, {"name": "Alice"}, {"name": None}], ignore_missing_keys=True
+        )
+
+        assert data == []
+        assert expected == []
+
+    def test_not_comparable_with_arrow(self):
+        """...then all rows should be converted to Python for the comparison"""
+        expected_rows = [{"name": "Alice"}]
+
+        data, expected = get_mismatching_rows(actual, expected_rows, ignore_missing_keys=False)
+
+        assert data == actual.to_pylist()
+        assert expected == expected_rows
+
+    def test_not_comparable_with_arrow_ignore_missing_keys(self):
+        """...then the converted rows should only keep the columns of the expected rows"""
+        mismatches = get_mismatches(actual, [{"name": "Alice"}, {"age": 30}], ignore_missing_keys=True)
+
+        assert mismatches.data == [
+            {"name": "Alice", "age": 25},
+            {"name": "Bob", "age": 30},
+            {"name": None, "age": None},
+        ]
+
+
+class TestGetMismatches:
+    def test_ordered_row_counts_and_positions(self):
+        """...then the total row counts and the positions of the mismatching rows in the results should be kept"""
+        mismatches = get_mismatches(actual, [alice, nobody], ignore_order=False)
+
+        assert mismatches.data == [bob, nobody]
+        assert mismatches.expected == [nobody]
+        assert mismatches.actual_row_count == 3
+        assert mismatches.expected_row_count == 2
+        assert mismatches.positions == [1, 2]
+
+    def test_unordered_row_counts(self):
+        """...then the total row counts should be kept without positions"""
+        mismatches = get_mismatches(actual, [alice], ignore_order=True)
+
+        assert mismatches.actual_row_count == 3
+        assert mismatches.expected_row_count == 1
+        assert mismatches.positions is None
+
+
+class TestAssertEqualWithArrow:
+    def test_matching_data(self):
+        """...then the assertion should pass"""
+        MockTestTable()._assert_equal(data=actual, expected=[bob, nobody, alice], use_arrow=True)
+
+    def test_not_matching_data(self):
+        """...then the assertion should fail"""
+        with pytest.raises(AssertionError):
+            MockTestTable()._assert_equal(
+                data=actual,
+                expected=[bob, nobody, alice],
+                ignore_order=False,
+                use_arrow=True,
+                print_query_on_fail=False,
+            )
+
+    def test_large_results_report_totals_and_positions(self, mocker):
+        """...then the failure message should contain the total row counts and the positions in the results"""
+        mocker.patch.object(SQLMockConfig, "_detailed_diff_max_rows", 2)
+        table = pa.table({"id": list(range(10))})
+        expected = [{"id": value} for value in range(10)]
+        expected[7] = {"id": 70}
+
+        with pytest.raises(AssertionError) as exc_info:
+            MockTestTable()._assert_equal(
+                data=table, expected=expected, ignore_order=False, use_arrow=True, print_query_on_fail=False
+            )
+
+        message = str(exc_info.value)
+        assert "Expected 10 rows, got 10 rows." in message
+        assert "Positions with mismatching rows: 1" in message
+        assert "#7: expected {'id': 70}, got {'id': 7}" in message
+
+    def test_large_results_unordered_report_totals(self, mocker):
+        """...then the failure message should contain the total row counts"""
+        mocker.patch.object(SQLMockConfig, "_detailed_diff_max_rows", 2)
+        table = pa.table({"id": list(range(10))})
+
+        with pytest.raises(AssertionError) as exc_info:
+            MockTestTable()._assert_equal(
+                data=table, expected=[{"id": value} for value in range(9)], use_arrow=True, print_query_on_fail=False
+            )
+
+        message = str(exc_info.value)
+        assert "Expected 9 rows, got 10 rows." in message
+        assert "Unexpected rows (returned but not expected): 1" in message
+
+
+@table_meta(table_ref="columnar_data")
+class ColumnarMockTestTable(BaseTableMock):
+    id = IntTestColumn(default=1)
+    name = StringTestColumn(default="hey")
+
+
+class TestColumnarInput:
+    expected_sql_input = (
+        f"{ColumnarMockTestTable._sql_mock_meta.cte_name} AS (\n"
+        "\tSELECT cast('1' AS Integer) AS id, cast('Alice' AS String) AS name\n"
+        "\tUNION ALL\n"
+        "\tSELECT cast('2' AS Integer) AS id, cast(NULL AS String) AS name\n"
+        ")"
+    )
+
+    def test_from_arrow(self):
+        """...then the data should be kept as Arrow table and rendered like the same data provided as dicts"""
+        table = pa.table({"id": [1, 2], "name": ["Alice", None]})
+
+        instance = ColumnarMockTestTable.from_arrow(table)
+
+        assert instance._sql_mock_data.columnar_data is table
+        assert instance._sql_mock_data.data == []
+        assert instance.as_sql_input() == self.expected_sql_input
+        assert (
+            instance.as_sql_input()
+            == ColumnarMockTestTable.from_dicts([{"id": 1, "name": "Alice"}, {"id": 2, "name": None}]).as_sql_input()
+        )
+
+    def test_from_arrow_missing_columns_use_defaults(self):
+        """...then columns that are not part of the table should use the default value"""
+        instance = ColumnarMockTestTable.from_arrow(pa.table({"id": [5]}))
+
+        assert instance.as_sql_input() == ColumnarMockTestTable.from_dicts([{"id": 5}]).as_sql_input()
+
+    def test_from_arrow_constant_columns_hoisted(self):
+        """...then constant and missing columns should be rendered once like for the same data provided as dicts"""
+        instance = ColumnarMockTestTable.from_arrow(pa.table({"id": [7, 7, 7]}))
+
+        assert instance.as_sql_input() == ColumnarMockTestTable.from_dicts([{"id": 7}] * 3).as_sql_input()
+        assert instance.as_sql_input().count("cast('hey' AS String) AS name") == 1
+
+    def test_from_arrow_empty_table(self):
+        """...then the default row should be filtered with WHERE FALSE"""
+        instance = ColumnarMockTestTable.from_arrow(pa.table({"id": pa.array([], pa.int64())}))
+
+        assert instance.as_sql_input() == ColumnarMockTestTable.from_dicts([]).as_sql_input()
+
+    def test_from_arrow_wrong_fields(self):
+        """...then it should raise a validation error"""
+        with pytest.raises(ValueError):
+            ColumnarMockTestTable.from_arrow(pa.table({"not_existing_key": [1]}))
+
+    def test_from_parquet(self, tmp_path):
+        """...then the data should be read from the parquet file"""
+        import pyarrow.parquet
+
+        path = tmp_path / "data.parquet"
+        pyarrow.parquet.write_table(pa.table({"id": [1, 2], "name": ["Alice", None]}), path)
+
+        instance = ColumnarMockTestTable.from_parquet(str(path))
+
+        assert instance.as_sql_input() == self.expected_sql_input
+
+    def test_from_csv(self, tmp_path):
+        """...then the data should be read from the CSV file and empty values should be NULL"""
+        path = tmp_path / "data.csv"
+        path.write_text("id,name\n1,Alice\n2,\n")
+
+        instance = ColumnarMockTestTable.from_csv(str(path))
+
+        assert instance._sql_mock_data.columnar_data.column("id").to_pylist() == ["1", "2"]
+        assert instance.as_sql_input() == self.expected_sql_input
+
+    def test_from_csv_does_not_evaluate_descriptors(self, tmp_path):
+        """...then descriptors of the class (e.g. the deferred metadata of dbt mocks) should not be evaluated"""
+
+        class FailingDescriptor:
+            def __get__(self, instance, owner):
+                raise AssertionError("Descriptor evaluated")
+
+        class DescriptorMockTestTable(ColumnarMockTestTable):
+            deferred = FailingDescriptor()
+
+        path = tmp_path / "data.csv"
+        path.write_text("id,name\n1,Alice\n2,\n")
+
+        instance = DescriptorMockTestTable.from_csv(str(path))
+
+        assert instance._sql_mock_data.columnar_data.column("id").to_pylist() == ["1", "2"]
+
+
+class TestRenderSqlCasts:
+    @pytest.mark.parametrize(
+        "values",
+        [
+            pa.array([1, None, -3]),
+            pa.chunked_array([["a", "it's"], [None]]),
+            pa.array([datetime.date(2023, 1, 5), None]),
+            pa.array([True, False, None]),
+        ],
+    )
+    def test_same_result_as_python_rendering(self, values):
+        """...then the vectorized rendering should match the rendering of the Python values"""
+        column = StringTestColumn(default=None)
+
+        rendered = render_sql_casts(
+            values=values,
+            dtype=column.dtype,
+            column_name="col",
+            quote=column.use_quotes_for_casting,
+            escape_sequences=column.escape_sequences,
+        )
+
+        assert rendered == [column.to_sql("col", value=value) for value in values.to_pylist()]
+
+    def test_not_quoted(self):
+        """...then the values should not be quoted"""
+        rendered = render_sql_casts(
+            values=pa.array([1, None]), dtype="Integer", column_name="col", quote=False, escape_sequences=()
+        )
+
+        assert rendered == ["cast(1 AS Integer) AS col", "cast(NULL AS Integer) AS col"]
+
+    def test_unsupported_type(self):
+        """...then None should be returned since Arrow formats floats differently than Python"""
+        assert (
+            render_sql_casts(pa.array([1.0]), dtype="Float", column_name="col", quote=True, escape_sequences=())
+            is None
+        )
+
+    def test_to_sql_batch_with_unsupported_arrow_type(self):
+        """...then the values should be rendered with the Python fallback"""
+        column = StringTestColumn(default=None)
+
+        assert column.to_sql_batch("col", values=pa.array([1.0, None])) == [
+            "cast('1.0' AS String) AS col",
+            "cast(NULL AS String) AS col",
+        ]
@@ -1,6 +1,7 @@
 import pytest
 
 from sql_mock.column_mocks import BaseColumnMock
+from sql_mock.constants import NO_INPUT
 
 
 def test_init_no_default_not_nullable():
@@ -89,3 +90,34 @@ def test_to_sql_not_use_quotes_for_casting():
     column = ColumnTestMock(default=3.14)
     sql = column.to_sql("price", value=42)
     assert sql == "cast(42 AS Integer) AS price"
+
+
+def test_to_sql_escapes_quotes():
+    """
+    ...then single quotes in the value should be escaped.
+    """
+
+    class ColumnTestMock(BaseColumnMock):
+        dtype = "String"
+
+    column = ColumnTestMock(default=None)
+    sql = column.to_sql("company", value="Ben & Jerry's")
+    assert sql == "cast('Ben & Jerry''s' AS String) AS company"
+
+
+def test_to_sql_batch():
+    """
+    ...then each value should be rendered the same way as with to_sql.
+    """
+
+    class ColumnTestMock(BaseColumnMock):
+        dtype = "String"
+
+    column = ColumnTestMock(default="OpenAI")
+    values = ["a", NO_INPUT, None, "a", 1, True, ["x"]]
+
+    sql = column.to_sql_batch("company", values=values)
+
+    assert sql == [column.to_sql("company", value=value) for value in values]
+    assert sql[4] == "cast('1' AS String) AS company"
+    assert sql[5] == "cast('True' AS String) AS company"
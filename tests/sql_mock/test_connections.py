@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from sql_mock.connections import (
+    SharedConnections,
+    get_queue_time,
+    get_warehouse_time,
+    open_connection,
+    query_slot,
+    reset_warehouse_time,
+)
+
+
+@pytest.fixture
+def shared_connections():
+    SharedConnections.enable()
+    yield SharedConnections
+    SharedConnections.close_all()
+
+
+class TestOpenConnection:
+    def test_new_connection_per_query(self, mocker):
+        """...then a new connection should be opened and closed for every query if sharing is disabled"""
+        connect = mocker.MagicMock()
+
+        for _ in range(2):
+            with open_connection("key", connect) as connection:
+                assert connection is connect.return_value.__enter__.return_value
+
+        assert connect.call_count == 2
+        assert connect.return_value.__exit__.call_count == 2
+
+    def test_shared_connection(self, mocker, shared_connections):
+        """...then the connection should be opened once per key and only closed at the end of the session"""
+        connect = mocker.Mock()
+
+        for key in ["key", "key", "other_key"]:
+            with open_connection(key, connect) as connection:
+                assert connection is connect.return_value
+
+        assert connect.call_count == 2
+        # The transaction is ended after every query
+        assert connect.return_value.rollback.call_count == 3
+        connect.return_value.close.assert_not_called()
+
+        shared_connections.close_all()
+
+        assert connect.return_value.close.call_count == 2
+        assert not shared_connections.is_enabled()
+
+    def test_shared_connection_after_error(self, mocker, shared_connections):
+        """...then the connection should stay usable after a failed query"""
+        connect = mocker.Mock()
+
+        with pytest.raises(ValueError):
+            with open_connection("key", connect):
+                raise ValueError("Query failed")
+        with open_connection("key", connect):
+            pass
+
+        connect.assert_called_once()
+        assert connect.return_value.rollback.call_count == 2
+
+    def test_warehouse_time(self, mocker):
+        """...then the time spent within the connection context should be added to the warehouse time"""
+        mocker.patch("sql_mock.connections.time.perf_counter", side_effect=[1.0, 3.5, 10.0, 11.0])
+        reset_warehouse_time()
+
+        for _ in range(2):
+            with open_connection("key", mocker.MagicMock()):
+                pass
+
+        assert get_warehouse_time() == 3.5
+
+
+class TestQuerySlot:
+    @pytest.fixture(autouse=True)
+    def lock_dir(self, mocker, tmp_path):
+        mocker.patch("sql_mock.connections.QUERY_SLOT_LOCK_DIR", str(tmp_path))
+        mocker.patch("sql_mock.connections.QUERY_SLOT_POLL_INTERVAL", 0.01)
+
+    def test_free_slots(self):
+        """...then queries should not wait as long as there are free slots"""
+        reset_warehouse_time()
+
+        with query_slot("db", max_concurrent_queries=2):
+            with query_slot("db", max_concurrent_queries=2):
+                with query_slot("other_db", max_concurrent_queries=1):
+                    pass
+
+        assert get_queue_time() < 0.01
+
+    def test_wait_for_free_slot(self):
+        """...then a query should wait until a slot is released"""
+        slot_acquired = threading.Event()
+
+        def run_query():
+            with query_slot("db", max_concurrent_queries=1):
+                slot_acquired.set()
+                time.sleep(0.2)
+
+        thread = threading.Thread(target=run_query)
+        thread.start()
+        slot_acquired.wait()
+        reset_warehouse_time()
+
+        with query_slot("db", max_concurrent_queries=1):
+            assert not thread.is_alive()
+        thread.join()
+
+        assert get_queue_time() > 0.05
+
+    def test_no_limit(self, tmp_path):
+        """...then no lock files should be used"""
+        with query_slot("db", max_concurrent_queries=None):
+            pass
+
+        assert not list(tmp_path.iterdir())
+
+    def test_lock_file_not_accessible(self, tmp_path):
+        """...then a warning should be issued and the number of concurrent queries should not be limited"""
+        # A directory can't be opened as lock file, like the lock file of another user
+        (tmp_path / "db.0.lock").mkdir()
+
+        with pytest.warns(UserWarning, match="number of concurrent queries is not limited"):
+            with query_slot("db", max_concurrent_queries=1):
+                pass
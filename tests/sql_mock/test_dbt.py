@@ -1,17 +1,42 @@
+import importlib.util
+import json
+import os
+import shutil
+from pathlib import Path
+
 import pytest
 
+import sql_mock.dbt
+from sql_mock.bigquery.column_mocks import BigQueryColumnMock
+from sql_mock.clickhouse.column_mocks import ClickhouseColumnMock
+from sql_mock.column_mocks import BaseColumnMock
 from sql_mock.config import SQLMockConfig
 from sql_mock.dbt import (
+    AST_CACHE_DIR_NAME,
+    MANIFEST_INDEX_FILE_NAME,
+    MANIFEST_INDEX_VERSION,
+    MANIFEST_NODE_FIELDS,
+    DbtManifestIndex,
+    DbtTableMockFactory,
     _get_model_metadata,
     _get_seed_metadata,
     _get_source_metadata,
     dbt_model_meta,
     dbt_seed_meta,
     dbt_source_meta,
+    get_manifest_index,
+    get_node_fingerprint,
+    parse_query_cached,
+    record_used_nodes,
 )
+from sql_mock.exceptions import ValidationError
 from sql_mock.table_mocks import BaseTableMock
 
 
+class IntTestColumn(BaseColumnMock):
+    dtype = "Integer"
+
+
 class TestDbtModelMeta:
     def test_project_path_provided(self, mocker):
         """...then metadata should be extracted from that project path"""
@@ -82,6 +107,36 @@ class TestDbtModelMeta:
         )
 
 
+class TestDeferredDbtMeta:
+    def test_metadata_resolved_on_first_access(self, mocker):
+        """...then the manifest should only be read when the metadata is used for the first time"""
+        mocked_get_seed_metadata = mocker.patch("sql_mock.dbt._get_seed_metadata")
+        mocked_get_seed_metadata.return_value = {"table_ref": "db.my_seed"}
+
+        @dbt_seed_meta(seed_name="my_seed", project_path="path/to/my/project")
+        class TestMock(BaseTableMock):
+            col = IntTestColumn(default=1)
+
+        mocked_get_seed_metadata.assert_not_called()
+        # Instantiating the mock doesn't need the metadata
+        TestMock.from_dicts([{"col": 2}])
+        mocked_get_seed_metadata.assert_not_called()
+
+        assert TestMock._sql_mock_meta.table_ref == "db.my_seed"
+        assert TestMock._sql_mock_meta.cte_name == "sql_mock__db__my_seed"
+        mocked_get_seed_metadata.assert_called_once()
+
+    def test_model_does_not_exist(self, project_file):
+        """...then the error should only be raised on first access and name the table mock"""
+
+        @dbt_model_meta(model_name="I do not exist", project_path=project_file)
+        class MissingModelMock(BaseTableMock):
+            pass
+
+        with pytest.raises(ValueError, match="MissingModelMock: Model 'I do not exist' not found in dbt manifest"):
+            MissingModelMock.from_mocks(input_data=[])
+
+
 class TestDbtSourceMeta:
     def test_project_path_provided(self, mocker):
         """...then metadata should be extracted from that project path"""
@@ -188,54 +243,541 @@ class TestDbtSeedMeta:
         )
 
 
-PROJECT_FILE = "./tests/resources/dbt/dbt_project.yml"
+@pytest.fixture
+def project_file(tmp_path) -> str:
+    """Copy of the dbt project of the test resources so that stored indexes and caches stay out of the repository"""
+    return _copy_dbt_project(tmp_path)
 
 
 class TestGetModelMetadata:
-    def test_model_does_not_exist_in_file(self):
+    def test_model_does_not_exist_in_file(self, project_file):
         """...then the method should raise a ValueError"""
         with pytest.raises(ValueError):
-            _get_model_metadata(project_path=PROJECT_FILE, model_name="I don not exist")
+            _get_model_metadata(project_path=project_file, model_name="I don not exist")
 
-    def test_model_does_exist_in_file(self):
+    def test_model_does_exist_in_file(self, project_file):
         """...then the method should return the correct values"""
-        data = _get_model_metadata(project_path=PROJECT_FILE, model_name="my_first_dbt_model")
+        data = _get_model_metadata(project_path=project_file, model_name="my_first_dbt_model")
 
-        assert data["query_path"] == "./tests/resources/dbt/dbt_target/compiled_example_models/my_first_dbt_model.sql"
+        assert data["query_path"] == os.path.join(
+            os.path.dirname(project_file), "dbt_target/compiled_example_models/my_first_dbt_model.sql"
+        )
         assert data["table_ref"] == "`sql_mock_db`.`my_first_dbt_model`"
 
 
 class TestGetSourceMetadata:
-    def test_source_does_not_exist_in_file(self):
+    def test_source_does_not_exist_in_file(self, project_file):
         """...then the method should raise a ValueError"""
         with pytest.raises(ValueError):
             _get_source_metadata(
-                project_path=PROJECT_FILE, source_name="I don not exist", table_name="I don not exist either"
+                project_path=project_file, source_name="I don not exist", table_name="I don not exist either"
             )
 
-    def test_source_does_exist_in_file(self):
+    def test_source_does_exist_in_file(self, project_file):
         """...then the method should return the correct values"""
         data = _get_source_metadata(
-            project_path=PROJECT_FILE, source_name="source_data", table_name="opportunity_events"
+            project_path=project_file, source_name="source_data", table_name="opportunity_events"
         )
 
         assert data["table_ref"] == "`source_data`.`opportunity_events`"
 
 
 class TestGetSeedMetadata:
-    def test_seed_does_not_exist_in_file(self):
+    def test_seed_does_not_exist_in_file(self, project_file):
         """...then the method should raise a ValueError"""
         with pytest.raises(ValueError):
             _get_seed_metadata(
-                project_path=PROJECT_FILE,
+                project_path=project_file,
                 seed_name="I don not exist",
             )
 
-    def test_seed_does_exist_in_file(self):
+    def test_seed_does_exist_in_file(self, project_file):
         """...then the method should return the correct values"""
         data = _get_seed_metadata(
-            project_path=PROJECT_FILE,
+            project_path=project_file,
             seed_name="country_codes",
         )
 
         assert data["table_ref"] == "`sql_mock_db`.`country_codes`"
+
+
+def _copy_dbt_project(tmp_path) -> str:
+    project_dir = shutil.copytree(
+        "./tests/resources/dbt", tmp_path / "dbt", ignore=shutil.ignore_patterns(MANIFEST_INDEX_FILE_NAME)
+    )
+    return str(project_dir / "dbt_project.yml")
+
+
+class TestGetManifestIndex:
+    def test_manifest_parsed_once(self, mocker, tmp_path):
+        """...then the manifest should only be parsed once for multiple lookups"""
+        project_file = _copy_dbt_project(tmp_path)
+        spy_read_manifest_nodes = mocker.spy(sql_mock.dbt, "_read_manifest_nodes")
+
+        _get_model_metadata(project_path=project_file, model_name="my_first_dbt_model")
+        _get_source_metadata(project_path=project_file, source_name="source_data", table_name="opportunity_events")
+        _get_seed_metadata(project_path=project_file, seed_name="country_codes")
+
+        assert spy_read_manifest_nodes.call_count == 1
+
+    def test_manifest_changed(self, tmp_path):
+        """...then the manifest should be parsed again"""
+        project_file = _copy_dbt_project(tmp_path)
+        manifest_path = tmp_path / "dbt" / "dbt_target" / "manifest.json"
+        assert "my_first_dbt_model" in get_manifest_index(project_file).models
+
+        manifest = json.loads(manifest_path.read_text())
+        manifest["nodes"]["model.sql_mock.my_first_dbt_model"]["name"] = "renamed_model"
+        manifest_path.write_text(json.dumps(manifest))
+        # Make sure that the modification time changes even on file systems with a coarse resolution
+        stat = os.stat(manifest_path)
+        os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        models = get_manifest_index(project_file).models
+        assert "my_first_dbt_model" not in models
+        assert "renamed_model" in models
+
+    def test_first_node_with_name_used(self):
+        """...then the first node of the manifest should be used if multiple nodes have the same name"""
+        manifest = {
+            "nodes": {
+                "model.a.my_model": {
+                    "unique_id": "model.a.my_model",
+                    "resource_type": "model",
+                    "name": "my_model",
+                    "compiled_path": "a.sql",
+                    "relation_name": "a.my_model",
+                },
+                "model.b.my_model": {
+                    "unique_id": "model.b.my_model",
+                    "resource_type": "model",
+                    "name": "my_model",
+                    "compiled_path": "b.sql",
+                    "relation_name": "b.my_model",
+                },
+            },
+            "sources": {},
+        }
+
+        index = DbtManifestIndex.from_manifest(manifest)
+
+        assert index.models == {
+            "my_model": {
+                "compiled_path": "a.sql",
+                "table_ref": "a.my_model",
+                "unique_id": "model.a.my_model",
+                "checksum": None,
+                "depends_on": [],
+            }
+        }
+
+    def test_upstream_nodes(self, project_file):
+        """...then the upstream nodes of models should be referenced by their lookup keys"""
+        index = get_manifest_index(project_file)
+
+        assert index.models["my_first_dbt_model"]["depends_on"] == []
+        assert index.models["my_second_dbt_model"]["depends_on"] == [["model", "my_first_dbt_model"]]
+
+    def test_stored_index_reused(self, mocker, tmp_path):
+        """...then other processes should load the stored index instead of parsing the manifest"""
+        project_file = _copy_dbt_project(tmp_path)
+        index = get_manifest_index(project_file)
+        assert (tmp_path / "dbt" / "dbt_target" / MANIFEST_INDEX_FILE_NAME).exists()
+        # Simulate a new process
+        sql_mock.dbt._get_cached_manifest_index.cache_clear()
+        spy_read_manifest_nodes = mocker.spy(sql_mock.dbt, "_read_manifest_nodes")
+
+        assert get_manifest_index(project_file) == index
+        spy_read_manifest_nodes.assert_not_called()
+
+    def test_stored_index_outdated(self, tmp_path):
+        """...then the manifest should be parsed again if the stored index belongs to another version"""
+        project_file = _copy_dbt_project(tmp_path)
+        index_path = tmp_path / "dbt" / "dbt_target" / MANIFEST_INDEX_FILE_NAME
+        index_path.write_text(json.dumps({"version": 0, "models": {}, "sources": [], "seeds": {}}))
+
+        assert "my_first_dbt_model" in get_manifest_index(project_file).models
+        assert json.loads(index_path.read_text())["version"] == MANIFEST_INDEX_VERSION
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    def test_only_used_fields_read(self, mocker, streaming):
+        """...then the manifest nodes should be the same with and without a streaming parser"""
+        manifest_path = "./tests/resources/dbt/dbt_target/manifest.json"
+        if not streaming:
+            mocker.patch.dict("sys.modules", {"ijson": None})
+        elif importlib.util.find_spec("ijson") is None:
+            pytest.skip("ijson is not installed")
+
+        nodes = list(sql_mock.dbt._read_manifest_nodes(manifest_path))
+
+        assert DbtManifestIndex.from_nodes(nodes) == DbtManifestIndex.from_manifest(
+            json.loads(Path(manifest_path).read_text())
+        )
+        if streaming:
+            assert all(set(node) <= set(MANIFEST_NODE_FIELDS) for _, node in nodes)
+
+
+class ClickHouseTestTableMock(BaseTableMock):
+    # The dbt project of the test resources uses ClickHouse
+    _sql_dialect = "clickhouse"
+
+
+class TestDbtTableMockFactory:
+    def test_model(self, project_file):
+        """...then the table mock should have the columns of the catalog and the metadata of the manifest"""
+        factory = DbtTableMockFactory(
+            ClickHouseTestTableMock, column_mock_class=IntTestColumn, project_path=project_file
+        )
+
+        table_mock_class = factory.model("my_first_dbt_model")
+
+        assert table_mock_class.__name__ == "MyFirstDbtModel"
+        assert issubclass(table_mock_class, ClickHouseTestTableMock)
+        assert isinstance(table_mock_class.id, IntTestColumn)
+        assert table_mock_class.id.dtype == "Nullable(UInt8)"
+        assert table_mock_class._sql_mock_meta.table_ref == '"sql_mock_db"."my_first_dbt_model"'
+        # Classes are only created once
+        assert factory.model("my_first_dbt_model") is table_mock_class
+
+    def test_source_and_seed(self, project_file):
+        """...then the columns should be in table order and arrays should not be quoted"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=project_file)
+
+        source_table_mock = factory.source("source_data", "opportunity_events")
+        seed_table_mock = factory.seed("country_codes")
+
+        assert source_table_mock.__name__ == "SourceDataOpportunityEvents"
+        assert source_table_mock.from_dicts([{"tags": ["a"]}]).as_sql_input(compact=True) == (
+            "sql_mock__source_data__opportunity_events AS ("
+            'SELECT cast(NULL AS String) AS opportunity_id, cast(["a"] AS Array(String)) AS tags)'
+        )
+        assert list(seed_table_mock.from_dicts([])._sql_mock_data.columns) == ["code", "name"]
+        assert seed_table_mock._sql_mock_meta.table_ref == '"sql_mock_db"."country_codes"'
+
+    @pytest.mark.parametrize(
+        "dialect, column_mock_class",
+        [("bigquery", BigQueryColumnMock), ("clickhouse", ClickhouseColumnMock), (None, BaseColumnMock)],
+    )
+    def test_default_column_mock_class(self, dialect, column_mock_class, project_file):
+        """...then the columns should use the column mock class of the table mock's dialect"""
+
+        class DialectTableMock(BaseTableMock):
+            _sql_dialect = dialect
+
+        factory = DbtTableMockFactory(DialectTableMock, project_path=project_file)
+
+        seed_table_mock = factory.seed("country_codes")
+
+        assert type(seed_table_mock.code) is column_mock_class
+
+    def test_bigquery_escaping(self, project_file):
+        """...then generated BigQuery columns should escape quotes with a backslash"""
+
+        class BigQueryTestTableMock(BaseTableMock):
+            _sql_dialect = "bigquery"
+
+        factory = DbtTableMockFactory(BigQueryTestTableMock, project_path=project_file)
+
+        seed_table_mock = factory.seed("country_codes")
+
+        assert seed_table_mock.code.to_sql("code", value="it's") == "cast('it\\'s' AS String) AS code"
+
+    def test_node_not_in_catalog(self, project_file):
+        """...then a ValueError should be raised"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=project_file)
+
+        with pytest.raises(ValueError, match="'model.sql_mock.my_second_dbt_model' not found in dbt catalog"):
+            factory.model("my_second_dbt_model")
+
+    def test_column_conflicts_with_table_mock_attribute(self, project_file):
+        """...then a ValueError should be raised"""
+
+        class TableMockWithAttribute(BaseTableMock):
+            code = "some attribute"
+
+        factory = DbtTableMockFactory(TableMockWithAttribute, project_path=project_file)
+
+        with pytest.raises(ValueError, match=r"conflict with attributes of TableMockWithAttribute: \['code'\]"):
+            factory.seed("country_codes")
+
+
+def _create_dbt_pipeline_project(tmp_path) -> str:
+    """
+    Create a dbt project with the pipelines events (source) -> stg_events -> user_totals
+                                                                           -> user_counts
+                                            events (source) -> positive_events (ephemeral) -> user_max
+                                            events_snapshot (snapshot) -> snapshot_counts
+    """
+    models = {
+        "stg_events": ("SELECT user_id, amount FROM raw.events", ["source.p.raw.events"]),
+        "user_totals": (
+            "SELECT user_id, sum(amount) AS total FROM db.stg_events GROUP BY user_id",
+            ["model.p.stg_events"],
+        ),
+        "user_counts": ("SELECT user_id, count(*) AS cnt FROM db.stg_events GROUP BY user_id", ["model.p.stg_events"]),
+        "positive_events": ("SELECT user_id, amount FROM raw.events WHERE amount > 0", ["source.p.raw.events"]),
+        "user_max": (
+            "WITH __dbt__cte__positive_events AS (SELECT user_id, amount FROM raw.events WHERE amount > 0) "
+            "SELECT user_id, max(amount) AS max_amount FROM __dbt__cte__positive_events GROUP BY user_id",
+            ["model.p.positive_events"],
+        ),
+        "snapshot_counts": (
+            "SELECT user_id, count(*) AS cnt FROM snapshots.events_snapshot GROUP BY user_id",
+            ["snapshot.p.events_snapshot"],
+        ),
+    }
+    nodes = {}
+    for name, (query, upstream_nodes) in models.items():
+        (tmp_path / f"{name}.sql").write_text(query)
+        nodes[f"model.p.{name}"] = {
+            "unique_id": f"model.p.{name}",
+            "resource_type": "model",
+            "name": name,
+            "compiled_path": f"{name}.sql",
+            "relation_name": f"db.{name}",
+            "depends_on": {"macros": [], "nodes": upstream_nodes},
+        }
+    # Ephemeral models have no relation
+    nodes["model.p.positive_events"]["relation_name"] = None
+    nodes["snapshot.p.events_snapshot"] = {
+        "unique_id": "snapshot.p.events_snapshot",
+        "resource_type": "snapshot",
+        "name": "events_snapshot",
+        "relation_name": "snapshots.events_snapshot",
+        "depends_on": {"macros": [], "nodes": ["source.p.raw.events"]},
+    }
+    source = {
+        "unique_id": "source.p.raw.events",
+        "resource_type": "source",
+        "name": "events",
+        "source_name": "raw",
+        "identifier": "events",
+        "relation_name": "raw.events",
+    }
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target" / "manifest.json").write_text(
+        json.dumps({"nodes": nodes, "sources": {source["unique_id"]: source}})
+    )
+
+    columns = {
+        "source.p.raw.events": ["user_id", "amount"],
+        "model.p.stg_events": ["user_id", "amount"],
+        "model.p.user_totals": ["user_id", "total"],
+        "model.p.user_counts": ["user_id", "cnt"],
+        "model.p.user_max": ["user_id", "max_amount"],
+        "model.p.snapshot_counts": ["user_id", "cnt"],
+        "snapshot.p.events_snapshot": ["user_id", "amount"],
+    }
+    catalog = {
+        "nodes": {
+            unique_id: {
+                "columns": {
+                    column_name: {"type": "Int64", "index": index + 1, "name": column_name}
+                    for index, column_name in enumerate(column_names)
+                }
+            }
+            for unique_id, column_names in columns.items()
+        },
+        "sources": {},
+    }
+    (tmp_path / "target" / "catalog.json").write_text(json.dumps(catalog))
+
+    project_file = tmp_path / "dbt_project.yml"
+    project_file.write_text("name: p\n")
+    return str(project_file)
+
+
+class TestRunModel:
+    def test_upstream_model_executed_once(self, mocker, tmp_path):
+        """...then shared upstream models should only be executed once for the same input data"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        events = factory.source("raw", "events").from_dicts([{"user_id": 1, "amount": 2}])
+        mocked_get_results = mocker.patch.object(
+            ClickHouseTestTableMock, "_get_results", return_value=[{"user_id": 1, "amount": 2}]
+        )
+
+        user_totals = factory.run_model("user_totals", input_data=[events])
+        user_counts = factory.run_model("user_counts", input_data=[events])
+
+        mocked_get_results.assert_called_once()
+        assert "sql_mock__raw__events AS (SELECT cast('2' AS Int64) AS amount" in mocked_get_results.call_args.args[0]
+        for table_mock, model_name in [(user_totals, "user_totals"), (user_counts, "user_counts")]:
+            assert isinstance(table_mock, factory.model(model_name))
+            query = table_mock._generate_query()
+            assert "raw.events" not in query
+            assert "sql_mock__db__stg_events AS (SELECT" in query
+            assert "cast('1' AS Int64) AS user_id" in query
+
+    def test_upstream_model_executed_for_other_input_data(self, mocker, tmp_path):
+        """...then upstream models should be executed again if the input data differs"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        events_table_mock = factory.source("raw", "events")
+        mocked_get_results = mocker.patch.object(ClickHouseTestTableMock, "_get_results", return_value=[])
+
+        factory.run_model("user_totals", input_data=[events_table_mock.from_dicts([{"user_id": 1}])])
+        factory.run_model("user_totals", input_data=[events_table_mock.from_dicts([{"user_id": 2}])])
+
+        assert mocked_get_results.call_count == 2
+
+    def test_upstream_model_provided(self, mocker, tmp_path):
+        """...then provided upstream models should be used instead of executing them"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        stg_events = factory.model("stg_events").from_dicts([{"user_id": 1, "amount": 3}])
+        mocked_get_results = mocker.patch.object(ClickHouseTestTableMock, "_get_results")
+
+        user_totals = factory.run_model("user_totals", input_data=[stg_events])
+
+        mocked_get_results.assert_not_called()
+        assert "cast('3' AS Int64) AS amount" in user_totals._generate_query()
+
+    def test_ephemeral_upstream_model(self, mocker, tmp_path):
+        """...then ephemeral models should not be executed and their upstream nodes be inputs of the model"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        events = factory.source("raw", "events").from_dicts([{"user_id": 1, "amount": 2}])
+        mocked_get_results = mocker.patch.object(ClickHouseTestTableMock, "_get_results")
+
+        user_max = factory.run_model("user_max", input_data=[events])
+
+        mocked_get_results.assert_not_called()
+        assert user_max._sql_mock_meta.table_ref == "db.user_max"
+        assert "sql_mock__raw__events AS (SELECT cast('2' AS Int64) AS amount" in user_max._generate_query()
+
+    def test_snapshot_input(self, mocker, tmp_path):
+        """...then snapshots should be resolved from the provided input mocks"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        events_snapshot = factory.snapshot("events_snapshot").from_dicts([{"user_id": 1, "amount": 2}])
+
+        snapshot_counts = factory.run_model("snapshot_counts", input_data=[events_snapshot])
+
+        assert events_snapshot._sql_mock_meta.table_ref == "snapshots.events_snapshot"
+        assert "sql_mock__snapshots__events_snapshot AS (SELECT" in snapshot_counts._generate_query()
+
+    def test_unused_input_mock(self, tmp_path):
+        """...then a ValidationError should be raised for input mocks that the model doesn't use"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+        stg_events = factory.model("stg_events").from_dicts([{"user_id": 1, "amount": 3}])
+        events = factory.source("raw", "events").from_dicts([{"user_id": 1, "amount": 2}])
+
+        with pytest.raises(ValidationError, match=r"\['raw.events'\]"):
+            factory.run_model("user_totals", input_data=[stg_events, events])
+
+    def test_leaf_table_missing(self, tmp_path):
+        """...then a ValidationError should be raised if a source of an upstream model is not provided"""
+        factory = DbtTableMockFactory(ClickHouseTestTableMock, project_path=_create_dbt_pipeline_project(tmp_path))
+
+        with pytest.raises(ValidationError, match=r"\['raw.events'\]"):
+            factory.run_model("user_totals")
+
+
+class TestGetNodeFingerprint:
+    def test_upstream_model_changed(self, tmp_path):
+        """...then the fingerprints of the model and its downstream models should change"""
+        project_file = _create_dbt_pipeline_project(tmp_path)
+        fingerprints = {
+            name: get_node_fingerprint(project_file, ("model", name)) for name in ["stg_events", "user_totals"]
+        }
+        source_fingerprint = get_node_fingerprint(project_file, ("source", "raw", "events"))
+
+        compiled_path = tmp_path / "stg_events.sql"
+        compiled_path.write_text("SELECT user_id, amount FROM raw.events WHERE amount > 0")
+
+        for name, fingerprint in fingerprints.items():
+            assert get_node_fingerprint(project_file, ("model", name)) != fingerprint
+        assert get_node_fingerprint(project_file, ("source", "raw", "events")) == source_fingerprint
+
+    def test_node_not_in_manifest(self, tmp_path):
+        """...then the fingerprint should be None"""
+        project_file = _create_dbt_pipeline_project(tmp_path)
+
+        assert get_node_fingerprint(project_file, ("seed", "unknown")) is None
+
+
+class TestRecordUsedNodes:
+    def test_used_nodes_recorded(self, project_file):
+        """...then the dbt nodes of table mocks that are used within the context should be recorded"""
+
+        @dbt_seed_meta(seed_name="country_codes", project_path=project_file)
+        class CountryCodesTable(ClickHouseTestTableMock):
+            pass
+
+        with record_used_nodes() as used_nodes:
+            assert CountryCodesTable._sql_mock_meta.table_ref
+
+        assert used_nodes == {(project_file, ("seed", "country_codes"))}
+
+
+class TestParseQueryCached:
+    QUERY = "WITH a AS (SELECT id FROM db.foo) SELECT id FROM a"
+
+    def test_stored_ast_loaded(self, mocker, tmp_path):
+        """...then the query should only be parsed once and loaded from the cache afterwards"""
+        cache_dir = tmp_path / "ast_cache"
+        query_ast = parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(cache_dir))
+        assert len(list(cache_dir.iterdir())) == 1
+        spy_parse_one = mocker.spy(sql_mock.dbt.sqlglot, "parse_one")
+
+        cached_query_ast = parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(cache_dir))
+
+        spy_parse_one.assert_not_called()
+        assert cached_query_ast == query_ast
+        assert cached_query_ast.sql(dialect="clickhouse") == query_ast.sql(dialect="clickhouse")
+
+    def test_other_dialect_or_sqlglot_version(self, mocker, tmp_path):
+        """...then the query should be parsed again"""
+        parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path))
+        spy_parse_one = mocker.spy(sql_mock.dbt.sqlglot, "parse_one")
+
+        parse_query_cached(self.QUERY, dialect="bigquery", cache_dir=str(tmp_path))
+        mocker.patch.object(sql_mock.dbt.sqlglot, "__version__", "0.0.0")
+        parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path))
+
+        assert spy_parse_one.call_count == 2
+
+    def test_invalid_cache_file(self, tmp_path):
+        """...then the query should be parsed again and the cache file replaced"""
+        query_ast = parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path))
+        (cache_file,) = (tmp_path / sql_mock.dbt.sqlglot.__version__).iterdir()
+        cache_file.write_text("{invalid")
+
+        assert parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path)) == query_ast
+        assert json.loads(cache_file.read_text())
+
+    def test_other_sqlglot_versions_removed(self, mocker, tmp_path):
+        """...then the ASTs stored by other sqlglot versions should be removed"""
+        mocker.patch.object(sql_mock.dbt.sqlglot, "__version__", "0.0.0")
+        parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path))
+        mocker.patch.object(sql_mock.dbt.sqlglot, "__version__", "0.0.1")
+
+        parse_query_cached(self.QUERY, dialect="clickhouse", cache_dir=str(tmp_path))
+
+        assert [path.name for path in tmp_path.iterdir()] == ["0.0.1"]
+
+    def test_least_recently_used_evicted(self, mocker, tmp_path):
+        """...then the least recently used ASTs should be removed once the cache is full"""
+        mocker.patch.object(sql_mock.dbt, "AST_CACHE_MAX_ENTRIES", 2)
+        queries = ["SELECT 1", "SELECT 2", "SELECT 3"]
+        for modification_time, query in enumerate(queries[:2]):
+            parse_query_cached(query, dialect="clickhouse", cache_dir=str(tmp_path))
+            cache_path = sql_mock.dbt._get_ast_cache_path(str(tmp_path), query, "clickhouse")
+            os.utime(cache_path, (modification_time, modification_time))
+        # Loading the first AST marks it as recently used
+        parse_query_cached(queries[0], dialect="clickhouse", cache_dir=str(tmp_path))
+
+        parse_query_cached(queries[2], dialect="clickhouse", cache_dir=str(tmp_path))
+
+        assert [
+            os.path.exists(sql_mock.dbt._get_ast_cache_path(str(tmp_path), query, "clickhouse")) for query in queries
+        ] == [True, False, True]
+
+    def test_dbt_model_uses_cache(self, tmp_path):
+        """...then the query of dbt models should be cached in the target directory"""
+        project_file = _copy_dbt_project(tmp_path)
+
+        @dbt_model_meta(model_name="my_first_dbt_model", project_path=project_file)
+        class MyFirstDbtModel(ClickHouseTestTableMock):
+            id = IntTestColumn(default=1)
+
+        MyFirstDbtModel.from_mocks(input_data=[])
+
+        cache_dir = tmp_path / "dbt" / "dbt_target" / AST_CACHE_DIR_NAME
+        assert len(list((cache_dir / sql_mock.dbt.sqlglot.__version__).iterdir())) == 1
@@ -1,15 +1,28 @@
 # Test validate input mocks function
+import time
+
 import pytest
 import sqlglot
+from sqlglot.optimizer.eliminate_ctes import eliminate_ctes
 
+import sql_mock.helpers
 from sql_mock.column_mocks import BaseColumnMock
 from sql_mock.exceptions import ValidationError
 from sql_mock.helpers import (
+    ROOT_NODE,
+    QueryDependencyIndex,
+    _replace_table_ref_in_columns,
     _validate_input_mocks_have_table_ref,
     _validate_unique_input_mocks,
+    all_values_equal,
+    get_cte_evaluation_counts,
+    get_referenced_columns,
     get_source_tables,
+    remove_cte_from_query,
     replace_original_table_references,
     select_from_cte,
+    take_rows_until_mismatch,
+    truncate_query,
     validate_all_input_mocks_for_query_provided,
     validate_input_mocks,
 )
@@ -99,6 +112,54 @@ class TestReplaceOriginalTableReference:
             dialect="bigquery",
         ).sql(pretty=True)
 
+    def test_replace_original_table_reference_when_used_in_col_ref_with_quoted_full_table_name(self):
+        """...then columns qualified with the quoted full table name should also be replaced"""
+        query = "SELECT `proj.ds.tbl`.col1 FROM `proj.ds.tbl`"
+
+        res = replace_original_table_references(
+            query_ast=sqlglot.parse_one(query, dialect="bigquery"),
+            table_ref="proj.ds.tbl",
+            sql_mock_cte_name="sql_mock__proj_ds_tbl",
+            dialect="bigquery",
+        ).sql(dialect="bigquery")
+
+        assert res == "SELECT sql_mock__proj_ds_tbl.col1 FROM sql_mock__proj_ds_tbl /* proj.ds.tbl */"
+
+    def test_replace_table_ref_in_columns_of_wide_query(self, mocker):
+        """...then all column references should be replaced without parsing the table of each column (micro-benchmark)"""
+        n_columns = 2000
+        table_ref = MockTestTable._sql_mock_meta.table_ref
+        cte_name = MockTestTable._sql_mock_meta.cte_name
+        columns = ", ".join(f"{table_ref}.col_{i} AS a_{i}, other.col_{i} AS b_{i}" for i in range(n_columns))
+        query_ast = sqlglot.parse_one(
+            f"SELECT {columns} FROM {table_ref} JOIN data.other AS other ON {table_ref}.id = other.id",
+            dialect="bigquery",
+        )
+        spied_to_table = mocker.spy(sql_mock.helpers, "to_table")
+
+        start = time.perf_counter()
+        res = _replace_table_ref_in_columns(
+            query_ast=query_ast, table_ref=table_ref, new_ref=cte_name, dialect="bigquery"
+        )
+        duration = time.perf_counter() - start
+
+        replaced_columns = [col for col in res.find_all(sqlglot.exp.Column) if col.table == cte_name]
+        # All columns of the select list plus the join condition
+        assert len(replaced_columns) == n_columns + 1
+        spied_to_table.assert_called_once()
+        # Generous upper bound that only catches regressions to per-column parsing
+        assert duration < 5
+
+
+class TestRemoveCteFromQuery:
+    def test_remove_last_cte(self):
+        """...then the empty WITH clause should be removed as well"""
+        query_ast = sqlglot.parse_one("WITH cte_1 AS (SELECT * FROM some_table) SELECT * FROM cte_1")
+
+        res = remove_cte_from_query(query_ast, "cte_1")
+
+        assert res.sql() == "SELECT * FROM cte_1"
+
 
 class TestSelectFromCTE:
     def test_select_from_cte_when_cte_exists(self):
@@ -272,6 +333,17 @@ class TestValidateAllInputMocksForQueryProvided:
 
         validate_all_input_mocks_for_query_provided(query=query, input_mocks=[Cte1Mock()], dialect="bigquery")
 
+    def test_parsed_query_provided(self):
+        """...then the validation should work on the AST without modifying it"""
+        query_ast = sqlglot.parse_one(self.query, dialect="bigquery")
+        original_ast = query_ast.copy()
+
+        validate_all_input_mocks_for_query_provided(
+            query=query_ast, input_mocks=[self.BarMock, self.FooMock], dialect="bigquery"
+        )
+
+        assert query_ast == original_ast
+
 
 class TestGetSourceTables:
     def test_query_with_ctes(self):
@@ -345,3 +417,245 @@ class TestGetSourceTables:
 
         expected = []
         assert res == expected
+
+
+class TestQueryDependencyIndex:
+    query = """
+    WITH cte_1 AS (
+        SELECT * FROM table_1
+    ),
+
+    cte_2 AS (
+        SELECT * FROM cte_1 JOIN table_2 ON cte_1.id = table_2.id
+    ),
+
+    unused AS (
+        SELECT * FROM table_3
+    )
+
+    SELECT * FROM cte_2, (SELECT * FROM table_4) AS sub
+    """
+
+    def test_index(self):
+        """...then direct and transitive dependencies should be extracted per CTE"""
+        index = QueryDependencyIndex.from_query(self.query, dialect="bigquery")
+
+        assert index.indexed
+        assert index.ctes == {"cte_1", "cte_2", "unused"}
+        assert index.sources == {
+            ROOT_NODE: {"table_4"},
+            "cte_1": {"table_1"},
+            "cte_2": {"table_2"},
+            "unused": {"table_3"},
+        }
+        assert index.cte_references[ROOT_NODE] == {"cte_2": "cte_2"}
+        assert index.transitive_sources[ROOT_NODE] == {"table_1", "table_2", "table_4"}
+
+    @pytest.mark.parametrize(
+        "provided_table_refs,expected",
+        [
+            (frozenset(), {"table_1", "table_2", "table_4"}),
+            (frozenset(["cte_1"]), {"cte_1", "table_2", "table_4"}),
+            (frozenset(["cte_2", "table_4"]), {"cte_2", "table_4"}),
+            (frozenset(["unused"]), {"table_1", "table_2", "table_4"}),
+        ],
+    )
+    def test_get_required_sources(self, provided_table_refs, expected):
+        """...then mocked CTEs should be required instead of their upstream tables"""
+        index = QueryDependencyIndex.from_query(self.query, dialect="bigquery")
+        assert index.get_required_sources(provided_table_refs) == expected
+
+    @pytest.mark.parametrize("provided_table_refs", [frozenset(), frozenset(["cte_1"]), frozenset(["cte_2"])])
+    def test_same_result_as_ast_analysis(self, provided_table_refs):
+        """...then the index should yield the same sources as analyzing the pruned AST"""
+        ast = sqlglot.parse_one(self.query, dialect="bigquery")
+        for table_ref in provided_table_refs:
+            ast = remove_cte_from_query(ast, table_ref)
+        expected = set(get_source_tables(eliminate_ctes(ast), dialect="bigquery"))
+
+        index = QueryDependencyIndex.from_query(self.query, dialect="bigquery")
+
+        assert index.get_required_sources(provided_table_refs) == expected
+
+    def test_required_sources_are_memoized(self, mocker):
+        """...then the required sources should only be computed once per set of table refs"""
+        index = QueryDependencyIndex.from_query(self.query, dialect="bigquery")
+        spy = mocker.spy(index, "_compute_required_sources")
+
+        index.get_required_sources(frozenset(["cte_1"]))
+        index.get_required_sources(frozenset(["cte_1"]))
+
+        spy.assert_called_once_with(frozenset(["cte_1"]))
+
+    def test_recursive_cte(self):
+        """...then the self reference of the recursive CTE should not be followed"""
+        query = "WITH RECURSIVE a AS (SELECT 1 AS x FROM table_1 UNION ALL SELECT x + 1 FROM a WHERE x < 3) SELECT * FROM a"
+
+        index = QueryDependencyIndex.from_query(query, dialect="bigquery")
+
+        assert index.indexed
+        assert index.cte_references["a"] == {"a": "a"}
+        assert index.transitive_sources[ROOT_NODE] == {"table_1"}
+        assert index.get_required_sources(frozenset()) == {"table_1"}
+        assert index.get_required_sources(frozenset(["a"])) == {"a"}
+
+    def test_duplicated_cte_names(self):
+        """...then the index should fall back to analyzing the AST"""
+        query = """
+        WITH cte_1 AS (SELECT * FROM table_1)
+        SELECT * FROM cte_1, (WITH cte_1 AS (SELECT * FROM table_2) SELECT * FROM cte_1) AS sub
+        """
+        index = QueryDependencyIndex.from_query(query, dialect="bigquery")
+
+        assert not index.indexed
+        assert index.get_required_sources(frozenset()) == {"table_1", "table_2"}
+        assert index.get_required_sources(frozenset(["cte_1"])) == {"cte_1"}
+
+
+class TestGetReferencedColumns:
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            # Qualified columns are attributed to their table, unqualified columns to all tables
+            (
+                "SELECT a.col1, b.col2, col3 FROM data.a AS a JOIN data.b AS b ON a.id = b.id",
+                {"data.a": {"col1", "id", "col3"}, "data.b": {"col2", "id", "col3"}},
+            ),
+            # Correlated subqueries reference the columns of the outer table
+            (
+                "SELECT a.col1 FROM data.a AS a WHERE EXISTS (SELECT 1 FROM data.b AS b WHERE b.id = a.b_id)",
+                {"data.a": {"col1", "b_id"}, "data.b": {"id"}},
+            ),
+            # Columns of derived tables are not attributed to the underlying table
+            (
+                "SELECT sub.x FROM (SELECT a.col1 AS x FROM data.a AS a) AS sub JOIN data.b AS b USING (id)",
+                {"data.a": {"col1", "id"}, "data.b": {"id"}},
+            ),
+            # Struct field access can't be resolved to a table so all parts are considered
+            ("SELECT s.field FROM data.a", {"data.a": {"s", "field"}, "data.b": {"s", "field"}}),
+            ("SELECT COUNT(*) FROM data.a", {"data.a": set(), "data.b": set()}),
+        ],
+    )
+    def test_referenced_columns(self, query, expected):
+        """...then the referenced columns should be extracted per table"""
+        res = get_referenced_columns(sqlglot.parse_one(query, dialect="bigquery"), table_refs=["data.a", "data.b"])
+        assert res == expected
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("SELECT id, x FROM data.a ARRAY JOIN arr AS x", {"id", "x", "arr"}),
+            ("SELECT id, x, y FROM data.a ARRAY JOIN arr_1 AS x, arr_2 AS y", {"id", "x", "y", "arr_1", "arr_2"}),
+        ],
+    )
+    def test_array_join_columns(self, query, expected):
+        """...then the arrays of ARRAY JOINs should be referenced columns even though sqlglot parses them as tables"""
+        res = get_referenced_columns(sqlglot.parse_one(query, dialect="clickhouse"), table_refs=["data.a"])
+        assert res == {"data.a": expected}
+
+    @pytest.mark.parametrize(
+        "query,all_columns_needed",
+        [
+            ("SELECT * FROM data.a JOIN data.b ON a.id = b.id", ["data.a", "data.b"]),
+            ("SELECT a.*, b.col1 FROM data.a AS a JOIN data.b AS b ON a.id = b.id", ["data.a"]),
+            ("WITH cte AS (SELECT * FROM data.a) SELECT cte.col1 FROM cte", ["data.a"]),
+            ("SELECT TO_JSON_STRING(a) FROM data.a AS a", ["data.a"]),
+            ("SELECT * FROM data.a NATURAL JOIN data.b", ["data.a", "data.b"]),
+        ],
+    )
+    def test_all_columns_needed(self, query, all_columns_needed):
+        """...then None should be returned for the tables whose columns are all needed"""
+        res = get_referenced_columns(sqlglot.parse_one(query, dialect="bigquery"), table_refs=["data.a", "data.b"])
+        assert [table_ref for table_ref, columns in res.items() if columns is None] == all_columns_needed
+
+
+class TestGetCteEvaluationCounts:
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("WITH a AS (SELECT 1 AS x) SELECT * FROM a", {"a": 1}),
+            # Self joins and subqueries reference the CTE multiple times
+            ("WITH a AS (SELECT 1 AS x) SELECT * FROM a JOIN a AS a2 ON a.x = a2.x", {"a": 2}),
+            ("WITH a AS (SELECT 1 AS x) SELECT * FROM a WHERE x IN (SELECT x FROM a)", {"a": 2}),
+            # References from CTEs that are evaluated multiple times are multiplied
+            (
+                "WITH a AS (SELECT 1 AS x), b AS (SELECT * FROM a UNION ALL SELECT * FROM a) "
+                "SELECT * FROM b JOIN b AS b2 ON TRUE",
+                {"a": 4, "b": 2},
+            ),
+            ("WITH a AS (SELECT 1 AS x), b AS (SELECT * FROM a) SELECT 1", {"a": 0, "b": 0}),
+            # Recursive references are not followed
+            (
+                "WITH RECURSIVE a AS (SELECT 1 AS x UNION ALL SELECT x + 1 FROM a WHERE x < 3) SELECT * FROM a",
+                {"a": 1},
+            ),
+            # Queries with duplicate CTE names are not analyzed
+            ("WITH a AS (SELECT 1 AS x) SELECT * FROM (WITH a AS (SELECT 2 AS x) SELECT * FROM a)", {}),
+        ],
+    )
+    def test_cte_evaluation_counts(self, query, expected):
+        assert get_cte_evaluation_counts(sqlglot.parse_one(query, dialect="snowflake")) == expected
+
+
+class TestAllValuesEqual:
+    @pytest.mark.parametrize(
+        "values,expected",
+        [
+            ([1, 1, 1], True),
+            ([1, 2, 1], False),
+            # Values of different types are rendered differently
+            ([1, True], False),
+            ([[1], [1]], True),
+            ([], True),
+        ],
+    )
+    def test_all_values_equal(self, values, expected):
+        assert all_values_equal(values) == expected
+
+
+class TestTakeRowsUntilMismatch:
+    def test_all_rows_match(self):
+        """...then all rows should be consumed"""
+        rows = [{"a": 1}, {"a": 2}]
+
+        consumed, stopped_early = take_rows_until_mismatch(rows=iter(rows), expected=rows)
+
+        assert consumed == rows
+        assert not stopped_early
+
+    def test_mismatch(self):
+        """...then consumption should stop at the first mismatching row"""
+        rows = iter([{"a": 1}, {"a": 3}, {"a": 4}])
+
+        consumed, stopped_early = take_rows_until_mismatch(rows=rows, expected=[{"a": 1}, {"a": 2}, {"a": 4}])
+
+        assert consumed == [{"a": 1}, {"a": 3}]
+        assert stopped_early
+        assert next(rows) == {"a": 4}
+
+    def test_keys_to_keep(self):
+        """...then only the provided keys should be compared"""
+        rows = [{"a": 1, "b": 1}, {"a": 2, "b": 2}]
+
+        consumed, stopped_early = take_rows_until_mismatch(
+            rows=rows, expected=[{"a": 1}, {"a": 2}], keys_to_keep={"a"}
+        )
+
+        assert consumed == [{"a": 1}, {"a": 2}]
+        assert not stopped_early
+
+
+class TestTruncateQuery:
+    def test_short_query(self):
+        """...then the query should not be changed"""
+        assert truncate_query("SELECT 1", max_length=100) == "SELECT 1"
+
+    def test_no_max_length(self):
+        """...then the query should not be changed"""
+        assert truncate_query("SELECT 1", max_length=None) == "SELECT 1"
+
+    def test_long_query(self):
+        """...then the query should be truncated with a hint"""
+        truncated = truncate_query("SELECT 1", max_length=6)
+
+        assert truncated.startswith("SELECT\n... (2 more characters truncated")
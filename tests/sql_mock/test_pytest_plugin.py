@@ -0,0 +1,276 @@
+import os
+import shutil
+from pathlib import Path
+
+pytest_plugins = ["pytester"]
+
+DBT_PROJECT_DIR = Path(__file__).parents[1] / "resources" / "dbt"
+
+TEST_MODULE = """
+from sql_mock.dbt import dbt_model_meta
+from sql_mock.table_mocks import BaseTableMock
+
+
+@dbt_model_meta(model_name="my_first_dbt_model", project_path="dbt/dbt_project.yml")
+class MyFirstDbtModel(BaseTableMock):
+    _sql_dialect = "clickhouse"
+
+
+def test_with_dbt_model():
+    assert MyFirstDbtModel._sql_mock_meta.table_ref
+
+
+def test_without_dbt_model():
+    pass
+"""
+
+
+MOCKS_MODULE = """
+from sql_mock.dbt import dbt_model_meta
+from sql_mock.table_mocks import BaseTableMock
+
+
+@dbt_model_meta(model_name="my_first_dbt_model", project_path="dbt/dbt_project.yml")
+class MyFirstDbtModel(BaseTableMock):
+    _sql_dialect = "clickhouse"
+"""
+
+TEST_MODULE_WITH_MOCKS_MODULE = """
+from mocks import MyFirstDbtModel
+
+
+def test_with_dbt_model():
+    assert MyFirstDbtModel.from_dicts([])._sql_mock_meta.table_ref
+"""
+
+
+def _touch(path: Path, text: str):
+    path.write_text(text)
+    # Make sure that the modification time changes even on file systems with a coarse resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def _run(pytester):
+    return pytester.runpytest("-p", "sql_mock.pytest_plugin", "--sql-mock-impact")
+
+
+class TestImpactAnalysis:
+    def _setup(self, pytester):
+        shutil.copytree(DBT_PROJECT_DIR, pytester.path / "dbt")
+        pytester.makepyfile(test_impact=TEST_MODULE)
+        return pytester.path / "dbt" / "dbt_target" / "compiled_example_models" / "my_first_dbt_model.sql"
+
+    def test_unchanged_tests_skipped(self, pytester):
+        """...then tests with unchanged dbt nodes and test file should be skipped on the next run"""
+        self._setup(pytester)
+        _run(pytester).assert_outcomes(passed=2)
+
+        result = _run(pytester)
+
+        result.assert_outcomes(passed=1, skipped=1)
+        result.stdout.fnmatch_lines(["*skipped 1 tests with unchanged dbt nodes*"])
+
+    def test_model_changed(self, pytester):
+        """...then tests should run again if the compiled query of a used model changed"""
+        compiled_path = self._setup(pytester)
+        _run(pytester).assert_outcomes(passed=2)
+
+        _touch(compiled_path, compiled_path.read_text() + "\n-- changed\n")
+
+        _run(pytester).assert_outcomes(passed=2)
+
+    def test_conftest_changed(self, pytester):
+        """...then tests should run again if a conftest.py of the test changed"""
+        self._setup(pytester)
+        conftest_path = pytester.makeconftest("")
+        _run(pytester).assert_outcomes(passed=2)
+
+        _touch(conftest_path, "# changed\n")
+
+        _run(pytester).assert_outcomes(passed=2)
+
+    def test_table_mock_module_changed(self, pytester):
+        """...then tests should run again if the module of a used table mock class changed"""
+        self._setup(pytester)
+        pytester.makepyfile(test_impact=TEST_MODULE_WITH_MOCKS_MODULE)
+        mocks_path = pytester.makepyfile(mocks=MOCKS_MODULE)
+        _run(pytester).assert_outcomes(passed=1)
+        _run(pytester).assert_outcomes(skipped=1)
+
+        _touch(mocks_path, MOCKS_MODULE + "\n# changed\n")
+
+        _run(pytester).assert_outcomes(passed=1)
+
+    def test_sql_mock_version_changed(self, pytester, monkeypatch):
+        """...then tests should run again with another version of SQL Mock"""
+        self._setup(pytester)
+        _run(pytester).assert_outcomes(passed=2)
+
+        monkeypatch.setattr("sql_mock.__version__", "0.0.0")
+
+        _run(pytester).assert_outcomes(passed=2)
+
+    def test_failed_test_not_skipped(self, pytester):
+        """...then failing tests should always run again"""
+        self._setup(pytester)
+        pytester.makepyfile(
+            test_impact=TEST_MODULE.replace(
+                "assert MyFirstDbtModel._sql_mock_meta.table_ref", "assert not MyFirstDbtModel._sql_mock_meta"
+            )
+        )
+        _run(pytester).assert_outcomes(passed=1, failed=1)
+
+        _run(pytester).assert_outcomes(passed=1, failed=1)
+
+
+CONNECTION_CONFTEST = """
+import time
+
+from sql_mock.table_mocks import BaseTableMock
+
+
+class FakeConnection:
+    opened = 0
+    closed = 0
+
+    def __init__(self):
+        FakeConnection.opened += 1
+
+    def close(self):
+        FakeConnection.closed += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FakeTableMock(BaseTableMock):
+    def _connect(self):
+        return FakeConnection()
+
+    def _get_results(self, query):
+        with self._connection():
+            time.sleep(0.01)
+        return []
+
+
+def pytest_unconfigure(config):
+    with open("connections.txt", "w") as f:
+        f.write(f"{FakeConnection.opened} {FakeConnection.closed}")
+"""
+
+CONNECTION_TEST_MODULE = """
+from conftest import FakeTableMock
+
+
+def test_query_1():
+    FakeTableMock()._get_results("SELECT 1")
+
+
+def test_query_2():
+    FakeTableMock()._get_results("SELECT 2")
+
+
+def test_table_mock_fixture(clickhouse_table_mock):
+    assert clickhouse_table_mock.__name__ == "ClickHouseTableMock"
+"""
+
+
+class TestSharedConnections:
+    def _setup(self, pytester):
+        pytester.makeconftest(CONNECTION_CONFTEST)
+        pytester.makepyfile(test_connections=CONNECTION_TEST_MODULE)
+
+    def test_connection_shared_in_session(self, pytester):
+        """...then one connection should be opened for the session and closed at its end"""
+        self._setup(pytester)
+
+        result = pytester.runpytest("-p", "sql_mock.pytest_plugin", "--sql-mock-shared-connections")
+
+        result.assert_outcomes(passed=3)
+        assert (pytester.path / "connections.txt").read_text() == "1 1"
+        result.stdout.fnmatch_lines(
+            [
+                "*sql-mock warehouse time*",
+                "*s spent on database queries in 2 tests",
+                "*s test_connections.py::test_query_*",
+            ]
+        )
+
+    def test_connections_not_shared_by_default(self, pytester):
+        """...then every query should open its own connection"""
+        self._setup(pytester)
+
+        result = pytester.runpytest("-p", "sql_mock.pytest_plugin")
+
+        result.assert_outcomes(passed=3)
+        assert (pytester.path / "connections.txt").read_text() == "2 2"
+
+
+PHASE_CONFTEST = """
+from sql_mock.column_mocks import BaseColumnMock
+from sql_mock.table_mocks import BaseTableMock, table_meta
+
+
+class IntTestColumn(BaseColumnMock):
+    dtype = "Integer"
+
+
+@table_meta(table_ref="input_table")
+class InputTable(BaseTableMock):
+    id = IntTestColumn(default=1)
+
+
+@table_meta(table_ref="result_table", query="SELECT id FROM input_table")
+class ResultTable(BaseTableMock):
+    id = IntTestColumn(default=1)
+
+    def _get_results(self, query):
+        return [{"id": 1}]
+
+
+def pytest_sql_mock_phase_summary(summary, config):
+    with open("summary.txt", "w") as f:
+        f.write(" ".join(model_name for model_name, _ in summary.models))
+"""
+
+PHASE_TEST_MODULE = """
+from conftest import InputTable, ResultTable
+
+
+def test_result_table():
+    ResultTable.from_mocks(input_data=[InputTable()]).assert_equal([{"id": 1}])
+"""
+
+
+class TestPhaseTimeReport:
+    def test_phase_summary(self, pytester):
+        """...then the slowest phases and models should be passed to the hook and listed in the terminal summary"""
+        pytester.makeconftest(PHASE_CONFTEST)
+        pytester.makepyfile(test_phases=PHASE_TEST_MODULE)
+
+        result = pytester.runpytest("-p", "sql_mock.pytest_plugin")
+
+        result.assert_outcomes(passed=1)
+        assert (pytester.path / "summary.txt").read_text() == "ResultTable"
+        result.stdout.fnmatch_lines(
+            [
+                "*sql-mock phase time*",
+                "Slowest phases:",
+                "  *s comparison",
+                "Slowest models:",
+                "  *s ResultTable (*execution *s*)",
+            ]
+        )
+
+    def test_no_table_mocks(self, pytester):
+        """...then there should be no summary if no table mock was used"""
+        pytester.makepyfile(test_phases="def test_nothing():\n    pass\n")
+
+        result = pytester.runpytest("-p", "sql_mock.pytest_plugin")
+
+        result.assert_outcomes(passed=1)
+        result.stdout.no_fnmatch_line("*sql-mock phase time*")
@@ -0,0 +1,74 @@
+from sql_mock.result_diff import get_result_diff
+
+alice = {"name": "Alice", "age": 25}
+bob = {"name": "Bob", "age": 30}
+charlie = {"name": "Charlie", "age": 35}
+
+
+class TestGetResultDiff:
+    def test_equal_data(self):
+        """...then the diff should be empty"""
+        diff = get_result_diff(data=[bob, alice], expected=[alice, bob], ignore_order=True, max_examples=10)
+
+        assert not diff
+
+    def test_missing_and_extra_rows(self):
+        """...then the rows should be counted and mismatching columns of paired rows summarized"""
+        diff = get_result_diff(
+            data=[alice, {**bob, "age": 31}, charlie],
+            expected=[alice, bob, charlie, charlie],
+            ignore_order=True,
+            max_examples=10,
+        )
+
+        assert diff
+        assert diff.expected_row_count == 4
+        assert diff.actual_row_count == 3
+        assert diff.missing_row_count == 2
+        assert diff.missing_rows == [bob, charlie]
+        assert diff.extra_row_count == 1
+        assert diff.extra_rows == [{**bob, "age": 31}]
+        assert diff.column_mismatches == {"age": 1}
+
+    def test_examples_are_bounded(self):
+        """...then only the first examples should be kept but all rows be counted"""
+        expected = [{"id": i} for i in range(1000)]
+
+        diff = get_result_diff(data=[], expected=expected, ignore_order=True, max_examples=3)
+
+        assert diff.missing_row_count == 1000
+        assert diff.missing_rows == expected[:3]
+        assert "... and 997 more" in str(diff)
+
+    def test_ordered_wrong_order(self):
+        """...then the mismatching positions should be reported"""
+        diff = get_result_diff(data=[bob, alice], expected=[alice, bob], ignore_order=False, max_examples=10)
+
+        assert diff
+        assert diff.missing_row_count == 0
+        assert diff.extra_row_count == 0
+        assert diff.misplaced_row_count == 2
+        assert diff.misplaced_rows == [(0, alice, bob), (1, bob, alice)]
+        assert diff.column_mismatches == {"name": 2, "age": 2}
+
+    def test_partial_rows(self):
+        """...then the provided row counts and positions in the results should be reported"""
+        diff = get_result_diff(
+            data=[bob],
+            expected=[alice],
+            ignore_order=False,
+            max_examples=10,
+            expected_row_count=100,
+            actual_row_count=101,
+            positions=[42],
+        )
+
+        assert diff.expected_row_count == 100
+        assert diff.actual_row_count == 101
+        assert diff.misplaced_rows == [(42, alice, bob)]
+
+    def test_unhashable_values(self):
+        """...then the rows should still be compared"""
+        row = {"tags": ["a", "b"], "attributes": {"x": 1}}
+
+        assert not get_result_diff(data=[row], expected=[dict(row)], ignore_order=True, max_examples=10)
@@ -92,13 +92,57 @@ class TestFromMocks:
         mocked_validate_input_mocks_for_query.assert_called_once()
         mocked_validate_input_mocks.assert_called_once()
 
+    def test_from_mocks_parses_query_once(self, mocker):
+        """...then the cached dependency index should be validated and its AST without mocked CTEs stored"""
+        query = "WITH mock_test_table AS (SELECT * FROM some_table) SELECT * FROM mock_test_table"
+        mocked_validate_input_mocks_for_query = mocker.patch(
+            "sql_mock.table_mocks.validate_all_input_mocks_for_query_provided"
+        )
+
+        instance = MockTestTableWithDefaults.from_mocks(query=query, input_data=[MockTestTable()])
+        dependency_index = MockTestTableWithDefaults._sql_mock_meta.get_dependency_index(
+            query, dialect=MockTestTableWithDefaults._sql_dialect
+        )
+
+        assert instance._sql_mock_data.query_ast.sql() == "SELECT * FROM mock_test_table"
+        # The cached AST must not be modified
+        assert dependency_index.query_ast.sql() == query
+        assert mocked_validate_input_mocks_for_query.call_args.kwargs["dependency_index"] is dependency_index
+
+    def test_from_mocks_with_recursive_cte(self):
+        """...then the self reference of the recursive CTE should not be followed"""
+        query = (
+            "WITH RECURSIVE nums AS (SELECT col1 FROM mock_test_table UNION ALL SELECT col1 + 1 FROM nums "
+            "WHERE col1 < 3) SELECT col1 FROM nums"
+        )
+
+        instance = MockTestTableWithDefaults.from_mocks(query=query, input_data=[MockTestTable()])
+
+        assert "nums" in instance._generate_query()
+
+
+class TestGetDependencyIndex:
+    def test_index_is_cached(self):
+        """...then the index should only be computed once per query and dialect"""
+        meta = TableMockMeta()
+
+        index = meta.get_dependency_index("SELECT * FROM some_table", dialect="bigquery")
+
+        assert meta.get_dependency_index("SELECT * FROM some_table", dialect="bigquery") is index
+        assert meta.get_dependency_index("SELECT * FROM other_table", dialect="bigquery") is not index
 
-# Test the _generate_input_data_cte_snippet method
-def test_generate_input_data_cte_snippet(base_table_mock_instance):
-    base_table_mock_instance._sql_mock_data.input_data = [base_table_mock_instance]
-    snippet = base_table_mock_instance._generate_input_data_cte_snippet()
-    assert isinstance(snippet, str)
-    assert "base_table_mock AS (" in snippet
+    def test_cache_is_bounded(self, mocker):
+        """...then the index of the least recently used query should be evicted"""
+        mocker.patch("sql_mock.table_mocks.DEPENDENCY_INDEX_CACHE_SIZE", 2)
+        meta = TableMockMeta()
+
+        index_1 = meta.get_dependency_index("SELECT * FROM table_1", dialect="bigquery")
+        index_2 = meta.get_dependency_index("SELECT * FROM table_2", dialect="bigquery")
+        assert meta.get_dependency_index("SELECT * FROM table_1", dialect="bigquery") is index_1
+        meta.get_dependency_index("SELECT * FROM table_3", dialect="bigquery")
+
+        assert meta.get_dependency_index("SELECT * FROM table_1", dialect="bigquery") is index_1
+        assert meta.get_dependency_index("SELECT * FROM table_2", dialect="bigquery") is not index_2
 
 
 # Test the as_sql_input method
@@ -181,6 +225,76 @@ class TestToSqlModel:
         )
         assert sql_model == expected_sql_model
 
+    def test_to_sql_model_only_referenced_columns(self):
+        """...then only the provided columns should be rendered"""
+        mock_data = [{"col1": 42, "col2": "test_value"}, {"col1": 100, "col2": "another_value"}]
+        table_mock = MockTestTable(mock_data)
+        sql_model = table_mock.as_sql_input(column_names={"col2"})
+
+        expected_sql_model = (
+            f"{table_mock._sql_mock_meta.cte_name} AS (\n"
+            "\tSELECT cast('test_value' AS String) AS col2\n"
+            "\tUNION ALL\n"
+            "\tSELECT cast('another_value' AS String) AS col2\n"
+            ")"
+        )
+        assert sql_model == expected_sql_model
+
+    def test_to_sql_model_no_referenced_columns(self):
+        """...then the first column should be rendered to keep the CTE valid"""
+        table_mock = MockTestTable([{"col1": 42, "col2": "test_value"}])
+        sql_model = table_mock.as_sql_input(column_names=set())
+
+        expected_sql_model = f"{table_mock._sql_mock_meta.cte_name} AS (\n\tSELECT cast('42' AS Integer) AS col1\n)"
+        assert sql_model == expected_sql_model
+
+    def test_to_sql_model_constant_columns_hoisted(self):
+        """...then columns with the same value in all rows should only be rendered once"""
+        mock_data = [{"col1": 42}, {"col1": 100}]
+        table_mock = MockTestTable(mock_data)
+        sql_model = table_mock.as_sql_input()
+
+        expected_sql_model = (
+            f"{table_mock._sql_mock_meta.cte_name} AS (\n"
+            "\tSELECT col1, cast('hey' AS String) AS col2 FROM (\n"
+            "\t\tSELECT cast('42' AS Integer) AS col1\n"
+            "\t\tUNION ALL\n"
+            "\t\tSELECT cast('100' AS Integer) AS col1\n"
+            "\t) AS sql_mock__rows\n"
+            ")"
+        )
+        assert sql_model == expected_sql_model
+
+    def test_to_sql_model_all_columns_constant(self):
+        """...then the first column should still be rendered per row to keep the number of rows"""
+        mock_data = [{"col1": 42, "col2": "foo"}, {"col1": 42, "col2": "foo"}]
+        table_mock = MockTestTable(mock_data)
+        sql_model = table_mock.as_sql_input()
+
+        expected_sql_model = (
+            f"{table_mock._sql_mock_meta.cte_name} AS (\n"
+            "\tSELECT col1, cast('foo' AS String) AS col2 FROM (\n"
+            "\t\tSELECT cast('42' AS Integer) AS col1\n"
+            "\t\tUNION ALL\n"
+            "\t\tSELECT cast('42' AS Integer) AS col1\n"
+            "\t) AS sql_mock__rows\n"
+            ")"
+        )
+        assert sql_model == expected_sql_model
+
+    def test_to_sql_model_compact(self):
+        """...then only the first row should have column aliases and no line breaks should be used"""
+        mock_data = [{"col1": 42, "col2": "test_value"}, {"col1": 100, "col2": "another_value"}]
+        table_mock = MockTestTable(mock_data)
+        sql_model = table_mock.as_sql_input(compact=True)
+
+        expected_sql_model = (
+            f"{table_mock._sql_mock_meta.cte_name} AS ("
+            "SELECT cast('42' AS Integer) AS col1, cast('test_value' AS String) AS col2 "
+            "UNION ALL SELECT cast('100' AS Integer), cast('another_value' AS String))"
+        )
+        assert sql_model == expected_sql_model
+
 
 def test_cte_name():
     table_mock_meta = TableMockMeta(table_ref='"my-project.schema.table_name"')
@@ -0,0 +1,38 @@
+from sql_mock.timings import PhaseTimer, PhaseTimeSummary, get_phase_times, reset_phase_times
+
+
+class TestPhaseTimer:
+    def test_laps_added_to_phases(self):
+        """...then each lap should be added to the timings of the table mock and the times of the process"""
+        reset_phase_times()
+        timings = {}
+        timer = PhaseTimer(timings, "MyModel")
+
+        timer.lap("render")
+        timer.lap("rewrite")
+        timer.lap("render")
+
+        assert set(timings) == {"render", "rewrite"}
+        assert get_phase_times() == {
+            ("MyModel", "render"): timings["render"],
+            ("MyModel", "rewrite"): timings["rewrite"],
+        }
+
+
+class TestPhaseTimeSummary:
+    def test_from_phase_times(self):
+        """...then phases and models should be summed up and sorted by time"""
+        summary = PhaseTimeSummary.from_phase_times(
+            {("ModelA", "execution"): 3.0, ("ModelA", "literals"): 0.5, ("ModelB", "execution"): 1.0}
+        )
+
+        assert summary.phases == [("execution", 4.0), ("literals", 0.5)]
+        assert summary.models == [("ModelA", 3.5), ("ModelB", 1.0)]
+        assert str(summary) == (
+            "Slowest phases:\n"
+            "  4.00s execution\n"
+            "  0.50s literals\n"
+            "Slowest models:\n"
+            "  3.50s ModelA (execution 3.00s, literals 0.50s)\n"
+            "  1.00s ModelB (execution 1.00s)"
+        )
@@ -1,7 +1,13 @@
+import contextlib
+import time
+
 import pytest
 
 from sql_mock.column_mocks import BaseColumnMock
+from sql_mock.config import SQLMockConfig
+from sql_mock.connections import open_connection
 from sql_mock.table_mocks import BaseTableMock, table_meta
+from sql_mock.timings import COMPARISON_PHASE, EXECUTION_PHASE, PHASES, get_phase_times, reset_phase_times
 
 
 class IntTestColumn(BaseColumnMock):
@@ -143,6 +149,7 @@ def test_assert_equal(mocker, ignore_missing_keys, ignore_order):
     instance = MockTestTable()
     data = ([{"name": "Alice", "age": 25, "city": "New York"}, {"name": "Bob", "age": 30, "city": "Munich"}],)
     mocker.patch.object(instance, "_get_results", return_value=data)
+    mocker.patch.object(instance, "_iter_results", return_value=data)
     mocker.patch.object(instance, "_generate_query", return_value="SELECT 1")  # We don't care about the query here
     mocked_assert_equal = mocker.patch.object(instance, "_assert_equal", return_value=None)
 
@@ -154,6 +161,7 @@ def test_assert_equal(mocker, ignore_missing_keys, ignore_order):
         ignore_missing_keys=ignore_missing_keys,
         ignore_order=ignore_order,
         print_query_on_fail=True,
+        use_arrow=False,
     )
 
 
@@ -164,6 +172,7 @@ def test_assert_cte_equal(mocker, ignore_missing_keys, ignore_order):
     query = "SELECT 1"
     data = ([{"name": "Alice", "age": 25, "city": "New York"}, {"name": "Bob", "age": 30, "city": "Munich"}],)
     mocker.patch.object(instance, "_get_results", return_value=data)
+    mocker.patch.object(instance, "_iter_results", return_value=data)
     mocked_generate_query = mocker.patch.object(
         instance, "_generate_query", return_value=query
     )  # We don't care about the query here
@@ -179,5 +188,204 @@ def test_assert_cte_equal(mocker, ignore_missing_keys, ignore_order):
         ignore_missing_keys=ignore_missing_keys,
         ignore_order=ignore_order,
         print_query_on_fail=True,
+        use_arrow=False,
     )
     mocked_generate_query.assert_called_once_with(cte_to_select=cte_name)
+
+
+@pytest.mark.parametrize("ignore_order, expected_method", [(True, "_get_results"), (False, "_iter_results")])
+def test_assert_equal_uses_streamed_results_when_order_matters(mocker, ignore_order, expected_method):
+    """...then the rows should only be streamed if the order is not ignored"""
+    instance = MockTestTable()
+    mocker.patch.object(instance, "_generate_query", return_value="SELECT 1")
+    mocked_get_results = mocker.patch.object(instance, "_get_results", return_value=[])
+    mocked_iter_results = mocker.patch.object(instance, "_iter_results", return_value=iter([]))
+
+    instance.assert_equal(expected=[], ignore_order=ignore_order)
+
+    called, not_called = (
+        (mocked_get_results, mocked_iter_results)
+        if expected_method == "_get_results"
+        else (mocked_iter_results, mocked_get_results)
+    )
+    called.assert_called_once_with("SELECT 1")
+    not_called.assert_not_called()
+
+
+def test__assert_equal_ordered_stops_consuming_on_first_mismatch():
+    """...then rows after the first mismatch should not be fetched and the stream should be closed"""
+    instance = MockTestTable()
+    consumed = []
+    closed = []
+
+    def stream():
+        try:
+            for row in [{"name": "Alice"}, {"name": "Not Bob"}, {"name": "Charlie"}, {"name": "Dora"}]:
+                consumed.append(row)
+                yield row
+        finally:
+            closed.append(True)
+
+    with pytest.raises(AssertionError):
+        instance._assert_equal(
+            data=stream(),
+            expected=[{"name": "Alice"}, {"name": "Bob"}, {"name": "Charlie"}, {"name": "Dora"}],
+            ignore_order=False,
+            print_query_on_fail=False,
+        )
+
+    assert consumed == [{"name": "Alice"}, {"name": "Not Bob"}]
+    assert closed == [True]
+
+
+def test__assert_equal_ordered_more_rows_than_expected():
+    """...then the first superfluous row should make the assertion fail"""
+    instance = MockTestTable()
+
+    with pytest.raises(AssertionError):
+        instance._assert_equal(
+            data=iter([{"name": "Alice"}, {"name": "Bob"}]),
+            expected=[{"name": "Alice"}],
+            ignore_order=False,
+            print_query_on_fail=False,
+        )
+
+
+def test__assert_equal_ordered_less_rows_than_expected():
+    """...then the assertion should fail"""
+    instance = MockTestTable()
+
+    with pytest.raises(AssertionError):
+        instance._assert_equal(
+            data=iter([{"name": "Alice"}]),
+            expected=[{"name": "Alice"}, {"name": "Bob"}],
+            ignore_order=False,
+            print_query_on_fail=False,
+        )
+
+
+def test_assert_equal_uses_arrow_results(mocker):
+    """...then the results should be fetched as Arrow table and passed on for the comparison"""
+    instance = MockTestTable()
+    arrow_result = object()
+    mocker.patch.object(instance, "_generate_query", return_value="SELECT 1")
+    mocked_get_arrow_results = mocker.patch.object(instance, "_get_arrow_results", return_value=arrow_result)
+    mocked_assert_equal = mocker.patch.object(instance, "_assert_equal", return_value=None)
+
+    instance.assert_equal(expected=[], use_arrow=True)
+
+    mocked_get_arrow_results.assert_called_once_with("SELECT 1")
+    mocked_assert_equal.assert_called_once_with(
+        data=arrow_result,
+        expected=[],
+        ignore_missing_keys=False,
+        ignore_order=True,
+        print_query_on_fail=True,
+        use_arrow=True,
+    )
+
+
+def test_get_arrow_results_not_supported():
+    """...then a NotImplementedError should be raised"""
+    with pytest.raises(NotImplementedError):
+        MockTestTable()._get_arrow_results("SELECT 1")
+
+
+class TestLargeResults:
+    @pytest.fixture(autouse=True)
+    def small_detailed_diff_limit(self, mocker):
+        mocker.patch.object(SQLMockConfig, "_detailed_diff_max_rows", 2)
+
+    @pytest.mark.parametrize("ignore_order", [True, False])
+    def test_matching_data(self, ignore_order):
+        """...then the assertion should pass"""
+        data = [{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}]
+
+        MockTestTable()._assert_equal(data=data, expected=list(data), ignore_order=ignore_order)
+
+    def test_not_matching_data(self):
+        """...then a structured diff should be raised instead of comparing the lists with pytest"""
+        data = [{"name": "Alice", "age": 25}, {"name": "Bob", "age": 31}]
+        expected = [{"name": "Alice", "age": 25}, {"name": "Bob", "age": 30}]
+
+        with pytest.raises(AssertionError) as e:
+            MockTestTable()._assert_equal(data=data, expected=expected, print_query_on_fail=False)
+
+        assert str(e.value).startswith("Query results do not match the expected data.")
+        assert "Missing rows (expected but not returned): 1" in str(e.value)
+        assert "Mismatches per column between paired rows: {'age': 1}" in str(e.value)
+
+    def test_not_matching_data_ordered(self):
+        """...then the diff should report all expected rows when fetching stopped at the first mismatch"""
+        expected = [{"name": "Alice", "age": age} for age in range(6)]
+        data = iter([{"name": "Alice", "age": 0}, {"name": "Alice", "age": 1}, {"name": "Bob", "age": 2}])
+
+        with pytest.raises(AssertionError) as e:
+            MockTestTable()._assert_equal(data=data, expected=expected, ignore_order=False, print_query_on_fail=False)
+
+        assert "Expected 6 rows. Fetching stopped at the first mismatching row after 3 rows" in str(e.value)
+        assert "Positions with mismatching rows: 1" in str(e.value)
+
+
+def test__assert_equal_prints_truncated_query(mocker, capsys):
+    """...then only the beginning of the query should be printed"""
+    mocker.patch.object(SQLMockConfig, "_failed_query_max_length", 5)
+    instance = MockTestTable()
+    instance._sql_mock_data.last_query = "SELECT 1234567890"
+
+    with pytest.raises(AssertionError):
+        instance._assert_equal(data=[{"name": "Alice"}], expected=[{"name": "Bob"}], print_query_on_fail=True)
+
+    printed = capsys.readouterr().out
+    assert printed.startswith("SELEC\n... (12 more characters truncated")
+
+
+@table_meta(table_ref="result_table", query="SELECT name, age FROM test_data")
+class ResultTable(BaseTableMock):
+    name = StringTestColumn(default="Thomas")
+    age = IntTestColumn(default=0)
+
+
+class TestPhaseTimings:
+    @pytest.fixture(autouse=True)
+    def reset_times(self):
+        reset_phase_times()
+
+    def test_all_phases_recorded(self, mocker):
+        """...then the time of every phase should be stored on the table mock and added to the times of the process"""
+        instance = ResultTable.from_mocks(input_data=[MockTestTable()])
+        mocker.patch.object(instance, "_get_results", return_value=[{"name": "Thomas", "age": 0}])
+
+        instance.assert_equal([{"name": "Thomas", "age": 0}])
+
+        assert set(instance._sql_mock_data.phase_timings) == set(PHASES)
+        assert all(seconds >= 0 for seconds in instance._sql_mock_data.phase_timings.values())
+        phase_times = get_phase_times()
+        assert ("ResultTable", COMPARISON_PHASE) in phase_times
+        assert ("MockTestTable", COMPARISON_PHASE) not in phase_times
+
+    def test_streamed_results_count_as_execution(self, mocker):
+        """...then fetching rows during the comparison should be attributed to the execution"""
+
+        def iter_results(query):
+            with open_connection("test", contextlib.nullcontext):
+                time.sleep(0.05)
+                yield {"name": "Thomas", "age": 0}
+
+        instance = ResultTable.from_mocks(input_data=[MockTestTable()])
+        mocker.patch.object(instance, "_iter_results", side_effect=iter_results)
+
+        instance.assert_equal([{"name": "Thomas", "age": 0}], ignore_order=False)
+
+        assert instance._sql_mock_data.phase_timings[EXECUTION_PHASE] >= 0.05
+        assert instance._sql_mock_data.phase_timings[COMPARISON_PHASE] < 0.05
+
+    def test_failed_assertion_recorded(self, mocker):
+        """...then the comparison of a failing assertion should be recorded as well"""
+        instance = ResultTable.from_mocks(input_data=[MockTestTable()])
+        mocker.patch.object(instance, "_get_results", return_value=[{"name": "Thomas", "age": 0}])
+
+        with pytest.raises(AssertionError):
+            instance.assert_equal([{"name": "Bob", "age": 0}], print_query_on_fail=False)
+
+        assert COMPARISON_PHASE in instance._sql_mock_data.phase_timings
@@ -1,7 +1,10 @@
+import pytest
 import sqlglot
 
 from sql_mock.column_mocks import BaseColumnMock
-from sql_mock.table_mocks import BaseTableMock, table_meta
+from sql_mock.config import SQLMockConfig
+from sql_mock.exceptions import QuerySizeExceededError
+from sql_mock.table_mocks import TEMP_TABLE_NAME_SUFFIX, BaseTableMock, table_meta
 
 
 class IntTestColumn(BaseColumnMock):
@@ -33,15 +36,16 @@ def test_generate_query_no_cte_provided(mocker):
     dummy_return_query = sqlglot.parse_one("SELECT foo FROM bar")
     table_mock_instance._sql_mock_data.rendered_query = original_query
 
-    mocked_select_from_cte = mocker.patch("sql_mock.table_mocks.select_from_cte")
+    mocked_select_from_cte = mocker.patch("sql_mock.table_mocks.select_from_cte_ast")
     mocked_replace_original_table_references = mocker.patch(
         "sql_mock.table_mocks.replace_original_table_references", return_value=dummy_return_query
     )
 
+    # The input data is not part of the parsed query but only a placeholder
     expected_query_template_result = sqlglot.parse_one(
         f"""
     WITH {table_mock_instance._sql_mock_meta.cte_name} AS (
-    \tSELECT cast('1' AS Integer) AS col1, cast('hey' AS String) AS col2 FROM (SELECT 1) WHERE FALSE
+    \tSELECT 'sql_mock__input_0'
     ),
 
     result AS (
@@ -64,10 +68,13 @@ def test_generate_query_no_cte_provided(mocker):
         query_ast=expected_query_template_result,
         table_ref=table_mock_instance._sql_mock_meta.table_ref,
         sql_mock_cte_name=table_mock_instance._sql_mock_meta.cte_name,
-        dialect=table_mock_instance._sql_dialect
+        dialect=table_mock_instance._sql_dialect,
     )
     # The final query should be equal to whatever is returned by `replace_original_table_references`
-    assert query == mocked_replace_original_table_references.return_value.sql(pretty=True)
+    assert query == mocked_replace_original_table_references.return_value.sql(dialect="bigquery")
+    assert table_mock_instance._sql_mock_data.last_query == mocked_replace_original_table_references.return_value.sql(
+        pretty=True, dialect="bigquery"
+    )
 
 
 def test_generate_query_cte_provided(mocker):
@@ -81,7 +88,9 @@ def test_generate_query_cte_provided(mocker):
     dummy_return_query = sqlglot.parse_one("SELECT foo FROM bar")
     table_mock_instance._sql_mock_data.rendered_query = original_query
 
-    mocked_select_from_cte = mocker.patch("sql_mock.table_mocks.select_from_cte", return_value=cte_adjusted_query)
+    mocked_select_from_cte = mocker.patch(
+        "sql_mock.table_mocks.select_from_cte_ast", return_value=sqlglot.parse_one(cte_adjusted_query)
+    )
     mocked_replace_original_table_references = mocker.patch(
         "sql_mock.table_mocks.replace_original_table_references", return_value=dummy_return_query
     )
@@ -89,7 +98,7 @@ def test_generate_query_cte_provided(mocker):
     expected_query_template_result = sqlglot.parse_one(
         f"""
     WITH {table_mock_instance._sql_mock_meta.cte_name} AS (
-    \tSELECT cast('1' AS Integer) AS col1, cast('hey' AS String) AS col2 FROM (SELECT 1) WHERE FALSE
+    \tSELECT 'sql_mock__input_0'
     ),
 
     result AS (
@@ -107,17 +116,20 @@ def test_generate_query_cte_provided(mocker):
 
     # Asserts
     mocked_select_from_cte.assert_called_once_with(
-        original_query, cte_to_select, sql_dialect=table_mock_instance._sql_dialect
+        sqlglot.parse_one(original_query, dialect=table_mock_instance._sql_dialect), cte_to_select
     )
     # replace_original_table_references should be called once since we have a single input table
     mocked_replace_original_table_references.assert_called_once_with(
         query_ast=expected_query_template_result,
         table_ref=table_mock_instance._sql_mock_meta.table_ref,
         sql_mock_cte_name=table_mock_instance._sql_mock_meta.cte_name,
-        dialect=table_mock_instance._sql_dialect
+        dialect=table_mock_instance._sql_dialect,
     )
     # The final query should be equal to whatever is returned by `replace_original_table_references`
-    assert query == mocked_replace_original_table_references.return_value.sql(pretty=True)
+    assert query == mocked_replace_original_table_references.return_value.sql(dialect="bigquery")
+    assert table_mock_instance._sql_mock_data.last_query == mocked_replace_original_table_references.return_value.sql(
+        pretty=True, dialect="bigquery"
+    )
 
 
 def test_generate_query_sql_has_semicolon():
@@ -130,3 +142,252 @@ def test_generate_query_sql_has_semicolon():
 
     # Act
     table_mock_instance._generate_query()
+
+
+def test_generate_query_last_query_rendered_lazily(mocker):
+    """...then the compact query is returned and the pretty query is only rendered on access"""
+    # Arrange
+    table_mock_instance = MockTestTable.from_dicts([])
+    table_mock_instance._sql_mock_data.input_data = [table_mock_instance]
+    table_mock_instance._sql_mock_data.rendered_query = f"SELECT * FROM {table_mock_instance._sql_mock_meta.table_ref}"
+    spy_sql = mocker.spy(sqlglot.Expression, "sql")
+
+    # Act
+    query = table_mock_instance._generate_query()
+
+    # Assert
+    assert "\n" not in query
+    assert query == table_mock_instance._sql_mock_data.executed_query
+    assert not any(call.kwargs.get("pretty") for call in spy_sql.call_args_list)
+    last_query = table_mock_instance._sql_mock_data.last_query
+    assert sqlglot.parse_one(last_query, dialect="bigquery") == sqlglot.parse_one(query, dialect="bigquery")
+    assert "\n" in last_query
+    # The pretty query is cached after the first access
+    assert table_mock_instance._sql_mock_data.last_query is last_query
+
+
+def test_generate_query_input_data_not_parsed(mocker):
+    """...then the input data should be spliced into the query without being parsed by sqlglot"""
+    # Arrange
+    table_mock_instance = MockTestTable.from_dicts([{"col1": index, "col2": f"value_{index}"} for index in range(3)])
+    table_mock_instance._sql_mock_data.input_data = [table_mock_instance]
+    table_mock_instance._sql_mock_data.rendered_query = f"SELECT * FROM {table_mock_instance._sql_mock_meta.table_ref}"
+    spy_parse_one = mocker.spy(sqlglot, "parse_one")
+
+    # Act
+    query = table_mock_instance._generate_query()
+
+    # Assert
+    assert not any("value_" in str(call.args[0]) for call in spy_parse_one.call_args_list)
+    assert "sql_mock__input_" not in query
+    assert all(f"'value_{index}'" in query for index in range(3))
+    assert "sql_mock__input_" not in table_mock_instance._sql_mock_data.last_query
+    # The spliced query is still valid SQL
+    assert sqlglot.parse_one(query, dialect="bigquery") == sqlglot.parse_one(
+        table_mock_instance._sql_mock_data.last_query, dialect="bigquery"
+    )
+
+
+def test_generate_query_independent_of_input_order():
+    """...then the same query text should be generated for any order of input mocks"""
+
+    @table_meta(table_ref="data.other_table")
+    class OtherTable(BaseTableMock):
+        col1 = int_col
+        _sql_dialect = "bigquery"
+
+    @table_meta(query="SELECT a.col1, b.col2 FROM data.other_table AS a JOIN data.mock_test_table AS b USING (col1)")
+    class ResultTable(BaseTableMock):
+        col1 = int_col
+        col2 = string_col
+        _sql_dialect = "bigquery"
+
+    input_data = [OtherTable.from_dicts([{"col1": 2}]), MockTestTable.from_dicts([{"col1": 1}])]
+
+    query = ResultTable.from_mocks(input_data=input_data)._generate_query()
+    reversed_query = ResultTable.from_mocks(input_data=input_data[::-1])._generate_query()
+
+    assert query == reversed_query
+    # Input CTEs are sorted by their name
+    assert query.index(MockTestTable._sql_mock_meta.cte_name) < query.index(OtherTable._sql_mock_meta.cte_name)
+
+
+class TestProjectionPushdown:
+    @table_meta(table_ref="data.wide_table")
+    class WideTable(BaseTableMock):
+        col1 = int_col
+        col2 = string_col
+        col3 = int_col
+        _sql_dialect = "bigquery"
+
+    @table_meta(query="SELECT w.col2 FROM data.wide_table AS w")
+    class ResultTable(BaseTableMock):
+        col2 = string_col
+        _sql_dialect = "bigquery"
+
+    def test_only_referenced_columns_rendered(self):
+        """...then only the referenced columns of the input mock should be part of the query"""
+        res = self.ResultTable.from_mocks(input_data=[self.WideTable([{"col1": 1, "col2": "a", "col3": 3}])])
+
+        query = res._generate_query()
+
+        assert "AS col2" in query
+        assert "AS col1" not in query
+        assert "AS col3" not in query
+
+    def test_projection_pushdown_disabled(self, mocker):
+        """...then all columns of the input mock should be part of the query"""
+        mocker.patch("sql_mock.table_mocks.SQLMockConfig.get_projection_pushdown", return_value=False)
+        res = self.ResultTable.from_mocks(input_data=[self.WideTable([{"col1": 1, "col2": "a", "col3": 3}])])
+
+        query = res._generate_query()
+
+        assert all(f"AS col{i}" in query for i in range(1, 4))
+
+
+class TestQuerySizeBudget:
+    @table_meta(table_ref="data.large_table")
+    class LargeTable(BaseTableMock):
+        col1 = int_col
+        col2 = string_col
+        _sql_dialect = "bigquery"
+
+    @table_meta(query="SELECT col1, col2 FROM data.large_table")
+    class ResultTable(BaseTableMock):
+        col1 = int_col
+        col2 = string_col
+        _sql_dialect = "bigquery"
+
+    class TempTableResultTable(ResultTable):
+        _supports_temp_table_inputs = True
+
+    @pytest.fixture(autouse=True)
+    def reset_config(self):
+        yield
+        SQLMockConfig.set_max_query_size(None)
+        SQLMockConfig.set_query_size_policy("auto")
+        SQLMockConfig.set_materialize_repeated_inputs(False)
+
+    @table_meta(query="SELECT a.col1, b.col2 FROM data.large_table AS a JOIN data.large_table AS b USING (col1)")
+    class SelfJoinResultTable(TempTableResultTable):
+        _materialize_repeated_inputs = True
+
+    def _from_mocks(self, result_table_class, num_rows=100):
+        data = [{"col1": i, "col2": f"value_{i}"} for i in range(num_rows)]
+        return result_table_class.from_mocks(input_data=[self.LargeTable(data)])
+
+    def test_within_budget(self):
+        """...then the input mocks should be rendered as literals and the size should be reported"""
+        res = self._from_mocks(self.ResultTable)
+
+        query = res._generate_query()
+
+        report = res._sql_mock_data.query_size_report
+        assert report.query_size == len(query.encode("utf-8"))
+        assert report.input_mocks[0].table_ref == "data.large_table"
+        assert report.input_mocks[0].strategy == "literal"
+        assert res._sql_mock_data.setup_statements == []
+
+    def test_switch_to_compact_encoding(self):
+        """...then the largest input mocks should only have column aliases in the first row"""
+        literal_size = len(self._from_mocks(self.ResultTable)._generate_query().encode("utf-8"))
+        SQLMockConfig.set_max_query_size(literal_size - 1)
+        res = self._from_mocks(self.ResultTable)
+
+        with pytest.warns(UserWarning, match="query size budget"):
+            query = res._generate_query()
+
+        assert res._sql_mock_data.query_size_report.input_mocks[0].strategy == "compact"
+        assert len(query.encode("utf-8")) < literal_size
+        # Only the first row of the input mock has an alias
+        assert query.count("' AS INT64) AS col1") == 1
+
+    def test_switch_to_temp_tables(self):
+        """...then the largest input mocks should be loaded with setup statements that stay within the budget"""
+        SQLMockConfig.set_max_query_size(1000)
+        res = self._from_mocks(self.TempTableResultTable)
+
+        with pytest.warns(UserWarning, match="query size budget"):
+            query = res._generate_query()
+
+        setup_statements = res._sql_mock_data.setup_statements
+        assert res._sql_mock_data.query_size_report.input_mocks[0].strategy == "temp_table"
+        # The name is unique per process so that the drop statement can't affect a permanent table
+        temp_table_name = f"sql_mock__data__large_table__input{TEMP_TABLE_NAME_SUFFIX}"
+        # Temp tables of previous queries on a shared connection are dropped first
+        assert setup_statements[0] == f"DROP TABLE IF EXISTS {temp_table_name}"
+        assert setup_statements[1].startswith(f"CREATE TEMPORARY TABLE {temp_table_name} AS SELECT")
+        assert all(statement.startswith("INSERT INTO") for statement in setup_statements[2:])
+        assert all(len(statement.encode("utf-8")) <= 1000 for statement in setup_statements)
+        # All rows are loaded
+        assert sum(statement.count("AS INT64") for statement in setup_statements) == 100
+        assert f"FROM {temp_table_name}" in query
+        # The data of the temp table is part of the readable query
+        assert res._sql_mock_data.last_query.startswith(f"{setup_statements[0]};\n\n{setup_statements[1]};\n\n")
+        assert f"FROM {temp_table_name}" in res._sql_mock_data.last_query
+
+    @pytest.mark.parametrize("policy", ["auto", "compact", "error"])
+    def test_budget_can_not_be_met(self, policy):
+        """...then an error that reports the largest input mocks should be raised"""
+        SQLMockConfig.set_max_query_size(100)
+        SQLMockConfig.set_query_size_policy(policy)
+        res = self._from_mocks(self.ResultTable)
+
+        with pytest.raises(QuerySizeExceededError) as e:
+            res._generate_query()
+
+        assert "LargeTable (data.large_table)" in str(e.value)
+        assert e.value.report.exceeds_budget
+
+    def test_ignore_policy(self):
+        """...then the query should be returned regardless of its size"""
+        SQLMockConfig.set_max_query_size(100)
+        SQLMockConfig.set_query_size_policy("ignore")
+        res = self._from_mocks(self.ResultTable)
+
+        res._generate_query()
+
+        assert res._sql_mock_data.query_size_report.exceeds_budget
+
+    def test_materialize_repeated_inputs(self, recwarn):
+        """...then input mocks that are referenced multiple times should be loaded into temp tables"""
+        SQLMockConfig.set_materialize_repeated_inputs(True)
+        res = self._from_mocks(self.SelfJoinResultTable, num_rows=3)
+
+        query = res._generate_query()
+
+        assert res._sql_mock_data.query_size_report.input_mocks[0].strategy == "temp_table"
+        assert "'value_0'" not in query
+        assert len(res._sql_mock_data.setup_statements) == 2
+        assert res._sql_mock_data.setup_statements[1].startswith("CREATE TEMPORARY TABLE")
+        # Materialization is not a query size budget fallback
+        assert not recwarn.list
+
+    def test_single_reference_not_materialized(self):
+        """...then input mocks that are referenced once should stay in the query"""
+
+        class SingleReferenceResultTable(self.TempTableResultTable):
+            _materialize_repeated_inputs = True
+
+        SQLMockConfig.set_materialize_repeated_inputs(True)
+        res = self._from_mocks(SingleReferenceResultTable, num_rows=3)
+
+        query = res._generate_query()
+
+        assert res._sql_mock_data.query_size_report.input_mocks[0].strategy == "literal"
+        assert "'value_0'" in query
+        assert res._sql_mock_data.setup_statements == []
+
+    def test_repeated_inputs_not_materialized_by_default(self):
+        """...then input mocks that are referenced multiple times should stay in the query"""
+        res = self._from_mocks(self.SelfJoinResultTable, num_rows=3)
+
+        query = res._generate_query()
+
+        assert res._sql_mock_data.query_size_report.input_mocks[0].strategy == "literal"
+        assert "'value_0'" in query
+        assert res._sql_mock_data.setup_statements == []
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            SQLMockConfig.set_query_size_policy("unknown")